@@ -7,6 +7,7 @@ import logging
 import argparse
 import time
 from botocore.client import Config
+from config import FRAMEWORK_ROOT
 from config.test_config_reader import aws_config, test_header
 
 logging.basicConfig()
@@ -19,7 +20,7 @@ Script to prepare packages_folder, framework and tests into zip to upload to lam
 
 
 def constants() -> tuple:
-    framework_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    framework_root = FRAMEWORK_ROOT
     packages_folder = os.path.join(framework_root, 'aws', 'python-packages')
     lambda_zip_file = os.path.join(framework_root, 'aws', 'lambda.zip')
     run_file = os.path.join(framework_root, 'load_generator.py')
@@ -154,15 +155,17 @@ def upload_lambda_code(zip_bytes: bytes, client: boto3.client) -> None:
         logger.exception(e)
 
 
-def get_aws_client() -> boto3.client:
+def get_aws_client(read_timeout: int = 310, max_pool_connections: int = 10) -> boto3.client:
     """
     Function to get lambda client basing on config
+    :param read_timeout: socket read timeout in seconds
+    :param max_pool_connections: max amount of connections kept in connection pool
     :return: boto3.client
     """
     session = boto3.session.Session(aws_access_key_id=aws_config['aws_access_key_id'],
                                     aws_secret_access_key=aws_config['aws_secret_access_key'],
                                     region_name=test_header['location'])
-    config = Config(connect_timeout=10, read_timeout=310)
+    config = Config(connect_timeout=10, read_timeout=read_timeout, max_pool_connections=max_pool_connections)
     client = session.client('lambda', config=config)
     return client
 
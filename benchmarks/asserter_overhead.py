@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of LocustAsserter overhead per request: time of entering and exiting asserter with ready response,
+including firing events into Locust stats and histogram recorder, compared with previous asserter
+on time.time() milliseconds and transaction dict.
+With --bare no listeners are subscribed, so only asserter own time is measured.
+Run from repo root: python benchmarks/asserter_overhead.py [--requests 200000] [--bare]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from locust import events
+from locust import stats as locust_stats
+from locust.stats import global_stats
+from framework.generator.asserter import LocustAsserter
+from framework.generator.recorder import HistogramRecorder
+
+RESPONSE_LENGTH = 1024
+
+
+class ReadyResponse(object):
+    content = b'x' * RESPONSE_LENGTH
+
+    def __bool__(self):
+        return True
+
+
+class PreviousAsserter(object):
+    """
+    Asserter before perf_counter_ns rework, without expected response and flow interruption
+    """
+    def __init__(self, name: str):
+        self.__transaction = {'request_type': 'https', 'name': name, 'response_length': 0}
+
+    def __enter__(self):
+        self.__start = int(round(time.time() * 1000))
+        self.response = None
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = int(round(time.time() * 1000))
+        self.__transaction.update({'response_time': int(end - self.__start)})
+        self.__transaction['response_length'] = len(self.response.content)
+        events.request_success.fire(**self.__transaction)
+        return True
+
+
+def measure(asserter_cls, requests: int) -> float:
+    """
+    :return: ns per request
+    """
+    response = ReadyResponse()
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        with asserter_cls(name='benchmark') as asserter:
+            asserter.response = response
+    return (time.perf_counter_ns() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LocustAsserter overhead per request')
+    parser.add_argument('--requests', type=int, default=200000, help='requests per variant')
+    parser.add_argument('--bare', action='store_true', help='measure asserter without stats listeners')
+    args = parser.parse_args()
+    recorder = HistogramRecorder(significant_figures=2)
+    if args.bare:
+        events.request_success -= locust_stats.on_request_success
+    else:
+        recorder.start()
+    variants = [('previous asserter', PreviousAsserter, None),
+                ('asserter', LocustAsserter, 1),
+                ('asserter, success_sampling=10', LocustAsserter, 10),
+                ('asserter, success_sampling=100', LocustAsserter, 100)]
+    print(f'{"variant":<34}{"us/request":>12}{"locust requests":>18}{"histogram requests":>20}')
+    for title, asserter_cls, sampling in variants:
+        if sampling:
+            LocustAsserter.configure(success_sampling=sampling)
+        measure(asserter_cls, requests=min(args.requests, 1000))    # warm up
+        global_stats.clear_all()
+        recorder.stats.__init__(significant_figures=2)
+        per_request = measure(asserter_cls, requests=args.requests)
+        print(f'{title:<34}{per_request / 1000:>12.2f}{global_stats.num_requests:>18}'
+              f'{recorder.stats.num_requests:>20}')
+    if not args.bare:
+        recorder.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark of response assertion throughput on large json documents: compiled ExpectedResponse matcher
+compared with previous ExpectedResponse (json parsed by every check, keys converted by every call, lists sorted).
+Every check gets fresh response, as in load test, and is followed by extraction of two values from the body
+Run from repo root: python benchmarks/matcher_throughput.py [--items 100 1000 10000] [--checks 200]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from framework.generator.expected import ExpectedResponse
+from framework.generator.extract import Extractor, extract
+
+PROPERTIES_ID = Extractor(json_item='properties.id')
+PROPERTIES_STATUS = Extractor(json_item='properties.status')
+
+
+def previous_contains(super_dict: dict, sub_dict: dict) -> bool:
+    def snake_to_camel(name: str) -> str:
+        words = name.split('_')
+        if len(words) == 1:
+            return name
+        first_word = words.pop(0)
+        words = [word.capitalize() for word in words]
+        words.insert(0, first_word)
+        return "".join(words)
+
+    for k, v in sub_dict.items():
+        super_node = super_dict.get(snake_to_camel(k))
+        if not super_node \
+                or type(super_node) != type(v) \
+                or isinstance(super_node, dict) and not previous_contains(super_node, v) \
+                or isinstance(super_node, list) and sorted(super_node) != sorted(v) \
+                or not isinstance(super_node, (list, dict)) and super_node != v:
+            return False
+    return True
+
+
+class PreviousExpectedResponse(ExpectedResponse):
+    """
+    ExpectedResponse before compiled matcher, values are extracted by parsing body again
+    """
+    def __eq__(self, other):
+        if self.code and self.code != other.status_code:
+            return False
+        if self.json and not previous_contains(other.json(), self.json):
+            return False
+        return True
+
+    @staticmethod
+    def extract(response: Response) -> tuple:
+        return tuple(_previous_extract(response, path) for path in ('properties.id', 'properties.status'))
+
+
+def _previous_extract(response: Response, json_item: str):
+    value = json.loads(response.text)
+    for key in json_item.split('.'):
+        value = value[key]
+    return value
+
+
+def make_body(items: int) -> bytes:
+    document = {'properties': {'id': 'a1b2c3', 'status': 'COMPLETED', 'treatmentType': 'aligner',
+                               'tags': [f'tag{i}' for i in range(items)],
+                               'steps': [{'stepNumber': i, 'teeth': list(range(32))} for i in range(items)]},
+                'links': {'self': {'href': '/treatments/a1b2c3'}}}
+    return json.dumps(document).encode()
+
+
+def make_expected(expected_cls, items: int) -> ExpectedResponse:
+    return expected_cls(code=200, json={'properties': {'status': 'COMPLETED', 'treatment_type': 'aligner',
+                                                       'tags': [f'tag{i}' for i in reversed(range(items))]},
+                                        'links': {'self': {'href': '/treatments/a1b2c3'}}})
+
+
+def make_response(body: bytes) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+    return response
+
+
+def measure(check, body: bytes, checks: int) -> float:
+    """
+    :return: checks per second
+    """
+    start = time.perf_counter()
+    for _ in range(checks):
+        check(make_response(body))
+    return checks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ExpectedResponse throughput on large json documents')
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1000, 10000], help='list items in document')
+    parser.add_argument('--checks', type=int, default=200, help='checks per document size')
+    args = parser.parse_args()
+    print(f'{"items":>7}{"body KB":>9}{"previous/s":>12}{"compiled/s":>12}{"speedup":>9}')
+    for items in args.items:
+        body = make_body(items)
+        previous, compiled = make_expected(PreviousExpectedResponse, items), make_expected(ExpectedResponse, items)
+
+        def check_previous(response):
+            assert previous == response
+            PreviousExpectedResponse.extract(response)
+
+        def check_compiled(response):
+            assert compiled == response
+            extract(response, PROPERTIES_ID, PROPERTIES_STATUS)
+
+        previous_rate = measure(check_previous, body, args.checks)
+        compiled_rate = measure(check_compiled, body, args.checks)
+        print(f'{items:>7}{len(body) / 1024:>9.0f}{previous_rate:>12.0f}{compiled_rate:>12.0f}'
+              f'{compiled_rate / previous_rate:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
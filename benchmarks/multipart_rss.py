@@ -0,0 +1,107 @@
+"""
+Benchmark of generator memory for uploads in progress: peak RSS vs user count of multipart uploads
+buffered by requests ('files' argument) and streamed with MultipartEncoder.
+Every user count and mode runs in its own process (peak RSS can't go down), uploads go to local
+HTTP server reading bodies slowly, so uploads of all users are in progress at the same time.
+Run from repo root: python benchmarks/multipart_rss.py [--users 1 10 50 100] [--size-mb 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READ_CHUNK = 64 * 1024
+READ_DELAY = 0.002  # seconds between chunks read by server
+
+
+class SlowUploadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        remaining = int(self.headers['Content-Length'])
+        while remaining:
+            remaining -= len(self.rfile.read(min(READ_CHUNK, remaining)))
+            time.sleep(READ_DELAY)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024    # kB on Linux
+
+
+def upload(mode: str, users: int, size: int, url: str) -> dict:
+    """
+    Uploads of all users at once in this process
+    :return: peak RSS before and during uploads
+    """
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+    import requests
+    sys.path.insert(0, ROOT)
+    from framework.api.multipart import MultipartEncoder
+    from framework.generator.helpers import payloads
+
+    payload = payloads.random(size)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=users)
+    session.mount('http://', adapter)
+    baseline = peak_rss_mb()
+
+    def user():
+        if mode == 'streaming':
+            body = MultipartEncoder({'adfFile': ('adf.adf', payload, 'application/octet-stream')})
+            session.post(url, data=body, headers={'Content-Type': body.content_type})
+        else:
+            session.post(url, files={'adfFile': ('adf.adf', payload, 'application/octet-stream')})
+
+    start = time.perf_counter()
+    gevent.joinall([gevent.spawn(user) for _ in range(users)], raise_error=True)
+    return {'mode': mode, 'users': users, 'baseline_mb': baseline, 'peak_mb': peak_rss_mb(),
+            'seconds': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak RSS of buffered and streamed multipart uploads')
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 10, 50, 100], help='concurrent uploads')
+    parser.add_argument('--size-mb', type=float, default=5, help='upload size, MB')
+    parser.add_argument('--run', nargs=3, metavar=('MODE', 'USERS', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = int(args.size_mb * 2 ** 20)
+    if args.run:
+        mode, users, url = args.run
+        print(json.dumps(upload(mode, int(users), size, url)))
+        return
+
+    ThreadingHTTPServer.request_queue_size = max(args.users)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowUploadHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/upload'
+    print(f'{args.size_mb:g} MB uploads, peak RSS over baseline, MB')
+    print(f'{"users":>6}{"buffered":>12}{"streaming":>12}')
+    for users in args.users:
+        row = dict()
+        for mode in ('buffered', 'streaming'):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--size-mb', str(args.size_mb),
+                                     '--run', mode, str(users), url],
+                                    check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            row[mode] = result['peak_mb'] - result['baseline_mb']
+        print(f'{users:>6}{row["buffered"]:>12.1f}{row["streaming"]:>12.1f}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
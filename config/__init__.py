@@ -0,0 +1,7 @@
+import os
+
+"""
+Load test configs: test profile, environment and system credentials
+"""
+
+FRAMEWORK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))     # paths in configs are relative to it
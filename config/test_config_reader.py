@@ -1,5 +1,6 @@
 import yaml
 import os
+from config import FRAMEWORK_ROOT
 from config.env_config_reader import EnvConfig
 """
 Here we deal with load test config and return env config for Align hyperclient
@@ -16,8 +17,7 @@ def get_test_profile_path() -> str:
 
 
 def read_test_config(profile_path: str):
-    framework_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    profile = os.path.join(framework_root, profile_path)
+    profile = os.path.join(FRAMEWORK_ROOT, profile_path)
     with open(profile, 'r') as config:
         c = yaml.safe_load(config)
     return c
@@ -46,6 +46,7 @@ def read_common_config():
 
 test_profile = read_test_config(profile_path=get_test_profile_path())
 test_header = test_profile['test_header']
+controller_config = test_profile.get('controller') or {}   # test controller settings, not stats dimensions
 
 sys_creds = read_sys_creds()
 env_config = read_env_config()
@@ -54,6 +55,7 @@ common_config = read_common_config()
 
 datapool = test_profile['datapool']
 runner_config = test_profile['profile']['runner']
+shape_config = test_profile['profile'].get('shape')
 
 sfx_config = sys_creds['signalfx']
 splunk_config = sys_creds['splunk']
@@ -1,6 +1,7 @@
 import urllib
 
 from framework.api.Base import BaseResource
+from framework.api.multipart import StreamingBody
 
 BASE_URL = 'assets'
 
@@ -53,7 +54,7 @@ class Revision(BaseResource):
 
     def upload_content(self, iid, asset_id, revision_id, file, content_type):
         request_path = f'{BASE_URL}/{iid}/{asset_id}/r/{revision_id}/content'
-        return self.api.client.put(request_path, data=file, content_type=content_type).response
+        return self.api.client.put(request_path, data=StreamingBody(file), content_type=content_type).response
 
 
 class Patient(BaseResource):
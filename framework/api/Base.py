@@ -3,6 +3,8 @@ from abc import ABC
 
 from hyperclient.client import APIClient
 
+from framework.api.pool import client_pool, freeze
+
 
 class APIException(Exception):
     """ Base exception for all API errors """
@@ -17,7 +19,7 @@ class BaseAPI(ABC):
         self._config = config
         self._creds = creds
         self._auth_client = auth_client
-        self._client = None
+        self._client = None     # pooled client entry, see framework.api.pool
         self.jwt_token = jwt_token
         self.jwt_auth = jwt_auth
         self.current_clinid = creds[0] if creds else None
@@ -26,8 +28,11 @@ class BaseAPI(ABC):
     @property
     def client(self):
         if self._client is None:
-            self._client = self._create_client()
-        return self._client
+            self._client = client_pool.get(key=self._client_key(), create=self._create_client)
+        return self._client.client
+
+    def _client_key(self):
+        return (self.config_section, self._auth_client, self.jwt_token, self.jwt_auth, freeze(self._creds))
 
     def _create_client(self):
         return APIClient(api_name=self.config_section,
@@ -43,8 +48,9 @@ class BaseAPI(ABC):
             setattr(self, resource.name, resource(self))
 
     def change_client(self, creds):
+        """ Switch to pooled client with other credentials, client is created only on first use of creds """
         self._creds = creds
-        self._client = self._create_client()
+        self._client = None
 
     def __getattr__(self, name):
         raise APIException(f'Resource "{name}" is not defined')
@@ -1,7 +1,17 @@
 from framework.api.Base import BaseResource
+from framework.api.multipart import MultipartEncoder
+from framework.generator.helpers import payloads
 import json
 
 
+def payload(file):
+    """
+    :param file: file path or payload from helpers.payloads
+    :return: pooled file content or the payload itself
+    """
+    return payloads.file(file) if isinstance(file, str) else file
+
+
 class Treatment(BaseResource):
     """
     https://alignapi.cs1.aligntech.com/tpdata/v1/docs/api-blueprint.html#treatment-resource
@@ -32,18 +42,19 @@ class TreatmentVariant(BaseResource):
         https://alignapi.cs1.aligntech.com/tpdata/v1/docs/api-blueprint.html#treatment-variant-resource-treatment-variant-put
         :param treatment_id:
         :param treatment_variant_data: json
-        :param adf: file path
-        :param wcc: file path
+        :param adf: file path or payload
+        :param wcc: file path or payload
         :return:
         """
         request_path = f'treatments/{treatment_id}/variants'
-        multiple_files = {
+        body = MultipartEncoder({
             'treatmentVariantData': (None, json.dumps(treatment_variant_data), 'application/json'),
-            'adfFile': ('adf.adf', open(adf, 'rb'), 'application/octet-stream'),
-            'wccFile': ('wcc.wcc', open(wcc, 'rb'), 'application/octet-stream')
-        }
+            'adfFile': ('adf.adf', payload(adf), 'application/octet-stream'),
+            'wccFile': ('wcc.wcc', payload(wcc), 'application/octet-stream')
+        })
         return self.api.client.put(url=request_path,
-                                   files=multiple_files).response
+                                   data=body,
+                                   content_type=body.content_type).response
 
     def get(self, treatment_id, plan_number):
         request_path = f'treatments/{treatment_id}/variants/{plan_number}'
@@ -62,7 +73,7 @@ class TreatmentVariantCheckout(BaseResource):
         :param treatment_id:
         :param plan_number:
         :param checkout_data: json or NOne to create default
-        :param uploaded_file: file path
+        :param uploaded_file: file path or payload
         :return:
         """
         checkout_data = checkout_data if checkout_data else {
@@ -75,11 +86,12 @@ class TreatmentVariantCheckout(BaseResource):
             "upperStages": 1
         }
         request_path = f'treatments/{treatment_id}/variants/{plan_number}/checkout'
-        multiple_files = {
+        body = MultipartEncoder({
             'checkoutData': (None, json.dumps(checkout_data), 'application/json'),
-            'uploadedFile': ('treatment-data.xml', open(uploaded_file, 'rb'), 'application/octet-stream')
-        }
+            'uploadedFile': ('treatment-data.xml', payload(uploaded_file), 'application/octet-stream')
+        })
         return self.api.client.put(url=request_path,
-                                   files=multiple_files).response
+                                   data=body,
+                                   content_type=body.content_type).response
 
 
@@ -0,0 +1,74 @@
+""" Streaming request bodies """
+import os
+import binascii
+
+CHUNK_SIZE = 64 * 1024
+
+
+def as_buffer(data) -> memoryview:
+    """
+    :param data: payload from helpers.payloads, bytes or str
+    :return: view of the data without copying it
+    """
+    if isinstance(data, str):
+        return memoryview(data.encode())
+    return memoryview(data)
+
+
+class StreamingBody(object):
+    """
+    Request body sent in chunks: requests gets Content-Length from __len__ and sends chunks from __iter__,
+    so body is never copied into one buffer. Body can be iterated again if request is repeated
+    """
+    def __init__(self, data, chunk_size: int = CHUNK_SIZE):
+        """
+        :param data: payload, bytes or str
+        :param chunk_size: max bytes in chunk
+        """
+        self.buffer = as_buffer(data)
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return self.buffer.nbytes
+
+    def __iter__(self):
+        return iter_chunks(self.buffer, self.chunk_size)
+
+
+class MultipartEncoder(object):
+    """
+    multipart/form-data body streamed part by part, fields are given as for requests 'files' argument:
+    {name: (filename or None, data, content type)}
+    """
+    def __init__(self, fields: dict, boundary: str = None, chunk_size: int = CHUNK_SIZE):
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode()
+        self.chunk_size = chunk_size
+        self.parts = [(self.part_header(name, filename, content_type), as_buffer(data))
+                      for name, (filename, data, content_type) in fields.items()]
+        self.closing = f'--{self.boundary}--\r\n'.encode()
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def part_header(self, name: str, filename: str, content_type: str) -> bytes:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else '')
+        return (f'--{self.boundary}\r\n'
+                f'Content-Disposition: {disposition}\r\n'
+                f'Content-Type: {content_type}\r\n\r\n').encode()
+
+    def __len__(self):
+        return sum(len(header) + data.nbytes + 2 for header, data in self.parts) + len(self.closing)
+
+    def __iter__(self):
+        for header, data in self.parts:
+            yield header
+            yield from iter_chunks(data, self.chunk_size)
+            yield b'\r\n'
+        yield self.closing
+
+
+def iter_chunks(buffer: memoryview, chunk_size: int):
+    buffer = buffer.cast('B') if buffer.format != 'B' else buffer
+    for offset in range(0, buffer.nbytes, chunk_size):
+        yield buffer[offset:offset + chunk_size]
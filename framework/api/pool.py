@@ -0,0 +1,189 @@
+""" Process-wide pool of API clients """
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import gevent
+from gevent.event import AsyncResult
+from requests import Session
+
+from framework.api.timing import TimingAdapter
+from framework.generator.metrics import registry
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+AUTH_RETRY_SEC = 10     # delay before next background refresh attempt if login failed
+
+
+def freeze(value) -> Hashable:
+    """
+    Function to make hashable key from credentials (dicts, lists, DotDicts)
+    :param value: credentials or any other config value
+    :return: hashable value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class PooledClient(object):
+    """
+    Cache entry: authorized client of one API and credentials. Client is replaced in place
+    by background refresh, so API wrappers keep the entry and always use fresh client
+    """
+    def __init__(self, key: Hashable, create: Callable):
+        self.key = key
+        self.create = create
+        self.client = None
+        self.ready = AsyncResult()      # set when first login is done, waited by concurrent users
+        self.refresher = None
+
+
+class ClientPool(object):
+    """
+    LRU cache of API clients keyed by API and credentials, shared by all locust users of the process.
+    Client creation logs in with the credentials, so the cache is the token cache as well:
+    - single flight: first user of credentials logs in, users coming meanwhile wait for its result
+    - clients are re-created in background before token expiry (token_ttl - refresh_before)
+    - login time and counts go to auth.* generator metrics, not to request stats
+    Sessions of all clients share one HTTP adapter, so keep-alive connections to API hosts are reused
+    instead of new TCP+TLS handshake for every client. The adapter records transport phases of requests
+    (see framework.api.timing)
+    """
+    def __init__(self, max_clients: int = 100, max_hosts: int = 10, max_connections_per_host: int = 100,
+                 token_ttl: int = None, refresh_before: int = 60):
+        """
+        :param max_clients: clients kept in cache, least recently used client is evicted
+        :param max_hosts: hosts to keep connection pools for
+        :param max_connections_per_host: keep-alive connections per host
+        :param token_ttl: auth token lifetime in seconds, None -- no background refresh
+        :param refresh_before: seconds before token expiry to refresh it
+        """
+        self.max_clients = max_clients
+        self.token_ttl = token_ttl
+        self.refresh_before = refresh_before
+        self.clients = OrderedDict()
+        self.unshared_types = set()     # client types without requests session, warned once per type
+        self.connections = (max_hosts, max_connections_per_host)
+        self.adapter = TimingAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host)
+
+    def configure(self, config: dict):
+        """
+        Pool is configured on every launcher init of warm lambda container: adapter is kept if connection
+        limits are the same, otherwise it's replaced in sessions of cached clients and closed
+        :param config: api_pool section of profile config
+        :return:
+        """
+        self.max_clients = config.get('max_clients', self.max_clients)
+        self.token_ttl = config.get('token_ttl', self.token_ttl)
+        self.refresh_before = config.get('refresh_before', self.refresh_before)
+        connections = (config.get('max_hosts', 10), config.get('max_connections_per_host', 100))
+        if connections != self.connections:
+            previous = self.adapter
+            self.connections = connections
+            self.adapter = TimingAdapter(pool_connections=connections[0], pool_maxsize=connections[1])
+            for entry in self.clients.values():
+                if entry.client is not None:
+                    self.share_connections(entry.client)
+            previous.close()
+        logger.info(f'API client pool: {self.max_clients} clients, {config}')
+
+    def get(self, key: Hashable, create: Callable) -> PooledClient:
+        """
+        :param key: API and credentials key
+        :param create: function to create (and log in) client on cache miss
+        :return: cache entry with authorized client
+        """
+        entry = self.clients.get(key)
+        if entry is not None:
+            self.clients.move_to_end(key)
+            registry.increment('api.client_pool.hits')
+            if not entry.ready.ready():
+                registry.increment('auth.single_flight_waits')
+            entry.ready.get()   # raises login exception if login of the other user failed
+            return entry
+        registry.increment('api.client_pool.misses')
+        entry = self.clients[key] = PooledClient(key=key, create=create)
+        self.evict()
+        try:
+            entry.client = self.login(entry)
+        except Exception as e:
+            self.clients.pop(key, None)
+            entry.ready.set_exception(e)
+            raise
+        entry.ready.set(entry.client)
+        self.schedule_refresh(entry)
+        registry.gauge('api.client_pool.size', len(self.clients))
+        return entry
+
+    def login(self, entry: PooledClient):
+        start = time.perf_counter()
+        try:
+            client = entry.create()
+        except Exception:
+            registry.increment('auth.failures')
+            raise
+        login_ms = (time.perf_counter() - start) * 1000
+        registry.increment('auth.logins')
+        registry.increment('auth.login_time_ms', int(login_ms))
+        registry.gauge('auth.last_login_time_ms', login_ms)
+        self.share_connections(client)
+        return client
+
+    def schedule_refresh(self, entry: PooledClient, delay: float = None):
+        if not self.token_ttl:
+            return
+        if delay is None:
+            delay = max(self.token_ttl - self.refresh_before, 1)
+        entry.refresher = gevent.spawn_later(delay, self.refresh, entry)
+
+    def refresh(self, entry: PooledClient):
+        """
+        Greenlet to log in again before token expiry, users keep using old client until new one is ready
+        """
+        if self.clients.get(entry.key) is not entry:
+            return
+        try:
+            entry.client = self.login(entry)
+        except Exception as e:
+            logger.warning(f'Auth token refresh failed: {repr(e)}, retrying in {AUTH_RETRY_SEC}s')
+            self.schedule_refresh(entry, delay=AUTH_RETRY_SEC)
+            return
+        registry.increment('auth.refreshes')
+        self.schedule_refresh(entry)
+
+    def evict(self):
+        while len(self.clients) > self.max_clients:
+            _, entry = self.clients.popitem(last=False)
+            if entry.refresher:
+                entry.refresher.kill(block=False)
+            registry.increment('api.client_pool.evictions')
+
+    def share_connections(self, client):
+        """
+        Method to mount shared adapter into client session, so all clients use one connection pool per host.
+        Evicted clients don't close shared connections. Client without requests session keeps its own
+        connections and requests of such client have no transport phases, it's logged once per client type
+        """
+        session = getattr(client, 'session', None)
+        if isinstance(session, Session):
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+        elif type(client) not in self.unshared_types:
+            self.unshared_types.add(type(client))
+            logger.warning(f'No requests session in {type(client).__name__} client, connections are not shared '
+                           f'and transport phases are not recorded')
+
+    def clear(self):
+        for entry in self.clients.values():
+            if entry.refresher:
+                entry.refresher.kill(block=False)
+        self.clients.clear()
+        self.adapter.close()
+
+
+client_pool = ClientPool()
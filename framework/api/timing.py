@@ -0,0 +1,132 @@
+import time
+from gevent.local import local
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+"""
+Per-phase timings of HTTP requests, phases in ms:
+- connect -- TCP connection setup, only for requests that opened new connection
+- tls -- TLS handshake, only for requests that opened new https connection
+- send -- sending request line, headers and body (upload transfer)
+- wait -- from request sent to response headers received: server think time plus network round trip
+- receive -- reading response body (download transfer)
+Phases are summed up for all HTTP requests made between start_phases and pop_phases in current greenlet
+(LocustAsserter transaction), so redirects and hyperclient link lookups are included
+"""
+
+PHASES = ('connect', 'tls', 'send', 'wait', 'receive')
+
+_phases = local()    # phase timings of the current greenlet transaction
+
+
+def start_phases():
+    """
+    Function to start capturing phases of requests made by current greenlet
+    :return:
+    """
+    _phases.times = dict()
+
+
+def pop_phases() -> dict:
+    """
+    Function to get (and stop capturing) phases captured since start_phases
+    :return: {phase: ms} of phases that happened, empty if nothing was captured
+    """
+    times = getattr(_phases, 'times', None)
+    _phases.times = None
+    return times or {}
+
+
+def add_phase(phase: str, duration_ns: int):
+    """
+    :param phase: phase name
+    :param duration_ns: phase duration from perf_counter_ns
+    :return:
+    """
+    times = getattr(_phases, 'times', None)
+    if times is not None:
+        times[phase] = times.get(phase, 0) + duration_ns / 1e6
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """
+    urllib3 connection which records connect, tls, send and wait phases
+    """
+    tls = False
+    tcp_ns = 0          # duration of last TCP connection setup
+    connecting_ns = 0   # total time spent in connect by the connection
+
+    def _new_conn(self):
+        start = time.perf_counter_ns()
+        conn = super(TimedHTTPConnection, self)._new_conn()
+        self.tcp_ns = time.perf_counter_ns() - start
+        return conn
+
+    def connect(self):
+        self.tcp_ns = 0
+        start = time.perf_counter_ns()
+        try:
+            super(TimedHTTPConnection, self).connect()
+        finally:
+            duration = time.perf_counter_ns() - start
+            self.connecting_ns += duration
+            add_phase('connect', self.tcp_ns)
+            if self.tls:
+                add_phase('tls', duration - self.tcp_ns)
+
+    def _timed_send(self, send, *args, **kwargs):
+        # plain http connection is opened lazily by request, its time is not a part of send phase
+        connecting = self.connecting_ns
+        start = time.perf_counter_ns()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            add_phase('send', time.perf_counter_ns() - start - (self.connecting_ns - connecting))
+
+    def request(self, *args, **kwargs):
+        return self._timed_send(super(TimedHTTPConnection, self).request, *args, **kwargs)
+
+    def request_chunked(self, *args, **kwargs):
+        return self._timed_send(super(TimedHTTPConnection, self).request_chunked, *args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return super(TimedHTTPConnection, self).getresponse(*args, **kwargs)
+        finally:
+            add_phase('wait', time.perf_counter_ns() - start)
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    """
+    urllib3 https connection, connect phase is split into TCP connect and TLS handshake
+    """
+    tls = True
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """
+    requests adapter with timed connection pools, records phases of requests into current transaction
+    (see LocustAsserter). Response body is read by adapter to time receive phase
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+    def send(self, request, stream=False, **kwargs):
+        response = super(TimingAdapter, self).send(request, stream=stream, **kwargs)
+        if not stream:
+            start = time.perf_counter_ns()
+            response.content
+            add_phase('receive', time.perf_counter_ns() - start)
+        return response
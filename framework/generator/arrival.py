@@ -0,0 +1,189 @@
+import sys
+import time
+import random
+import logging
+from typing import List, Dict
+import gevent
+from gevent import GreenletExit
+from locust import events, TaskSet
+from locust.exception import InterruptTaskSet, RescheduleTask, RescheduleTaskImmediately, StopLocust
+from locust.runners import LocalLocustRunner, STATE_RUNNING, STATE_STOPPED
+from framework.generator.governor import governor, IDLE_CHECK_SEC
+from framework.generator.metrics import registry
+from framework.generator.rps import TaskSetRPS, set_intended_start
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DISTRIBUTIONS = ('poisson', 'constant')
+
+
+class ArrivalWorker(object):
+    """
+    Locust user with its task set instances, reused by iterations.
+    Task sets are created (and their on_start is run) once per worker, so state like auth or
+    created resources survives between iterations as in closed model
+    """
+    def __init__(self, locust_class):
+        self.locust = locust_class()
+        self.task_sets: Dict[type, TaskSet] = dict()     # {task set class: instance}
+        self.root = self.task_set(self.locust.task_set, parent=self.locust)
+
+    def task_set(self, task_set_class, parent) -> TaskSet:
+        instance = self.task_sets.get(task_set_class)
+        if instance is None:
+            instance = self.task_sets[task_set_class] = task_set_class(parent)
+            if hasattr(instance, 'on_start'):
+                instance.on_start()
+        return instance
+
+    def iterate(self, task_set: TaskSet = None):
+        """
+        Function to run single iteration: next task is picked at every level of nested task sets
+        (by weight for TaskSet, in order for TaskSequence) until leaf task is found and executed.
+        There are no waits between iterations, arrival schedule replaces think time
+        :param task_set: task set to pick task from, root task set by default
+        :return:
+        """
+        task_set = task_set or self.root
+        task = task_set.get_next_task()
+        if hasattr(task, 'tasks') and issubclass(task, TaskSet):
+            self.iterate(self.task_set(task, parent=task_set))
+        else:
+            task_set.execute_task(task)
+
+
+class ArrivalRateRunner(LocalLocustRunner):
+    """
+    Open model runner: task iterations are started on poisson or constant schedule regardless of
+    how long previous iterations take, so slow server gets more concurrent iterations instead of fewer requests.
+    Iterations run on workers from a pool which grows when there's no idle worker, up to max_pool_size.
+    Arrivals that find the pool exhausted are dropped and counted in arrival.dropped_iterations metric.
+    If rate governor is on, rate is cluster-wide and generator runs its share of it.
+    user_count of the runner is the amount of iterations in progress
+    """
+    def __init__(self, locust_classes, options, arrival):
+        """
+        :param arrival: arrival section of profile config (see settings.ArrivalConfig)
+        """
+        super(ArrivalRateRunner, self).__init__(locust_classes=locust_classes, options=options)
+        if arrival.distribution not in DISTRIBUTIONS:
+            raise ValueError(f'Unknown arrival distribution {arrival.distribution}, use one of: {DISTRIBUTIONS}')
+        self.arrival = arrival
+        self.locust_classes = [c for c in locust_classes if c.task_set]
+        self.workers = 0
+        self.idle: List[ArrivalWorker] = list()
+        self.dropped = 0
+        self.arrival_greenlet = None
+
+    def new_worker(self) -> ArrivalWorker:
+        locust_class = random.choices(self.locust_classes, weights=[c.weight for c in self.locust_classes])[0]
+        return ArrivalWorker(locust_class)
+
+    def run_iteration(self, worker: ArrivalWorker, intended_start: float):
+        """
+        Greenlet to run iteration on pooled worker, worker is returned to the pool after iteration
+        unless it raised StopLocust
+        :param worker: idle worker or None to create new one
+        :param intended_start: scheduled arrival time, first LocustAsserter measures corrected time from it
+        :return:
+        """
+        try:
+            if worker is None:
+                # worker is created in iteration greenlet, so slow on_start doesn't delay the schedule
+                worker = self.new_worker()
+            set_intended_start(intended_start)
+            worker.iterate()
+        except (InterruptTaskSet, RescheduleTask, RescheduleTaskImmediately):
+            pass
+        except StopLocust:
+            self.retire()
+            return
+        except GreenletExit:
+            raise
+        except Exception as e:
+            events.locust_error.fire(locust_instance=worker.locust if worker else None,
+                                     exception=e, tb=sys.exc_info()[2])
+            if worker is None:
+                self.retire()
+                return
+        self.idle.append(worker)
+
+    def retire(self):
+        self.workers -= 1
+        registry.gauge('arrival.pool_size', self.workers)
+
+    def interval(self, rate: float) -> float:
+        if self.arrival.distribution == 'poisson':
+            return random.expovariate(rate)
+        return 1 / rate
+
+    def arrival_worker(self):
+        """
+        Greenlet to start iterations at arrival times. Schedule is kept in absolute time,
+        so late wake-ups of the loop are caught up instead of lowering the rate
+        """
+        next_arrival = time.time()
+        try:
+            while True:
+                rate = self.arrival.rate * (governor.share(next_arrival) if governor.enabled else 1.0)
+                if rate <= 0:
+                    gevent.sleep(IDLE_CHECK_SEC)
+                    next_arrival = time.time()
+                    continue
+                next_arrival += self.interval(rate)
+                delay = next_arrival - time.time()
+                if delay > 0:
+                    gevent.sleep(delay)
+                if self.idle:
+                    worker = self.idle.pop()
+                elif self.workers < self.arrival.max_pool_size:
+                    worker = None
+                    self.workers += 1
+                    registry.gauge('arrival.pool_size', self.workers)
+                else:
+                    self.drop()
+                    continue
+                self.locusts.spawn(self.run_iteration, worker, next_arrival)
+        finally:
+            self.log_dropped()
+
+    def drop(self):
+        if not self.dropped:
+            logger.warning(f'Arrival pool exhausted: all {self.arrival.max_pool_size} workers are busy, '
+                           f'iterations are dropped')
+        self.dropped += 1
+        registry.increment('arrival.dropped_iterations')
+
+    def log_dropped(self):
+        if self.dropped:
+            logger.warning(f'{self.dropped} iterations dropped, increase max_pool_size '
+                           f'or check generator health')
+
+    def start_arrivals(self):
+        """
+        Method to create initial pool of workers and start arrival schedule
+        :return:
+        """
+        logger.info(f'Starting {self.arrival.distribution} arrivals at {self.arrival.rate}/s '
+                    f'with pool of {self.arrival.pool_size}-{self.arrival.max_pool_size} workers')
+        # iterations are paced by arrival schedule, keep_rps_at would make a closed model again
+        TaskSetRPS.paced = False
+        self.stats.clear_all()
+        self.exceptions = {}
+        events.locust_start_hatching.fire()
+        for _ in range(min(self.arrival.pool_size, self.arrival.max_pool_size)):
+            self.idle.append(self.new_worker())
+        self.workers = len(self.idle)
+        registry.gauge('arrival.pool_size', self.workers)
+        events.hatch_complete.fire(user_count=self.workers)
+        self.state = STATE_RUNNING
+        self.arrival_greenlet = gevent.spawn(self.arrival_worker)
+        self.greenlet = self.arrival_greenlet
+
+    def stop(self):
+        if self.arrival_greenlet:
+            self.arrival_greenlet.kill(block=True)
+        self.locusts.kill(block=True)
+        self.state = STATE_STOPPED
+        events.locust_stop_hatching.fire()
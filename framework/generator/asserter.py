@@ -1,8 +1,11 @@
 import time
 import sys
+from collections import defaultdict
 from locust import events
 from framework.generator.exceptions import FlowException
 from framework.generator.expected import ExpectedResponse
+from framework.generator.rps import pop_intended_start
+from framework.api.timing import start_phases, pop_phases
 from requests import Response
 import logging
 
@@ -10,60 +13,73 @@ logging.basicConfig()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-
-def current_millis():
-    return int(round(time.time() * 1000))
+REQUEST_TYPE = 'https'
 
 
 class LocustAsserter(object):
     """
     Class to implement context locust response time measuring,
     response assertion and events logging
-    Note 'name' parameter -- by default it uses name of the task function
+    Note 'name' parameter -- by default it uses name of the calling task function
+    Response time is measured with monotonic perf_counter_ns. Locust gets it in whole ms (it keeps response times
+    under 100 ms unrounded as keys of its stats dict), histogram stats get sub-millisecond precise_response_time.
+    With success_sampling = N only every N-th success of a request name is fired with sample_weight=N,
+    histogram stats and Locust stats count it N times (see HistogramRecorder), failures are always fired
+    Transport phases of requests made in the transaction (connect, tls, send, wait, receive) are passed
+    in phase_times and recorded as 'phase.<phase>' series of the request name
     IMPORTANT: to make it work you should return response to LocustAsserter.response property
     """
+    __slots__ = ('__name', '__expected', '__interrupt_flow', '__skip_transaction', '__start', '__lag', 'response')
+
+    success_sampling = 1
+    _successes = defaultdict(int)     # {name: successes}, process-wide counters for sampling
+
     def __init__(self,
-                 name: str = sys._getframe(1).f_code.co_name,
+                 name: str = None,
                  expected: ExpectedResponse = None,
                  interrupt_flow: bool = False,
                  skip_transaction: bool = False):
-        self.__name = name
-        self.__transaction = {'request_type': 'https',
-                              'name': name,
-                              'response_length': 0}
+        self.__name = name or sys._getframe(1).f_code.co_name
         self.__expected = expected
         self.__interrupt_flow = interrupt_flow
         self.__skip_transaction = skip_transaction
 
     def __enter__(self):
-        self.__start = current_millis()
+        intended_start = pop_intended_start()
+        # lag of actual send from intended send time, added to response time for corrected series
+        self.__lag = max(time.time() - intended_start, 0) * 1000 if intended_start else None
         self.response: Response = None
+        start_phases()
+        self.__start = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = int(current_millis() - self.__start)
-        self.__transaction.update({'response_time': duration})
+        duration = (time.perf_counter_ns() - self.__start) / 1e6
+        phases = pop_phases()
         exception = None
         # estimating response
         if self.response:
             success, msg = self.is_response_succeeded()
         else:
             success, msg = False, 'Got no response'
-        logger.debug(f'Result: {success}, {msg}')
+        logger.debug('Result: %s, %s', success, msg)
 
         # defining exception reason
         if not success:
             exception = exc_val if exc_val else FlowException(msg)
-            self.__transaction.update({'exception': exception})
-            logger.error(f'{self.__name} Asserter: Got exception {exception}')
+            logger.error('%s Asserter: Got exception %s', self.__name, exception)
 
-        # posting __transaction results
+        # posting transaction results
         if not self.__skip_transaction:
+            series = {} if self.__lag is None else {'corrected_response_time': duration + self.__lag}
+            if phases:
+                series['phase_times'] = phases
             if success:
-                self.__transaction['response_length'] = len(self.response.content)
-                events.request_success.fire(**self.__transaction)
+                self.fire_success(duration, series)
             else:
-                events.request_failure.fire(**self.__transaction)
+                events.request_failure.fire(request_type=REQUEST_TYPE, name=self.__name,
+                                            response_time=int(round(duration)), precise_response_time=duration,
+                                            response_length=0, exception=exception, **series)
 
         # interrupting flow if required
         if self.__interrupt_flow and exception:
@@ -74,6 +90,18 @@ class LocustAsserter(object):
         else:
             return True
 
+    def fire_success(self, duration: float, series: dict):
+        sampling = LocustAsserter.success_sampling
+        if sampling > 1:
+            successes = LocustAsserter._successes
+            successes[self.__name] += 1
+            if successes[self.__name] % sampling:
+                return
+            series['sample_weight'] = sampling
+        events.request_success.fire(request_type=REQUEST_TYPE, name=self.__name,
+                                    response_time=int(round(duration)), precise_response_time=duration,
+                                    response_length=len(self.response.content), **series)
+
     def is_response_succeeded(self) -> tuple:
         if self.__expected:
             if self.__expected == self.response:
@@ -83,3 +111,13 @@ class LocustAsserter(object):
         else:
             return True, 'Nothing was expected'
 
+    @classmethod
+    def configure(cls, success_sampling: int = 1):
+        """
+        :param success_sampling: fire every N-th success event of request name, 1 -- fire all
+        :return:
+        """
+        if success_sampling < 1:
+            raise ValueError(f'Success sampling should be 1 or more, got {success_sampling}')
+        cls.success_sampling = int(success_sampling)
+        cls._successes.clear()
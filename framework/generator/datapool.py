@@ -0,0 +1,161 @@
+import os
+import csv
+import random
+import logging
+from array import array
+from typing import List, Dict
+from config import FRAMEWORK_ROOT
+from config.test_config_reader import datapool as datapool_config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MODES = ('sequential', 'random', 'unique_per_user', 'unique_across_generators')
+
+
+class ColumnStore(object):
+    """
+    Class to keep csv rows in columns: every column is one bytes buffer of utf-8 values and array of offsets,
+    so million rows take size of data plus 8 bytes per value instead of dict and str objects per row
+    """
+    def __init__(self, fieldnames: List[str]):
+        self.fieldnames = fieldnames
+        self.values = [bytearray() for _ in fieldnames]
+        self.offsets = [array('Q', [0]) for _ in fieldnames]
+
+    def __len__(self):
+        return len(self.offsets[0]) - 1
+
+    def append(self, row: List[str]):
+        for column, (values, offsets) in enumerate(zip(self.values, self.offsets)):
+            values.extend((row[column] if column < len(row) else '').encode())
+            offsets.append(len(values))
+
+    def row(self, index: int) -> Dict[str, str]:
+        return {name: values[offsets[index]:offsets[index + 1]].decode()
+                for name, values, offsets in zip(self.fieldnames, self.values, self.offsets)}
+
+    @classmethod
+    def from_csv(cls, path: str, fieldnames: List[str], byte_range: List[int] = None):
+        """
+        :param path: csv file path
+        :param fieldnames: column names
+        :param byte_range: [start, end] offsets of generator shard (see framework.test.shards), None -- whole file
+        :return: store with rows of the file or its shard
+        """
+        store = cls(fieldnames)
+        start, end = byte_range or (0, os.path.getsize(path))
+        with open(path, 'rb') as file:
+            file.seek(start)
+            lines = iter(lambda: file.readline() if file.tell() < end else b'', b'')
+            for row in csv.reader(line.decode() for line in lines):
+                store.append(row)
+        return store
+
+
+def is_sharded(mode: str, shard: bool = None) -> bool:
+    """
+    :param mode: datapool access mode
+    :param shard: shard setting of datapool file, None -- sharded in unique_across_generators mode only
+    :return: True if generators get disjoint parts of the file
+    """
+    return mode == 'unique_across_generators' if shard is None else shard
+
+
+class DataPool(object):
+    """
+    Csv test data shared by all users of generator process. Access modes:
+    - sequential -- rows in file order, shared by users, starts over at the end
+    - random -- random row
+    - unique_per_user -- every user walks all rows from its random start, row repeats for user only after all rows
+    - unique_across_generators -- every row is given out once, starts over with a warning at the end;
+      file is sharded
+    Sharded files (shard: true or unique_across_generators mode) are split by test controller into byte ranges,
+    generators running at the same time get disjoint ranges and read only their own range
+    """
+    shard = None    # generator shard from test controller: {'index', 'count', 'ranges': {name: [start, end]}}
+
+    def __init__(self, name: str, path: str, fieldnames: List[str], mode: str = 'random', shard: bool = None):
+        if mode not in MODES:
+            raise ValueError(f'Unknown datapool mode {mode}, use one of: {MODES}')
+        self.name = name
+        self.mode = mode
+        byte_range = None
+        if self.shard and is_sharded(mode=mode, shard=shard):
+            byte_range = self.shard['ranges'].get(name)
+        self.store = ColumnStore.from_csv(path=os.path.join(FRAMEWORK_ROOT, path),
+                                          fieldnames=fieldnames,
+                                          byte_range=byte_range)
+        if not len(self.store):
+            raise ValueError(f'No data in datapool {name} ({path}, bytes {byte_range})')
+        self.cursor = 0
+        logger.info(f'Datapool {name} loaded: {len(self.store)} rows, {mode} mode' +
+                    (f', shard {self.shard["index"]} of {self.shard["count"]}' if byte_range else ''))
+
+    def __len__(self):
+        return len(self.store)
+
+    def next_index(self) -> int:
+        if self.mode == 'random':
+            return random.randrange(len(self.store))
+        index = self.cursor
+        self.cursor += 1
+        if self.cursor == len(self.store):
+            self.cursor = 0
+            if self.mode == 'unique_across_generators':
+                logger.warning(f'All rows of datapool {self.name} are used, starting over')
+        return index
+
+    def reader(self) -> 'DataReader':
+        """
+        :return: reader for single user
+        """
+        return DataReader(self)
+
+    @classmethod
+    def configure(cls, shard: dict):
+        """
+        Warm lambda container is reused by next generators of the lane and by relaunches with other shard,
+        so pools loaded for previous shard are dropped
+        :param shard: generator shard from test controller or None to use whole files
+        :return:
+        """
+        if shard != cls.shard:
+            _pools.clear()
+        cls.shard = shard
+
+
+class DataReader(object):
+    """
+    User access to datapool, keeps only user cursor
+    """
+    __slots__ = ('pool', 'cursor')
+
+    def __init__(self, pool: DataPool):
+        self.pool = pool
+        self.cursor = random.randrange(len(pool)) if pool.mode == 'unique_per_user' else None
+
+    def next(self) -> Dict[str, str]:
+        """
+        :return: next row as {field name: value}
+        """
+        if self.cursor is None:
+            return self.pool.store.row(self.pool.next_index())
+        index = self.cursor
+        self.cursor = (self.cursor + 1) % len(self.pool)
+        return self.pool.store.row(index)
+
+
+_pools: Dict[str, DataPool] = dict()
+
+
+def get_datapool(name: str) -> DataPool:
+    """
+    Function to get datapool from datapool -> files section of profile, file is loaded once per process
+    :param name: datapool name
+    :return: datapool
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        pool = _pools[name] = DataPool(name=name, **datapool_config['files'][name])
+    return pool
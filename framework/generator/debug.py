@@ -1,5 +1,6 @@
 import time
 from framework.generator.listener import Listener
+from framework.generator.metrics import registry
 from typing import List
 from locust import Locust, TaskSet
 from requests import Response
@@ -67,6 +68,8 @@ class DebugListener(Listener):
                 request_name, request_timestamp, stats_values = request
                 for name, value in stats_values.items():
                     logger.info(f'DEB: {request_timestamp}: {request_name}, metric: {name} - {value}')
+        if registry.has_metrics():
+            logger.info(f'DEB generator metrics {registry.dimensions}: {registry.snapshot()}')
 
 
 def get_healthcheck_info(locust_classes: List[Locust]) -> dict:
@@ -4,3 +4,9 @@ class FlowException(Exception):
     """
     pass
 
+
+class PollTimeout(Exception):
+    """
+    class to generate poller deadline exceeded exceptions
+    """
+    pass
@@ -1,12 +1,16 @@
-import re
-import json
+from collections import Counter
+from collections.abc import Mapping
+from functools import lru_cache
 from requests import Response
 import logging
+from framework.generator.extract import parsed, response_json, extractor
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+MAX_LOGGED_BODY = 500   # chars of response body in mismatch log messages
+
 """
 Class to handle Expected response parameter and compare with actual
 """
@@ -18,6 +22,7 @@ class ExpectedResponse(object):
         self._text = text
         self._headers = headers
         self._json = json
+        self._matcher = None
         if headers and not (isinstance(headers, str) or isinstance(headers, dict)):
             raise TypeError('Headers are expected to be string (keys lookup) or dictionary (key=value lookup)')
 
@@ -37,42 +42,162 @@ class ExpectedResponse(object):
     def json(self):
         return self._json
 
+    @property
+    def matcher(self) -> 'ResponseMatcher':
+        """
+        :return: matcher compiled once per expected response, keep ExpectedResponse objects
+        out of tasks (e.g. in module or task set __init__) to reuse it
+        """
+        if self._matcher is None:
+            self._matcher = ResponseMatcher(self)
+        return self._matcher
+
     def __eq__(self, other):
         if issubclass(type(other), Response):
-            if self.code:
-                code = getattr(other, 'status_code', None)
-                if self.code != code:
-                    logger.info(f'Expected response code {self.code}, but got {code}')
-                    return False
-            if self.text:
-                text = getattr(other, 'text', None)
-                if self.text not in text:
-                    logger.info(f'Expected response text to contain {self.text}, but got {text}')
+            return self.matcher.match(other)
+        logger.error(f'{other} is not a Response subclass.')
+        return False
+
+    def __repr__(self):
+        return str({'code': self._code, 'text': self._text, 'headers': self._headers, 'json': self._json})
+
+
+class ResponseMatcher(object):
+    """
+    Compiled ExpectedResponse: json and headers lookups are turned into key paths (with camelCase keys)
+    and expected lists into multisets once, response body is decoded once per response (see extract.parsed)
+    """
+    __slots__ = ('code', 'text', 'header_key', 'headers', 'json')
+
+    def __init__(self, expected: ExpectedResponse):
+        self.code = expected.code
+        self.text = expected.text
+        self.header_key = expected.headers if isinstance(expected.headers, str) else None
+        self.headers = JsonMatcher(expected.headers) if isinstance(expected.headers, dict) else None
+        self.json = JsonMatcher(expected.json) if expected.json else None
+
+    def match(self, response: Response) -> bool:
+        if self.code:
+            code = getattr(response, 'status_code', None)
+            if self.code != code:
+                logger.info('Expected response code %s, but got %s', self.code, code)
+                return False
+        if self.text:
+            text = parsed(response).text
+            if self.text not in text:
+                logger.info('Expected response text to contain %s, but got %s', self.text, Shortened(text))
+                return False
+        if self.header_key or self.headers:
+            headers = getattr(response, 'headers', None)
+            if self.header_key and self.header_key not in headers.keys() \
+                    or self.headers and not self.headers.match(headers):
+                logger.info('Expected response headers to contain %s, but got %s',
+                            self.header_key or self.headers, headers)
+                return False
+        if self.json:
+            document = response_json(response)
+            if not self.json.match(document):
+                logger.info('Expected response json to contain %s, but got %s', self.json, Shortened(document))
+                return False
+        return True
+
+
+class JsonMatcher(object):
+    """
+    Compiled 'contains' check of json or headers: list of (key path, expected type, expected value) checks.
+    Dicts are checked by their keys, lists are compared as multisets regardless of order
+    """
+    __slots__ = ('expected', 'checks')
+
+    def __init__(self, expected: dict):
+        self.expected = expected
+        self.checks = list(self.compile(expected, ()))
+
+    @classmethod
+    def compile(cls, expected: dict, path: tuple):
+        for key, value in expected.items():
+            key_path = path + (snake_to_camel(key),)
+            if isinstance(value, dict):
+                yield key_path, dict, None
+                yield from cls.compile(value, key_path)
+            elif isinstance(value, list):
+                yield key_path, list, (len(value), multiset(value))
+            else:
+                yield key_path, type(value), value
+
+    def match(self, document) -> bool:
+        for path, kind, value in self.checks:
+            node = document
+            for key in path:
+                if not isinstance(node, Mapping) or key not in node:
                     return False
-            if self.headers:
-                headers = getattr(other, 'headers', None)
-                contains_headers = (isinstance(self.headers, str) and self.headers in headers.keys()) \
-                    or (isinstance(self.headers, dict) and contains(headers, self.headers))
-                if not contains_headers:
-                    logger.info(f'Expected response headers to contain {self.headers}, but got {headers}')
+                node = node[key]
+            if kind is dict:
+                if not isinstance(node, Mapping):
                     return False
-            if self.json:
-                json = other.json()
-                if not contains(json, self.json):
-                    logger.info(f'Expected response json to contain {self.json}, but got {json}')
+            elif type(node) != kind:
+                return False
+            elif kind is list:
+                size, counts = value
+                # plain dict comparison, Counter.__eq__ is slow python loop
+                if len(node) != size or not dict.__eq__(multiset(node), counts):
                     return False
-        else:
-            logger.error(f'{other} is not a Response subclass.')
-            return False
+            elif node != value:
+                return False
         return True
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self.expected)
+
+
+class Shortened(object):
+    """
+    Lazy log argument: value is formatted and cut only if message is logged
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        text = str(self.value)
+        return text if len(text) <= MAX_LOGGED_BODY else f'{text[:MAX_LOGGED_BODY]}... ({len(text)} chars)'
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def multiset(values: list) -> Counter:
+    """
+    :param values: json list
+    :return: list items with their counts, dicts and lists are frozen to be hashable
+    """
+    try:
+        return Counter(values)
+    except TypeError:
+        return Counter(freeze(value) for value in values)
+
+
+@lru_cache(maxsize=None)
+def snake_to_camel(name: str) -> str:
+    words = name.split('_')
+    if len(words) == 1:
+        return name
+    first_word = words.pop(0)
+    words = [word.capitalize() for word in words]
+    words.insert(0, first_word)
+    return "".join(words)
 
 
 def rextract_data(resp: Response, reg_exp: str = None, json_item: str = None, headers_key: str = None) -> str:
     """
-    function to extract data by regexp
+    function to extract data by regexp, extractor for the arguments is compiled once.
+    Use precompiled extractors from framework.generator.extract in flows
     :param resp: response object
     :param reg_exp: regexp pattern to search
     :param json_item: dot-separated string to drill into json dict, like 'properties.id'
@@ -80,16 +205,7 @@ def rextract_data(resp: Response, reg_exp: str = None, json_item: str = None, he
     :return:
     """
     if resp:
-        text = resp.headers.get(headers_key, None) if headers_key else resp.text
-        if json_item and not headers_key:
-            text = json.loads(text)
-            for k in json_item.split('.'):
-                text = text[k]
-        if text and reg_exp:
-            pattern = re.compile(reg_exp)
-            return pattern.search(text).group(0)
-        elif text:
-            return text
+        return extractor(reg_exp=reg_exp, json_item=json_item, headers_key=headers_key)(resp)
     return ''
 
 
@@ -98,25 +214,9 @@ def contains(super_dict: dict, sub_dict:dict) -> bool:
     function checks if sub_dict is contained in super_dict.
     Used for json 'contains' checks
     Snake_case from sub_dict is transmitted to camelCase (of json) from super_dict
+    To check many documents compile JsonMatcher once instead
     :param super_dict:
     :param sub_dict:
     :return:
     """
-    def snake_to_camel(name: str) -> str:
-        words = name.split('_')
-        if len(words) == 1:
-            return name
-        first_word = words.pop(0)
-        words = [word.capitalize() for word in words]
-        words.insert(0, first_word)
-        return "".join(words)
-
-    for k, v in sub_dict.items():
-        super_node = super_dict.get(snake_to_camel(k))
-        if not super_node \
-                or type(super_node) != type(v) \
-                or isinstance(super_node, dict) and not contains(super_node, v) \
-                or isinstance(super_node, list) and sorted(super_node) != sorted(v) \
-                or not isinstance(super_node, (list, dict)) and super_node != v:
-            return False
-    return True
\ No newline at end of file
+    return JsonMatcher(sub_dict).match(super_dict)
\ No newline at end of file
@@ -0,0 +1,126 @@
+""" Extraction of values from responses """
+import re
+import json
+from functools import lru_cache
+from typing import Tuple
+from requests import Response
+
+_NOT_PARSED = object()
+
+
+class ParsedResponse(object):
+    """
+    Response wrapper to decode body once: text and json are kept after first use,
+    so every check and extraction of the response works with the same decoded body.
+    Get it with parsed(response), not by constructor, to share it between expected response and extractors
+    """
+    __slots__ = ('response', '_text', '_json')
+
+    def __init__(self, response: Response):
+        self.response = response
+        self._text = None
+        self._json = _NOT_PARSED
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.response.text
+        return self._text
+
+    @property
+    def json(self):
+        if self._json is _NOT_PARSED:
+            self._json = json.loads(self.text)
+        return self._json
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    def extract(self, *extractors: 'Extractor') -> tuple:
+        """
+        :param extractors: precompiled extractors
+        :return: extracted values in order of extractors
+        """
+        return tuple(extractor.extract(self) for extractor in extractors)
+
+
+def parsed(response) -> ParsedResponse:
+    """
+    Function to get memoized wrapper of response, wrapper is kept in response object
+    :param response: response object or its wrapper
+    :return: wrapper
+    """
+    if isinstance(response, ParsedResponse):
+        return response
+    wrapper = getattr(response, '_parsed', None)
+    if wrapper is None:
+        wrapper = response._parsed = ParsedResponse(response)
+    return wrapper
+
+
+def response_json(response):
+    """
+    :param response: response object
+    :return: json of response, parsed once per response
+    """
+    return parsed(response).json
+
+
+class Extractor(object):
+    """
+    Precompiled extraction: value is taken from header, json path or text and then searched by regexp.
+    Create extractors once at module import, like:
+        PROPERTIES_ID = Extractor(json_item='properties.id')
+    and use them for any response:
+        asset_id = PROPERTIES_ID(transaction.response)
+        asset_id, status = extract(transaction.response, PROPERTIES_ID, PROPERTIES_STATUS)
+    """
+    __slots__ = ('header', 'path', 'pattern', 'default')
+
+    def __init__(self, json_item: str = None, headers_key: str = None, reg_exp: str = None, default=''):
+        """
+        :param json_item: dot-separated string to drill into json dict, like 'properties.id'
+        :param headers_key: header key to look in, json_item is ignored then
+        :param reg_exp: regexp pattern to search in the value
+        :param default: value if nothing is found
+        """
+        self.header = headers_key
+        self.path = tuple(json_item.split('.')) if json_item and not headers_key else ()
+        self.pattern = re.compile(reg_exp) if reg_exp else None
+        self.default = default
+
+    def extract(self, response: ParsedResponse):
+        if self.header:
+            value = response.headers.get(self.header, None)
+        elif self.path:
+            value = response.json
+            for key in self.path:
+                value = value[key]
+        else:
+            value = response.text
+        if value and self.pattern:
+            match = self.pattern.search(value)
+            return match.group(0) if match else self.default
+        return value if value else self.default
+
+    def __call__(self, response):
+        return self.extract(parsed(response))
+
+
+def extract(response, *extractors: Extractor) -> Tuple:
+    """
+    Function to extract several values from response, body is decoded once for all of them
+    :param response: response object
+    :param extractors: precompiled extractors
+    :return: extracted values in order of extractors
+    """
+    return parsed(response).extract(*extractors)
+
+
+@lru_cache(maxsize=256)
+def extractor(reg_exp: str = None, json_item: str = None, headers_key: str = None) -> Extractor:
+    """
+    :return: extractor compiled once for the arguments, for ad hoc extraction (see rextract_data)
+    """
+    return Extractor(json_item=json_item, headers_key=headers_key, reg_exp=reg_exp)
@@ -0,0 +1,72 @@
+import time
+import logging
+from bisect import bisect_right
+from typing import List, Dict
+import gevent
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+IDLE_CHECK_SEC = 1.0    # how often to check the share when generator has no share of the load
+
+
+class RateGovernor(object):
+    """
+    Class to keep cluster-wide target rps: every generator gets its share of the load from test controller
+    (planned clients of the generator / planned clients of all generators, changing in time),
+    and runs token bucket per target with rate = target rps * current share.
+    Requests are released at bucket rate regardless of amount of clients (open model),
+    clients wait for their token.
+    """
+    def __init__(self, burst_sec: float = 1.0):
+        """
+        :param burst_sec: seconds of unused rate that can be spent at once
+        """
+        self.burst_sec = burst_sec
+        self.offsets: List[float] = list()
+        self.shares: List[float] = list()
+        self.start_time = None
+        self.next_slots: Dict[str, float] = dict()    # {bucket key: timestamp of the next token}
+
+    @property
+    def enabled(self) -> bool:
+        return self.start_time is not None
+
+    def configure(self, load_share: list, start_time: float = None):
+        """
+        :param load_share: [[seconds from generator start, share of cluster load], ...]
+        :param start_time: generator start timestamp
+        :return:
+        """
+        self.offsets = [offset for offset, _ in load_share]
+        self.shares = [share for _, share in load_share]
+        self.start_time = start_time or time.time()
+        self.next_slots.clear()
+        logger.info(f'Rate governor started with load share {load_share}')
+
+    def share(self, now: float) -> float:
+        i = bisect_right(self.offsets, now - self.start_time) - 1
+        return self.shares[i] if i >= 0 else 0.0
+
+    def acquire(self, key: str, target_rps: float) -> float:
+        """
+        Function to wait for the token of the bucket
+        :param key: bucket key, e.g. task set name
+        :param target_rps: cluster-wide target rps of the bucket
+        :return: intended send time -- time the token was issued at
+        """
+        while True:
+            now = time.time()
+            rate = target_rps * self.share(now)
+            if rate > 0:
+                break
+            gevent.sleep(IDLE_CHECK_SEC)
+        # next_slot is the time next token is available, it can't lag behind more than burst
+        slot = max(self.next_slots.get(key, now), now - self.burst_sec)
+        self.next_slots[key] = slot + 1 / rate
+        if slot > now:
+            gevent.sleep(slot - now)
+        return slot
+
+
+governor = RateGovernor()
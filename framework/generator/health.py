@@ -0,0 +1,115 @@
+import os
+import time
+import logging
+import gevent
+from framework.generator.listener import Listener
+from framework.generator.metrics import registry
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+LAG_PROBE_SEC = 0.01     # timer set to measure loop lag
+
+
+class GeneratorHealthSampler(Listener):
+    """
+    Class to sample load generator health: gevent loop lag, process CPU %, RSS, open sockets and locust users.
+    Overloaded generator inflates response times, so generator is marked as untrusted when
+    loop lag or CPU exceed thresholds for several consecutive samples
+    """
+    def __init__(self, config: dict):
+        """
+        :param config: health section of logging config with sampling interval and thresholds
+        """
+        super(GeneratorHealthSampler, self).__init__(config=config)
+        self.max_loop_lag = config.get('max_loop_lag', 100)         # ms
+        self.max_cpu = config.get('max_cpu', 90)                     # % of single core
+        self.max_consecutive = config.get('max_consecutive', 3)     # samples over threshold to mark untrusted
+        self.over_threshold = {'loop_lag': 0, 'cpu': 0}
+        self.untrusted_reasons = dict()     # {metric: reason}
+        self._last_wall, self._last_cpu = None, None
+
+    @property
+    def untrusted(self) -> bool:
+        return bool(self.untrusted_reasons)
+
+    def on_start(self):
+        self.final_stats = False    # health is sampled every interval regardless of logging settings
+        self._last_wall, self._last_cpu = time.time(), self.cpu_time()
+        logger.info(f'Generator health sampler started')
+
+    def on_stop(self):
+        if self.untrusted:
+            logger.warning(f'Generator was overloaded, its stats are untrusted: {self.untrusted_reasons}')
+        logger.info(f'Generator health sampler stopped')
+
+    def emit(self):
+        sample = {'loop_lag': self.loop_lag(),
+                  'cpu': self.cpu_percent(),
+                  'rss_mb': self.rss() / 2 ** 20,
+                  'sockets': self.open_sockets(),
+                  'users': len(self.runner.locusts)}
+        for name, value in sample.items():
+            registry.gauge(f'generator.{name}', value)
+        self.check_threshold('loop_lag', sample['loop_lag'], self.max_loop_lag, 'ms')
+        self.check_threshold('cpu', sample['cpu'], self.max_cpu, '%')
+        registry.gauge('generator.untrusted', int(self.untrusted))
+        logger.debug(f'Generator health: {sample}')
+
+    def check_threshold(self, name: str, value: float, threshold: float, unit: str):
+        if value > threshold:
+            self.over_threshold[name] += 1
+            if self.over_threshold[name] >= self.max_consecutive and name not in self.untrusted_reasons:
+                self.untrusted_reasons[name] = (f'{name} {value:.0f}{unit} > {threshold}{unit} '
+                                                f'for {self.over_threshold[name] * self.interval}s')
+                logger.warning(f'Generator is overloaded: {self.untrusted_reasons[name]}')
+        else:
+            self.over_threshold[name] = 0
+
+    @staticmethod
+    def loop_lag(probe: float = LAG_PROBE_SEC) -> float:
+        """
+        Oversleep of a timer: busy loop runs other greenlets before it gets to expired timer,
+        so sleeping greenlet wakes up late by the time greenlets wait for CPU
+        :param probe: seconds to sleep
+        :return: ms the loop was late to wake up sleeping greenlet
+        """
+        start = time.perf_counter()
+        gevent.sleep(probe)
+        return max(0.0, time.perf_counter() - start - probe) * 1000
+
+    @staticmethod
+    def cpu_time() -> float:
+        times = os.times()
+        return times.user + times.system
+
+    def cpu_percent(self) -> float:
+        wall, cpu = time.time(), self.cpu_time()
+        result = (cpu - self._last_cpu) / (wall - self._last_wall) * 100 if wall > self._last_wall else 0.0
+        self._last_wall, self._last_cpu = wall, cpu
+        return result
+
+    @staticmethod
+    def rss() -> int:
+        try:
+            with open('/proc/self/statm', 'r') as statm:
+                return int(statm.read().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @staticmethod
+    def open_sockets() -> int:
+        try:
+            fds = os.listdir('/proc/self/fd')
+        except OSError:
+            return -1
+        result = 0
+        for fd in fds:
+            try:
+                if os.readlink(f'/proc/self/fd/{fd}').startswith('socket:'):
+                    result += 1
+            except OSError:
+                pass
+        return result
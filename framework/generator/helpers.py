@@ -1,40 +1,83 @@
 import os
-import csv
+import mmap
 import random
-from pathlib import Path
+import logging
+from collections import OrderedDict
+from framework.generator.metrics import registry
+from config import FRAMEWORK_ROOT
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
-def make_file_with_size(name, size_bytes):
+RANDOM_SPREAD = 2 ** 16     # random block is longer than requested payload by it, so many offsets are possible
+
+
+class PayloadPool(object):
     """
-    Lambda allows file creation only in \tmp folder
-    :param name: file name
-    :param size_bytes: file size
-    :return: path to created file
+    Process-wide pool of upload payloads: random payloads and files are generated or read once
+    and handed out as read-only memoryview, so requests don't create, read or open files.
+    Files from mmap_threshold size are memory-mapped, so their pages are shared with OS page cache.
+    All random payloads are slices of one random block at random offsets, so payloads of the same size differ
+    (up to RANDOM_SPREAD variants) like fresh os.urandom files did, and the server doesn't get identical uploads.
+    Pool keeps at most budget bytes, least recently used payloads are dropped when exceeded
+    (memory is freed when uploads in progress release their views)
     """
-    tmp_dir = os.path.abspath(os.path.join(os.sep, 'tmp'))
-    if not os.path.isdir(tmp_dir):
-        os.mkdir(tmp_dir)
-    file_path = os.path.join(tmp_dir, name)
-    with open(file_path, "wb") as f:
-        f.write(os.urandom(size_bytes))
-        return file_path
+    def __init__(self, budget: int = 256 * 2 ** 20, mmap_threshold: int = 2 ** 20):
+        """
+        :param budget: max bytes of payloads kept in pool
+        :param mmap_threshold: min file size to memory-map instead of reading
+        """
+        self.budget = budget
+        self.mmap_threshold = mmap_threshold
+        self.payloads = OrderedDict()   # {key: buffer}
+        self.size = 0
 
+    def random(self, size: int) -> memoryview:
+        """
+        Note: every call returns slice at random offset of shared random block, not the same bytes
+        :param size: payload size in bytes
+        :return: random bytes
+        """
+        block = self.payloads.get('random')
+        if block is None or len(block) < size + RANDOM_SPREAD:
+            block = self.add('random', os.urandom(size + RANDOM_SPREAD))
+        self.payloads.move_to_end('random')
+        offset = random.randrange(len(block) - size + 1)
+        return memoryview(block)[offset:offset + size]
 
-def read_file_from_path(filename, pathname):
-    data_folder = Path(f"/{pathname}")
-    file_path = data_folder / filename
-    with open(file_path, "rb") as f:
-        return f.read()
+    def file(self, path: str) -> memoryview:
+        """
+        :param path: file path, absolute or relative to framework root
+        :return: file content
+        """
+        path = os.path.join(FRAMEWORK_ROOT, path)
+        buffer = self.payloads.get(path)
+        if buffer is None:
+            with open(path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                if size >= self.mmap_threshold:
+                    # file can be closed after mapping, the map keeps its own reference
+                    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    buffer = file.read()
+            self.add(path, buffer)
+        self.payloads.move_to_end(path)
+        return memoryview(buffer)
 
+    def add(self, key: str, buffer):
+        old = self.payloads.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.payloads[key] = buffer
+        self.size += len(buffer)
+        while self.size > self.budget and len(self.payloads) > 1:
+            _, evicted = self.payloads.popitem(last=False)
+            self.size -= len(evicted)
+            registry.increment('payload_pool.evictions')
+        if self.size > self.budget:
+            logger.warning(f'Payload {key} of {len(buffer)} bytes is bigger than payload pool budget {self.budget}')
+        registry.gauge('payload_pool.bytes', self.size)
+        return buffer
 
-class CsvData(object):
-    """
-    Class to handle csv test data
-    """
-    def __init__(self, file_path, fieldnames):
-        file_path = os.path.join(os.path.curdir, file_path)
-        with open(file_path) as csv_file:
-            self.data = list(csv.DictReader(csv_file, fieldnames=fieldnames))
 
-    def get_rand_item(self):
-        return random.choice(self.data)
+payloads = PayloadPool()
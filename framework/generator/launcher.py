@@ -4,12 +4,19 @@ import signal
 import logging
 from typing import List
 from gevent.pool import Group
-from locust import events
+from locust import events, runners
 from locust.runners import LocalLocustRunner
 from locust.stats import print_stats, CONSOLE_STATS_INTERVAL_SEC
 from framework.generator.debug import DebugRunner, get_healthcheck_info
 from framework.settings import Settings
 from framework.generator.listener import Listener
+from framework.generator.recorder import HistogramRecorder
+from framework.generator.metrics import registry
+from framework.generator.governor import governor
+from framework.generator.arrival import ArrivalRateRunner
+from framework.api.pool import client_pool
+from framework.generator.datapool import DataPool
+from framework.generator.asserter import LocustAsserter
 
 Listeners = List[Listener]
 logger = logging.getLogger(__name__)
@@ -37,6 +44,11 @@ class LoadTestLauncher(object):
         self.listeners: Listeners = settings.logging.listeners
         self.stats_printer, self.test_result_stats, self.api_versions = None, None, None
         self.listeners_group = Group()
+        self.recorder = HistogramRecorder(significant_figures=settings.logging.stats_precision)
+        registry.dimensions['generator_id'] = settings.generator.id
+        client_pool.configure(settings.api_pool)
+        DataPool.configure(shard=settings.generator.shard)
+        LocustAsserter.configure(success_sampling=settings.logging.success_sampling)
         set_console_log_level(loglevel=settings.logging.loglevel)
         hyper_logger = logging.getLogger('hyperclient')
         hyper_logger.setLevel(settings.logging.hyper_log_level)
@@ -63,8 +75,15 @@ class LoadTestLauncher(object):
         self.set_test_stopper()
         try:
             logger.info(f'Instantiating test runner with settings {self.settings}')
-            locust_runner = LocalLocustRunner(locust_classes=self.settings.test.classes,
-                                              options=self.settings.runner)
+            if self.settings.arrival.enabled:
+                locust_runner = ArrivalRateRunner(locust_classes=self.settings.test.classes,
+                                                  options=self.settings.runner,
+                                                  arrival=self.settings.arrival)
+            else:
+                locust_runner = LocalLocustRunner(locust_classes=self.settings.test.classes,
+                                                  options=self.settings.runner)
+            # TaskSetRPS paces requests by runner user count
+            runners.locust_runner = locust_runner
             logger.info(f'Checking API versions...')
             self.api_versions = get_healthcheck_info(locust_classes=self.settings.test.classes)
             logger.info(f'API versions:\n{self.api_versions}')
@@ -72,6 +91,9 @@ class LoadTestLauncher(object):
                 logger.info(f'Spawning listeners...')
                 self.spawn_listeners()
             self.stats_printer = gevent.spawn(stats_printer, locust_runner.stats)
+            self.recorder.start()
+            if self.settings.generator.load_share:
+                governor.configure(load_share=self.settings.generator.load_share)
             logger.info(f'Spawning clients...')
             self.spawn_clients()
             locust_runner.greenlet.join()
@@ -84,10 +106,17 @@ class LoadTestLauncher(object):
             if self.stats_printer:
                 self.stats_printer.kill(block=False)
             self.listeners_group.kill()
-            self.test_result_stats = locust_runner.stats
+            self.recorder.stop()
+            self.test_result_stats = self.recorder.stats
+            health = self.settings.logging.health
+            if health and health.untrusted:
+                self.test_result_stats.untrusted[self.settings.generator.id] = list(health.untrusted_reasons.values())
 
     def spawn_clients(self):
-        if self.settings.runner.step_load:
+        if self.settings.arrival.enabled:
+            logger.info(f'Starting arrival-rate iterations: {self.settings.arrival}')
+            locust_runner.start_arrivals()
+        elif self.settings.runner.step_load:
             logger.info(f'Starting step load: {self.settings.runner}')
             locust_runner.start_stepload(locust_count=self.settings.runner.num_clients,
                                          step_duration=self.settings.runner.step_duration,
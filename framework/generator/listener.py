@@ -90,15 +90,15 @@ class Listener(object):
         return list()
 
     def _get_unposted_error_stats(self, stats_errors: StatsErrors,
-                                  posted_errors: list) -> list:
+                                  posted_errors: set) -> list:
         """
-        Function to get StatsError records filtered by already posted keys list
+        Function to get StatsError records filtered by already posted keys
         :param stats_errors:
-        :param posted_errors: keys list (keys as in StatsError.create_key)
+        :param posted_errors: keys set (keys as in StatsError.create_key)
         :return:
         """
         if stats_errors:
-            posted_errors = [] if self.final_stats else posted_errors
+            posted_errors = set() if self.final_stats else posted_errors
             return [(key, error) for key, error in stats_errors.items() if key not in posted_errors]
         return list()
 
@@ -111,7 +111,7 @@ class Listener(object):
                 'failed': entry.num_failures,
                 'total': entry.num_requests}
 
-    def prepare_locust_errors(self, stats: RequestStats, user_count: int, posted_errors: list) -> list:
+    def prepare_locust_errors(self, stats: RequestStats, user_count: int, posted_errors: set) -> list:
         """
         Function to prepare list of per-request errors.
         Errors are stored in stats.errors dict as StatsError[md5 hash] without any timestamp, just having
@@ -120,7 +120,7 @@ class Listener(object):
         current_rps, current_fail_per_sec, user_count, avg_response_time, num_failures, num_requests
         :param stats: Locust RequestStats object
         :param user_count: current count of spawned users
-        :param posted_errors: list of already posted errors
+        :param posted_errors: keys of already posted errors
         :return:
         """
         errors = self._get_unposted_error_stats(stats.errors, posted_errors)
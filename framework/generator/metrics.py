@@ -0,0 +1,34 @@
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class MetricsRegistry(object):
+    """
+    Process-wide registry of generator metrics (not related to requests): gauges keep the latest value,
+    counters are cumulative. Metrics are sent by listeners along with request stats with registry dimensions.
+    """
+    def __init__(self):
+        self.gauges: Dict[str, float] = dict()
+        self.counters: Dict[str, int] = dict()
+        self.dimensions: Dict[str, str] = dict()
+
+    def gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        :return: {'gauges': {name: value}, 'counters': {name: value}}
+        """
+        return {'gauges': dict(self.gauges), 'counters': dict(self.counters)}
+
+    def has_metrics(self) -> bool:
+        return bool(self.gauges or self.counters)
+
+
+registry = MetricsRegistry()
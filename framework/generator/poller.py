@@ -0,0 +1,199 @@
+import time
+import random
+import logging
+from typing import Callable, Dict, Hashable, List
+import gevent
+from gevent.event import AsyncResult, Event
+from locust import events
+from framework.generator.exceptions import PollTimeout
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+COMPLETION_REQUEST_TYPE = 'completion'
+
+
+class Backoff(object):
+    """
+    Poll intervals: interval * factor ** attempt up to max_interval, randomly spread by +-jitter share,
+    so users started together don't poll the server in bursts
+    """
+    def __init__(self, interval: float = 5, max_interval: float = 60, factor: float = 2.0, jitter: float = 0.1):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.interval * self.factor ** attempt, self.max_interval)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+def record_completion(name: str, started: float, exception: Exception = None):
+    """
+    Function to record time to completion as request of 'completion' type, so it gets its own
+    latency stats, percentiles and listener metrics. Locust stats get whole ms (they keep a counter per
+    distinct response time), histogram stats get precise time
+    :param name: completion name, like 'Calculation completed'
+    :param started: perf_counter of the start of the waited process
+    :param exception: timeout or check exception, if completion is failed
+    :return:
+    """
+    completion_ms = (time.perf_counter() - started) * 1000
+    if exception is None:
+        events.request_success.fire(request_type=COMPLETION_REQUEST_TYPE, name=name,
+                                    response_time=int(round(completion_ms)), precise_response_time=completion_ms,
+                                    response_length=0)
+    else:
+        events.request_failure.fire(request_type=COMPLETION_REQUEST_TYPE, name=name,
+                                    response_time=int(round(completion_ms)), precise_response_time=completion_ms,
+                                    response_length=0, exception=exception)
+
+
+def poll(check: Callable, name: str, deadline: float, backoff: Backoff = None, started: float = None):
+    """
+    Function to poll in current greenlet until check returns result, sleeps cooperatively between checks
+    :param check: function returning result or None if not completed yet
+    :param name: completion name for time to completion stats
+    :param deadline: seconds to wait for completion
+    :param backoff: poll intervals, Backoff() by default
+    :param started: perf_counter of the start of the waited process, now by default
+    :return: check result
+    """
+    backoff = backoff or Backoff()
+    started = started or time.perf_counter()
+    attempt = 0
+    while True:
+        result = check()
+        if result is not None:
+            record_completion(name, started)
+            return result
+        delay = backoff.delay(attempt)
+        remaining = started + deadline - time.perf_counter()
+        if remaining <= 0:
+            exception = PollTimeout(f'{name}: not completed in {deadline}s after {attempt + 1} checks')
+            record_completion(name, started, exception)
+            raise exception
+        gevent.sleep(min(delay, remaining))
+        attempt += 1
+
+
+class PollWaiter(object):
+    __slots__ = ('key', 'check', 'result', 'started', 'deadline', 'attempt', 'next_check')
+
+    def __init__(self, key: Hashable, check: Callable, started: float, deadline: float):
+        self.key = key
+        self.check = check
+        self.result = AsyncResult()
+        self.started = started
+        self.deadline = started + deadline
+        self.attempt = 0
+        self.next_check = started
+
+
+class BatchPoller(object):
+    """
+    Shared poller: users hand their waits off to one greenlet and are parked on AsyncResult until
+    completion, so a thousand waiting users cost a thousand parked greenlets and one polling loop.
+    Checks due at the same time are run as one batch: by check_many(keys) in one request if API
+    supports it, otherwise by every waiter's own check with limited concurrency.
+    Every waiter has its own backoff and deadline, time to completion is recorded under the poller name
+    """
+    def __init__(self, name: str, deadline: float, backoff: Backoff = None,
+                 check_many: Callable[[List[Hashable]], Dict[Hashable, object]] = None, concurrency: int = 10):
+        """
+        :param name: completion name for time to completion stats
+        :param deadline: seconds to wait for completion
+        :param backoff: poll intervals, Backoff() by default
+        :param check_many: function returning {key: result} for completed keys of the given ones
+        :param concurrency: max concurrent checks of waiters without check_many
+        """
+        self.name = name
+        self.deadline = deadline
+        self.backoff = backoff or Backoff()
+        self.check_many = check_many
+        self.concurrency = concurrency
+        self.waiters: Dict[Hashable, PollWaiter] = dict()
+        self.wakeup = Event()
+        self.greenlet = None
+        events.locust_stop_hatching += self.stop
+
+    def wait(self, key: Hashable, check: Callable = None, started: float = None):
+        """
+        Method to park current greenlet until key is completed
+        :param key: id of waited process, like calculation id
+        :param check: function returning result or None if not completed yet, not needed with check_many
+        :param started: perf_counter of the start of the waited process, now by default
+        :return: check result
+        """
+        if check is None and self.check_many is None:
+            raise ValueError(f'{self.name}: wait for {key} needs check, poller has no check_many')
+        waiter = self.waiters.get(key)
+        if waiter is None:
+            waiter = self.waiters[key] = PollWaiter(key=key, check=check,
+                                                    started=started or time.perf_counter(),
+                                                    deadline=self.deadline)
+            if self.greenlet is None or self.greenlet.dead:
+                self.greenlet = gevent.spawn(self.poll_loop)
+            self.wakeup.set()
+        return waiter.result.get()
+
+    def poll_loop(self):
+        while self.waiters:
+            now = time.perf_counter()
+            due = [waiter for waiter in self.waiters.values() if waiter.next_check <= now]
+            if due:
+                self.check_batch(due)
+                continue
+            self.wakeup.clear()
+            self.wakeup.wait(timeout=min(waiter.next_check for waiter in self.waiters.values()) - now)
+
+    def check_batch(self, due: List[PollWaiter]):
+        if self.check_many:
+            try:
+                results = self.check_many([waiter.key for waiter in due])
+            except Exception as e:
+                logger.warning(f'{self.name} batch check failed: {repr(e)}')
+                results = dict()
+            for waiter in due:
+                self.settle(waiter, results.get(waiter.key))
+        else:
+            checks = [gevent.spawn(self.run_check, waiter) for waiter in due[:self.concurrency]]
+            gevent.joinall(checks)
+            for waiter, check in zip(due, checks):
+                self.settle(waiter, check.value)
+            # waiters over concurrency limit are checked by next batch right away
+
+    def run_check(self, waiter: PollWaiter):
+        try:
+            return waiter.check()
+        except Exception as e:
+            # server errors while waiting don't fail the wait, deadline does
+            logger.warning(f'{self.name} check of {waiter.key} failed: {repr(e)}')
+            return None
+
+    def settle(self, waiter: PollWaiter, result):
+        now = time.perf_counter()
+        if result is not None:
+            self.complete(waiter, result=result)
+        elif now >= waiter.deadline:
+            self.complete(waiter, exception=PollTimeout(f'{self.name}: {waiter.key} not completed '
+                                                        f'in {self.deadline}s after {waiter.attempt + 1} checks'))
+        else:
+            waiter.next_check = min(now + self.backoff.delay(waiter.attempt), waiter.deadline)
+            waiter.attempt += 1
+
+    def complete(self, waiter: PollWaiter, result=None, exception: Exception = None):
+        del self.waiters[waiter.key]
+        record_completion(self.name, waiter.started, exception)
+        if exception is None:
+            waiter.result.set(result)
+        else:
+            waiter.result.set_exception(exception)
+
+    def stop(self):
+        if self.greenlet:
+            self.greenlet.kill(block=True)
+        for waiter in list(self.waiters.values()):
+            waiter.result.set_exception(PollTimeout(f'{self.name}: poller stopped'))
+        self.waiters.clear()
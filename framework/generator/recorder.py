@@ -0,0 +1,107 @@
+import time
+import logging
+from locust import events
+from locust.stats import StatsError, StatsEntry, RequestStats, global_stats
+from framework.test.histogram import HistogramStats
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def record_request(stats: HistogramStats, request_type, name, response_time, response_length,
+                   exception=None, **kwargs):
+    """
+    Function to record request event into stats and its series. Series values come in event kwargs:
+    precise_response_time -- response time with sub-millisecond fraction, Locust gets it rounded to ms
+    corrected_response_time -- response time from intended send time (see TaskSetRPS)
+    sample_weight -- amount of requests the event stands for (see LocustAsserter.success_sampling)
+    phase_times -- {phase: ms} transport phases of the request (see framework.api.timing), series 'phase.<phase>'
+    :param stats: stats to record into
+    :param exception: request exception for failed requests
+    :return:
+    """
+    timestamp = time.time()
+    count = kwargs.get('sample_weight', 1)
+    response_time = kwargs.get('precise_response_time', response_time)
+    stats.log_request(request_type, name, response_time, response_length, timestamp, count)
+    if exception is not None:
+        stats.log_error(request_type, name, StatsError.parse_error(exception))
+    corrected = kwargs.get('corrected_response_time')
+    if corrected is not None or 'corrected' in stats.series:
+        stats.get_series('corrected').log_request(request_type, name,
+                                                  response_time if corrected is None else corrected,
+                                                  response_length, timestamp, count)
+    for phase, phase_time in kwargs.get('phase_times', {}).items():
+        stats.get_series(f'phase.{phase}').log_request(request_type, name, phase_time, 0, timestamp, count)
+
+
+def locust_rounded(response_time):
+    """
+    :return: response time key of StatsEntry.response_times, rounded the same way as Locust does
+    """
+    if response_time < 100:
+        return response_time
+    if response_time < 1000:
+        return int(round(response_time, -1))
+    if response_time < 10000:
+        return int(round(response_time, -2))
+    return int(round(response_time, -3))
+
+
+def add_locust_weight(entry: StatsEntry, response_time, response_length, count: int):
+    """
+    Function to count request already logged into Locust stats entry 'count' times more,
+    without logging it again and again
+    """
+    entry.num_requests += count
+    second = int(entry.last_request_timestamp)
+    entry.num_reqs_per_sec[second] = entry.num_reqs_per_sec.get(second, 0) + count
+    entry.total_content_length += (response_length or 0) * count
+    if response_time is None:
+        entry.num_none_requests += count
+        return
+    entry.total_response_time += response_time * count
+    rounded = locust_rounded(response_time)
+    entry.response_times[rounded] = entry.response_times.get(rounded, 0) + count
+
+
+def weight_locust_stats(stats: RequestStats, request_type, name, response_time, response_length,
+                        sample_weight: int = 1):
+    """
+    Function to apply weight of sampled event to Locust stats: Locust listener logs it as one request,
+    the rest of the weight is added here, so Locust stats (console, runner.stats read by Sfx listener)
+    count all requests, not only sampled ones
+    :param stats: Locust stats the event is logged into
+    :param sample_weight: amount of requests the event stands for
+    :return:
+    """
+    if sample_weight > 1:
+        for entry in (stats.total, stats.get(name, request_type)):
+            add_locust_weight(entry, response_time, response_length, sample_weight - 1)
+
+
+class HistogramRecorder(object):
+    """
+    Class to record Locust request events into HistogramStats,
+    which are returned from load generator instead of Locust RequestStats.
+    Weight of sampled events is applied to Locust stats too (see weight_locust_stats)
+    """
+    def __init__(self, significant_figures: int):
+        self.stats = HistogramStats(significant_figures=significant_figures)
+
+    def start(self):
+        events.request_success += self.on_request_success
+        events.request_failure += self.on_request_failure
+
+    def stop(self):
+        events.request_success -= self.on_request_success
+        events.request_failure -= self.on_request_failure
+
+    def on_request_success(self, request_type, name, response_time, response_length, **kwargs):
+        record_request(self.stats, request_type, name, response_time, response_length, **kwargs)
+        if 'sample_weight' in kwargs:
+            weight_locust_stats(global_stats, request_type, name, response_time, response_length,
+                                kwargs['sample_weight'])
+
+    def on_request_failure(self, request_type, name, response_time, response_length, exception, **kwargs):
+        record_request(self.stats, request_type, name, response_time, response_length, exception, **kwargs)
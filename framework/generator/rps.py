@@ -2,14 +2,45 @@ import logging
 import time
 from locust import runners, TaskSet
 import gevent
+from gevent.local import local
+from framework.generator.governor import governor
+
+_intended = local()     # intended send time of the next request of the current greenlet
+
+
+def pop_intended_start():
+    """
+    Function to get (and forget) intended send time set by keep_rps_at in current greenlet
+    :return: timestamp or None if request is not paced or correction is off
+    """
+    start = getattr(_intended, 'start', None)
+    _intended.start = None
+    return start
+
+
+def set_intended_start(start: float):
+    """
+    Function to set intended send time of the next request of the current greenlet,
+    used by pacers other than keep_rps_at (see arrival.ArrivalRateRunner)
+    :param start: timestamp
+    :return:
+    """
+    _intended.start = start
 
 
 class TaskSetRPS(TaskSet):
     """
-    A task set that allows locust to limit the number of requests by sleeping to reach a target RPS
+    A task set that allows locust to limit the number of requests by sleeping to reach a target RPS.
+    If test controller runs rate governor (controller -> rps_governor), target is the rps of the whole test:
+    requests are released by generator token bucket at generator share of the target.
+    With correct_coordinated_omission = True pacing keeps its schedule when server stalls and
+    next LocustAsserter also records response time from the intended send time, so stalls
+    show up in 'corrected' stats instead of being omitted
     """
 
     _failed_to_reach_rps_target = False
+    correct_coordinated_omission = False
+    paced = True    # False when iterations are started by arrival-rate runner, keep_rps_at does nothing then
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -20,7 +51,22 @@ class TaskSetRPS(TaskSet):
         current_time = float(time.time())
         if runners.locust_runner is None:  # this happens when debugging (running a single locust)
             return
+        if not TaskSetRPS.paced:
+            return
+        if governor.enabled:
+            intended_start = governor.acquire(key=type(self).__name__, target_rps=target_rps)
+            if self.correct_coordinated_omission:
+                _intended.start = intended_start
+            return
         next_time = self._previous_time + runners.locust_runner.user_count / target_rps
+        if self.correct_coordinated_omission:
+            if not self._previous_time:
+                next_time = current_time
+            self._previous_time = next_time
+            _intended.start = next_time
+            if next_time > current_time:
+                gevent.sleep(next_time - current_time)
+            return
         if current_time > next_time:
             if runners.locust_runner.state == runners.STATE_RUNNING and not TaskSetRPS._failed_to_reach_rps_target:
                 logging.warning("Failed to reach target rps, even after rampup has finished")
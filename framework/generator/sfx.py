@@ -1,5 +1,6 @@
 import time
 import logging
+from collections import deque
 from config.test_config_reader import sfx_config
 
 from gevent import monkey
@@ -8,8 +9,11 @@ from gevent import monkey
 # See: https://github.com/requests/requests/issues/3752#issuecomment-294608002
 monkey.patch_ssl()
 
+import gevent
 import signalfx
+from locust import events
 from framework.generator.listener import Listener
+from framework.generator.metrics import registry
 
 
 logging.basicConfig()
@@ -22,6 +26,10 @@ class SfxListener(Listener):
     Class for sending stats into SignalFX
     On init emits 'locust test started' event
     On delete emits 'locust test stopped' event
+    emit only puts metrics into bounded queue, sender greenlet sends them in compressed batches
+    every send_interval, so load greenlets are not blocked by sending. When queue is full,
+    metrics are dropped and counted in sfx.dropped_metrics.
+    Transport phases of requests are sent as locust.phase_<phase>_avg_response_time gauges per request name
     """
     def __new__(cls, *args, **kwargs):
         if not hasattr(cls, 'instance'):
@@ -36,37 +44,117 @@ class SfxListener(Listener):
         super(SfxListener, self).__init__(config=config)
         self.sfx = signalfx.SignalFx().ingest(token=config['access_token'],
                                               endpoint=config['endpoint'],
-                                              timeout=int(config['timeout'])*1000)
+                                              timeout=int(config['timeout'])*1000,
+                                              compress=True)
+        self.queue = deque()    # (metric type, datapoint)
+        self.max_queue = config.get('max_queue', 10000)
+        self.batch_size = config.get('batch_size', 300)
+        self.send_interval = config.get('send_interval', self.interval)
+        self.request_dimensions = dict()     # {request name: dimensions}, built once and never changed
+        self.phases = dict()    # {(request name, phase): [total ms, count]} of current interval
+        self.sender = None
 
     def on_stop(self):
+        events.request_success -= self.on_request
+        events.request_failure -= self.on_request
+        if self.sender:
+            self.sender.kill(block=True)
+        self.enqueue_phases()
+        self.flush()
         self.sfx.send_event(event_type='locust test stop', dimensions=self.stats_dimensions)
+        self.sfx.stop()
         logger.info(f'Sfx listener stopped')
 
     def on_start(self):
         self.sfx.send_event(event_type='locust test start',
                             dimensions=self.stats_dimensions)
+        self.request_dimensions.clear()
+        self.phases.clear()
+        events.request_success += self.on_request
+        events.request_failure += self.on_request
+        self.sender = gevent.spawn(self.send_loop)
         logger.info(f'Sfx listener started')
 
+    def on_request(self, request_type, name, response_time, response_length, phase_times: dict = None,
+                   sample_weight: int = 1, **kwargs):
+        if phase_times:
+            for phase, phase_time in phase_times.items():
+                totals = self.phases.get((name, phase))
+                if totals is None:
+                    totals = self.phases[(name, phase)] = [0, 0]
+                totals[0] += phase_time * sample_weight
+                totals[1] += sample_weight
+
+    def enqueue_phases(self):
+        """Queue average phase times of the interval per request name"""
+        timestamp = self.now or time.time()
+        for (request_name, phase), (total, count) in self.phases.items():
+            self.enqueue('gauges', self.make_metric(request_name, f'phase_{phase}_avg_response_time',
+                                                    total / count, timestamp))
+        self.phases.clear()
+
+    def enqueue(self, metric_type: str, datapoint: dict):
+        if len(self.queue) >= self.max_queue:
+            registry.increment('sfx.dropped_metrics')
+            return
+        self.queue.append((metric_type, datapoint))
+
+    def send_loop(self):
+        """
+        Sender greenlet: sends queued metrics every send_interval
+        """
+        while True:
+            gevent.sleep(self.send_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f'Sfx sending error: {repr(e)}')
+
+    def flush(self):
+        """
+        Send all queued metrics in batches, yielding to load greenlets between batches
+        """
+        while self.queue:
+            batch = {'gauges': list(), 'cumulative_counters': list()}
+            for _ in range(min(self.batch_size, len(self.queue))):
+                metric_type, datapoint = self.queue.popleft()
+                batch[metric_type].append(datapoint)
+            self.sfx.send(**batch)
+            gevent.sleep(0)
+
     def emit(self):
         user_count = self.runner.user_count
         stats = self.runner.stats
         logger.debug(f'SFX user count: {user_count}, sleep: {self.interval}')
         self.now = time.time()
-        gauges = list()
-        requests_stats = self.prepare_locust_stats(stats, user_count)
-        if requests_stats:
-            for request in requests_stats:
-                request_name, request_timestamp, stats_values = request
-                for name, value in stats_values.items():
-                    gauge = self.make_metric(request_name, name, value, request_timestamp)
-                    gauges.append(gauge)
-            logger.debug(f'SFX gauges: {gauges}')
-            self.sfx.send(gauges=gauges)
+        for request_name, request_timestamp, stats_values in self.prepare_locust_stats(stats, user_count):
+            for name, value in stats_values.items():
+                self.enqueue('gauges', self.make_metric(request_name, name, value, request_timestamp))
+        if not self.final_stats:
+            self.enqueue_phases()
+        if registry.has_metrics():
+            self.enqueue_generator_metrics()
+
+    def enqueue_generator_metrics(self):
+        """Queue generator metrics from registry with generator dimensions"""
+        dimensions = dict(self.stats_dimensions)
+        dimensions.update(registry.dimensions)
+        timestamp = int(self.now * 1000)
+        metrics = registry.snapshot()
+        for name, value in metrics['gauges'].items():
+            self.enqueue('gauges', {'dimensions': dimensions, 'metric': f'locust.{name}',
+                                    'value': value, 'timestamp': timestamp})
+        for name, value in metrics['counters'].items():
+            self.enqueue('cumulative_counters', {'dimensions': dimensions, 'metric': f'locust.{name}',
+                                                 'value': value, 'timestamp': timestamp})
 
     def make_metric(self, request_name: str, name: str, value, timestamp) -> dict:
-        """Prepare Sfx metric dict"""
-        self.stats_dimensions.update({'request_name': request_name})
-        return {'dimensions': self.stats_dimensions,
+        """Prepare Sfx metric dict, dimensions dict is shared by all metrics of the request"""
+        dimensions = self.request_dimensions.get(request_name)
+        if dimensions is None:
+            dimensions = self.request_dimensions[request_name] = dict(self.stats_dimensions,
+                                                                      request_name=request_name)
+        return {'dimensions': dimensions,
                 'metric': f'locust.{str(name).replace(" ", "_")}',
                 'value': value,
                 'timestamp': int(timestamp * 1000)}
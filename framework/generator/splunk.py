@@ -1,6 +1,8 @@
 import time
+import gzip
 from json import dumps
 import logging
+from collections import deque
 from config.test_config_reader import splunk_config
 
 from gevent import monkey
@@ -10,10 +12,13 @@ from gevent import monkey
 monkey.patch_all()
 
 from socket import gethostname
+import gevent
+from gevent.event import Event
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from framework.generator.listener import Listener
+from framework.generator.metrics import registry
 
 
 logger = logging.getLogger(__name__)
@@ -23,6 +28,9 @@ logger.setLevel(logging.INFO)
 class SplunkErrorListener(Listener):
     """
     Class for sending error logs into Splunk
+    Errors are queued by emit and sent by sender greenlet in HEC batches: newline-delimited events
+    in gzip body, flushed when batch reaches max_batch_bytes or every flush_interval.
+    When queue is full, errors are dropped and counted in splunk.dropped_events
     """
     def __new__(cls, *args, **kwargs):
         if not hasattr(cls, 'instance'):
@@ -38,8 +46,8 @@ class SplunkErrorListener(Listener):
         self.headers = {'Authorization': f'Splunk {config["splunkToken"]}'}
         self.timeout = config['timeout']
         self.session = requests.Session()
-        retry = Retry(total=5,
-                      backoff_factor=2.0,
+        retry = Retry(total=config.get('retries', 2),
+                      backoff_factor=0.5,
                       method_whitelist=False,  # Retry for any HTTP verb
                       status_forcelist=[500, 502, 503, 504])
         self.session.mount('https://', HTTPAdapter(max_retries=retry))
@@ -49,12 +57,23 @@ class SplunkErrorListener(Listener):
                        'source': 'locust',
                        'sourcetype': 'json',
                        'event': None}
-        self.posted_error_keys = list()
+        self.posted_error_keys = set()
+        self.queue = deque()    # serialized events
+        self.queue_bytes = 0
+        self.max_queue = config.get('max_queue', 10000)
+        self.max_batch_bytes = config.get('max_batch_bytes', 512 * 1024)
+        self.flush_interval = config.get('flush_interval', self.interval)
+        self.batch_ready = Event()
+        self.sender = None
 
     def on_stop(self):
+        if self.sender:
+            self.sender.kill(block=True)
+        self.flush()
         logger.info(f'Splunk listener stopped')
 
     def on_start(self):
+        self.sender = gevent.spawn(self.send_loop)
         logger.info(f'Splunk listener started')
 
     def emit(self):
@@ -69,21 +88,51 @@ class SplunkErrorListener(Listener):
             logger.debug(f'Emitting Splunk errors: {errors}')
             for error in errors:
                 error.update(self.stats_dimensions)
-                self.send_splunk_event(error)
-            self.posted_error_keys.extend(keys)
+                self.enqueue_splunk_event(error)
+            self.posted_error_keys.update(keys)
 
-    def send_splunk_event(self, event: dict):
+    def enqueue_splunk_event(self, event: dict):
         def jsn(x):
             return str(x).replace('"', '\"')
+        if len(self.queue) >= self.max_queue:
+            registry.increment('splunk.dropped_events')
+            return
         event.update({'error': jsn(event.get('error', ''))})
         payload = self.params.copy()
         payload.update({'time': time.time(), 'event': event})
-        logger.debug(f'Splunk sending! {payload}')
+        data = dumps(payload).encode()
+        self.queue.append(data)
+        self.queue_bytes += len(data)
+        if self.queue_bytes >= self.max_batch_bytes:
+            self.batch_ready.set()
+
+    def send_loop(self):
+        """
+        Sender greenlet: sends queued events when batch is full or flush_interval passed
+        """
+        while True:
+            self.batch_ready.wait(timeout=self.flush_interval)
+            self.batch_ready.clear()
+            self.flush()
+
+    def flush(self):
+        while self.queue:
+            batch = list()
+            size = 0
+            while self.queue and (not batch or size + len(self.queue[0]) < self.max_batch_bytes):
+                data = self.queue.popleft()
+                batch.append(data)
+                size += len(data)
+            self.queue_bytes -= size
+            self.send_splunk_batch(batch)
+
+    def send_splunk_batch(self, batch: list):
+        logger.debug(f'Splunk sending {len(batch)} events')
         try:
             r = self.session.post(
                 self.url,
-                data=dumps(payload),
-                headers=self.headers,
+                data=gzip.compress(b'\n'.join(batch)),
+                headers=dict(self.headers, **{'Content-Encoding': 'gzip'}),
                 timeout=self.timeout
             )
             r.raise_for_status()
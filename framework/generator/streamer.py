@@ -0,0 +1,71 @@
+import time
+import logging
+from locust import events
+from framework.generator.listener import Listener
+from framework.generator.recorder import record_request
+from framework.test.histogram import HistogramStats
+from framework.test.stream import get_stream_storage
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class StatsStreamListener(Listener):
+    """
+    Class for writing per-interval stats records into stats stream,
+    so test controller can merge them while test is running or recover them if generator is lost
+    """
+    def __init__(self, config: dict, run_id: str, generator_id: str, significant_figures: int):
+        """
+        :param config: stats_stream section of logging config with location and stats interval
+        :param run_id: test run id
+        :param generator_id: id of the generator within test run
+        :param significant_figures: histogram precision
+        """
+        super(StatsStreamListener, self).__init__(config=config)
+        self.storage = get_stream_storage(config['location'])
+        self.run_id = run_id
+        self.generator_id = generator_id
+        self.significant_figures = significant_figures
+        self.interval_stats = HistogramStats(significant_figures=significant_figures)
+        self.interval_start = time.time()
+        self.seq = 0
+
+    def on_start(self):
+        self.final_stats = False  # records are written every interval regardless of logging settings
+        self.interval_start = time.time()
+        events.request_success += self.on_request_success
+        events.request_failure += self.on_request_failure
+        logger.info(f'Stats stream listener started: {self.run_id}/{self.generator_id}')
+
+    def on_stop(self):
+        events.request_success -= self.on_request_success
+        events.request_failure -= self.on_request_failure
+        self.write_record(final=True)
+        logger.info(f'Stats stream listener stopped')
+
+    def on_request_success(self, request_type, name, response_time, response_length, **kwargs):
+        record_request(self.interval_stats, request_type, name, response_time, response_length, **kwargs)
+
+    def on_request_failure(self, request_type, name, response_time, response_length, exception, **kwargs):
+        record_request(self.interval_stats, request_type, name, response_time, response_length, exception,
+                       **kwargs)
+
+    def emit(self):
+        self.write_record(final=False)
+
+    def write_record(self, final: bool):
+        stats, self.interval_stats = self.interval_stats, HistogramStats(significant_figures=self.significant_figures)
+        start, self.interval_start = self.interval_start, time.time()
+        record = {'generator_id': self.generator_id,
+                  'seq': self.seq,
+                  'start': start,
+                  'end': self.interval_start,
+                  'user_count': self.runner.user_count,
+                  'final': final,
+                  'stats': stats.to_dict()}
+        self.seq += 1
+        try:
+            self.storage.append(self.run_id, self.generator_id, record['seq'], record)
+        except Exception as e:
+            logger.exception(f'Exception in stats stream writing: {str(e)}')
@@ -4,6 +4,9 @@ from locust.util.timespan import parse_timespan
 from framework.generator.sfx import SfxListener
 from framework.generator.splunk import SplunkErrorListener
 from framework.generator.debug import DebugListener
+from framework.generator.streamer import StatsStreamListener
+from framework.generator.health import GeneratorHealthSampler
+from framework.test.histogram import DEFAULT_SIGNIFICANT_FIGURES
 from config.test_config_reader import test_profile
 
 logger = logging.getLogger(__name__)
@@ -34,14 +37,32 @@ class Settings(object):
     """
     def __init__(self, config=None):
         # DistributedLocustRunner options not included
+        self.generator = GeneratorConfig(config.get('generator', {}) if config else {})
         config = update_dict_with(test_profile['profile'], config)
         logger.info(f'Creating settings from config: {config}')
         self.runner = RunnerConfig(config['runner'])
+        self.arrival = ArrivalConfig(config.get('arrival') or {})
         self.test = TestConfig(config['test'])
-        self.logging = LoggingConfig(config['logging'])
+        self.api_pool = config.get('api_pool') or {}
+        self.logging = LoggingConfig(config['logging'], generator=self.generator)
 
     def __repr__(self):
-        return f'Runner: {self.runner}\nTestConfig: {self.test}\nLogging: {self.logging}'
+        return f'Runner: {self.runner}\nArrival: {self.arrival}\nTestConfig: {self.test}\nLogging: {self.logging}\n' \
+            f'Generator: {self.generator}'
+
+
+class GeneratorConfig(object):
+    """
+    Generator identity within test run, passed by test controller in 'generator' section of lambda event
+    """
+    def __init__(self, generator_config):
+        self.run_id = generator_config.get('run_id')
+        self.id = generator_config.get('id', 'local')
+        self.load_share = generator_config.get('load_share')    # [[offset, share], ...] for rate governor
+        self.shard = generator_config.get('shard')     # datapool shard, see framework.test.shards
+
+    def __repr__(self):
+        return str(self.__dict__)
 
 
 class RunnerConfig(object):
@@ -59,6 +80,21 @@ class RunnerConfig(object):
         return str(self.__dict__)
 
 
+class ArrivalConfig(object):
+    """
+    Open model settings: iterations are started at given rate instead of running clients in a loop
+    """
+    def __init__(self, arrival_config):
+        self.enabled = arrival_config.get('enabled', False)
+        self.rate = arrival_config.get('rate', 1)                       # iterations per second
+        self.distribution = arrival_config.get('distribution', 'poisson')   # poisson or constant
+        self.pool_size = arrival_config.get('pool_size', 10)            # workers created at start
+        self.max_pool_size = arrival_config.get('max_pool_size', 1000)  # max concurrent iterations
+
+    def __repr__(self):
+        return str(self.__dict__)
+
+
 class TestConfig(object):
     def __init__(self, test_config):
         docstring, classes = load_locustfile(test_config['locustfile'])
@@ -70,7 +106,7 @@ class TestConfig(object):
 
 
 class LoggingConfig(object):
-    def __init__(self, logging_config):
+    def __init__(self, logging_config, generator: GeneratorConfig):
         def get_listener(name):
             listeners = dict({
                 'Sfx': SfxListener,
@@ -83,6 +119,18 @@ class LoggingConfig(object):
         self.final_stats = logging_config['final_stats']
         self.listeners = [get_listener(name) for name in logging_config['listeners']]
         self.hyper_log_level = logging_config['hyperclient_console_log_level']
+        self.stats_precision = logging_config.get('stats_precision', DEFAULT_SIGNIFICANT_FIGURES)
+        self.success_sampling = logging_config.get('success_sampling', 1)
+        self.stats_stream = logging_config.get('stats_stream', {})
+        if self.stats_stream.get('enabled') and generator.run_id:
+            self.listeners.append(StatsStreamListener(config=self.stats_stream,
+                                                      run_id=generator.run_id,
+                                                      generator_id=generator.id,
+                                                      significant_figures=self.stats_precision))
+        self.health = None
+        if logging_config.get('health', {}).get('enabled'):
+            self.health = GeneratorHealthSampler(config=logging_config['health'])
+            self.listeners.append(self.health)
 
     def __repr__(self):
         return str(self.__dict__)
@@ -0,0 +1,26 @@
+class GeneratorError(Exception):
+    """
+    class for load generator failures, not retried by default
+    """
+    retryable = False
+
+
+class ThrottlingError(GeneratorError):
+    """
+    class for generator launches rejected by concurrency/rate limits, generator wasn't started
+    """
+    retryable = True
+
+
+class GeneratorRuntimeError(GeneratorError):
+    """
+    class for generator crashes: timeouts, out of memory, lost connection, killed process
+    """
+    retryable = True
+
+
+class GeneratorScriptError(GeneratorError):
+    """
+    class for errors in test script or config, relaunch will fail the same way
+    """
+    pass
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError, ReadTimeoutError, EndpointConnectionError, ConnectionClosedError
+from framework.test.exceptions import GeneratorError, ThrottlingError, GeneratorRuntimeError, GeneratorScriptError
+from framework.test.histogram import HistogramStats
+from framework.test.stats import get_stats_from_response
+from aws.prepare_lambda import get_aws_client, lambda_exists
+from config import FRAMEWORK_ROOT
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+LAMBDA_READ_TIMEOUT = 910  # synchronous lambda invocation returns only after up to 900s of execution
+THROTTLING_ERRORS = {'TooManyRequestsException', 'ThrottlingException', 'EC2ThrottledException'}
+
+
+class Executor(object):
+    """
+    Base class to run load generator with lambda event and get its stats back
+    """
+    name = None
+
+    def check(self):
+        """
+        Method to check if executor is ready to run generators, raises exception if not
+        :return:
+        """
+        pass
+
+    async def invoke(self, event: dict) -> HistogramStats:
+        """
+        Coroutine to run load generator and wait for its completion
+        :param event: load generator event (see load_generator.start)
+        :return: generator stats
+        :raises GeneratorError: if generator failed or returned no stats
+        """
+        raise NotImplementedError
+
+
+class LambdaExecutor(Executor):
+    """
+    Executor to run load generators in AWS Lambda.
+    boto3 invocations are blocking, so they are run in a thread pool of max_concurrency size
+    """
+    name = 'lambda'
+
+    def __init__(self, function_name: str, max_concurrency: int):
+        self.function_name = function_name
+        self.aws_client = get_aws_client(read_timeout=LAMBDA_READ_TIMEOUT,
+                                         max_pool_connections=max_concurrency)
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='lambda')
+
+    def check(self):
+        if not lambda_exists(client=self.aws_client,
+                             name=self.function_name):
+            raise ValueError(f'Cannot find {self.function_name} lambda. '
+                             f'Check region settings or run \"aws\\prepare_lambda.py\" '
+                             f'to create function first.')
+
+    async def invoke(self, event: dict) -> HistogramStats:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.invoke_lambda, event)
+
+    def invoke_lambda(self, event: dict) -> HistogramStats:
+        """
+        Function to invoke lambda and classify its failures
+        :param event: lambda invocation config
+        :return: generator stats
+        """
+        try:
+            lambda_response = self.aws_client.invoke(FunctionName=self.function_name,
+                                                     Payload=json.dumps(event))
+        except ClientError as e:
+            if e.response['Error']['Code'] in THROTTLING_ERRORS:
+                raise ThrottlingError(f'Lambda invocation throttled: {e}') from e
+            raise GeneratorError(f'Lambda invocation error: {e}') from e
+        except ReadTimeoutError as e:
+            # lambda may be still running, relaunching it would double the load
+            raise GeneratorError(f'No response from lambda in {LAMBDA_READ_TIMEOUT}s: {e}') from e
+        except (EndpointConnectionError, ConnectionClosedError) as e:
+            raise GeneratorRuntimeError(f'Lambda connection error: {e}') from e
+        if 'FunctionError' in lambda_response:
+            error = lambda_response['Payload'].read()
+            logger.error(f'Error executing lambda: {lambda_response}, {error}')
+            if lambda_response['FunctionError'] == 'Handled':
+                raise GeneratorScriptError(f'Lambda function error: {error}')
+            raise GeneratorRuntimeError(f'Lambda runtime error: {error}')
+        logger.info(f'Lambda execution finished: {lambda_response}.')
+        stats = get_stats_from_response(lambda_response)
+        if not stats:
+            raise GeneratorScriptError('Lambda returned no stats, check test start exception in lambda logs')
+        return stats
+
+
+class LocalExecutor(Executor):
+    """
+    Executor to run load generators as local processes, one process per core since gevent uses single core.
+    Generators exceeding amount of processes wait for a free one.
+    """
+    name = 'local'
+
+    def __init__(self, processes: int = None):
+        self.processes = processes or os.cpu_count()
+        self.slots = None
+
+    async def invoke(self, event: dict) -> HistogramStats:
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.processes)
+        if self.slots.locked():
+            logger.warning(f'All {self.processes} local generator processes are busy, waiting...')
+        async with self.slots:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                output = os.path.join(tmp_dir, 'stats.json')
+                process = await asyncio.create_subprocess_exec(sys.executable, 'load_generator.py',
+                                                               '--event', json.dumps(event),
+                                                               '--output', output,
+                                                               cwd=FRAMEWORK_ROOT)
+                return_code = await process.wait()
+                if return_code != 0:
+                    raise GeneratorRuntimeError(f'Local generator exited with code {return_code}')
+                logger.info(f'Local generator execution finished.')
+                with open(output, 'r') as file:
+                    stats_dict = json.load(file)
+        if not stats_dict:
+            raise GeneratorScriptError('Local generator returned no stats, check test start exception in its log')
+        return HistogramStats.from_dict(stats_dict)
+
+
+def get_executor(name: str, function_name: str, max_concurrency: int) -> Executor:
+    """
+    :param name: 'lambda' or 'local'
+    :param function_name: lambda function name
+    :param max_concurrency: max amount of concurrently running generators
+    :return: executor instance
+    """
+    if name == LambdaExecutor.name:
+        return LambdaExecutor(function_name=function_name, max_concurrency=max_concurrency)
+    if name == LocalExecutor.name:
+        return LocalExecutor()
+    raise ValueError(f'Unknown executor {name}, use one of: lambda, local')
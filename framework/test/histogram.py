@@ -0,0 +1,379 @@
+import sys
+import math
+import zlib
+import base64
+import operator
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+import logging
+from typing import List
+
+"""
+Compact mergeable latency stats to pass from load generator to test controller.
+Histogram layout follows HdrHistogram: values are put into log2 buckets, each bucket
+is split into linear sub-buckets, so relative error is bounded by significant figures.
+"""
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_SIGNIFICANT_FIGURES = 2
+DEFAULT_HIGHEST_TRACKABLE_MS = 3600 * 1000  # 1 hour in ms, larger values are clamped
+DEFAULT_UNITS_PER_MS = 1000     # values are counted in microseconds to keep sub-millisecond resolution
+COUNTS_TYPECODE = 'q'
+
+
+class LatencyHistogram(object):
+    """
+    Class represents fixed-size log-bucketed histogram of response times backed by array of counters.
+    Response times are given and reported in ms, counted in 1 / units_per_ms of ms (microseconds by default)
+    """
+    def __init__(self, significant_figures: int = DEFAULT_SIGNIFICANT_FIGURES,
+                 highest_trackable: int = DEFAULT_HIGHEST_TRACKABLE_MS,
+                 units_per_ms: int = DEFAULT_UNITS_PER_MS):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError(f'Significant figures should be in 1..5, got {significant_figures}')
+        self.significant_figures = significant_figures
+        self.highest_trackable = highest_trackable
+        self.units_per_ms = units_per_ms
+        self.highest_value = highest_trackable * units_per_ms
+        largest_single_unit = 2 * 10 ** significant_figures
+        sub_bucket_count_magnitude = int(math.ceil(math.log2(largest_single_unit)))
+        self.sub_bucket_half_count_magnitude = sub_bucket_count_magnitude - 1
+        self.sub_bucket_count = 1 << sub_bucket_count_magnitude
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+        bucket_count = 1
+        while (self.sub_bucket_count << (bucket_count - 1)) <= self.highest_value:
+            bucket_count += 1
+        self.counts_len = (bucket_count + 1) * self.sub_bucket_half_count
+        self.counts = array(COUNTS_TYPECODE, bytes(self.counts_len * array(COUNTS_TYPECODE).itemsize))
+        self.total_count = 0
+        self._cumulative = None     # cumulative counts, computed once for all percentiles of an export
+
+    def _counts_index(self, value: int) -> int:
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - (self.sub_bucket_half_count_magnitude + 1)
+        sub_bucket_index = value >> bucket_index
+        bucket_base_index = (bucket_index + 1) << self.sub_bucket_half_count_magnitude
+        return bucket_base_index + sub_bucket_index - self.sub_bucket_half_count
+
+    def _value_at_index(self, index: int) -> int:
+        """Highest value equivalent (within precision) to the values counted at index"""
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        return ((sub_bucket_index + 1) << bucket_index) - 1
+
+    def record(self, value, count: int = 1):
+        """
+        Record response time
+        :param value: response time in ms, negative values are counted as 0, too large are clamped
+        :param count: number of occurrences
+        """
+        value = min(max(int(round(value * self.units_per_ms)), 0), self.highest_value)
+        self.counts[self._counts_index(value)] += count
+        self.total_count += count
+        self._cumulative = None
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get the response time that percent of recorded values are within
+        :param percent: 0.0 ... 1.0
+        :return: response time in ms
+        """
+        return self.percentiles([percent])[0]
+
+    def percentiles(self, percents: List[float]) -> List[float]:
+        """
+        :param percents: [0.0 ... 1.0, ...]
+        :return: response times in ms, cumulative counts are computed once for all of them
+        """
+        if not self.total_count:
+            return [0] * len(percents)
+        if self._cumulative is None:
+            self._cumulative = list(accumulate(self.counts))
+        result = list()
+        for percent in percents:
+            target = max(int(math.ceil(percent * self.total_count)), 1)
+            index = bisect_left(self._cumulative, target)
+            result.append(min(self._value_at_index(index), self.highest_value) / self.units_per_ms)
+        return result
+
+    def is_compatible(self, other) -> bool:
+        return self.significant_figures == other.significant_figures \
+            and self.highest_trackable == other.highest_trackable \
+            and self.units_per_ms == other.units_per_ms
+
+    def recorded(self):
+        """
+        :return: (value in ms, count) of every non-empty counter
+        """
+        for index, count in enumerate(self.counts):
+            if count:
+                yield self._value_at_index(index) / self.units_per_ms, count
+
+    def extend(self, other):
+        """
+        Merge other histogram counts into this one. Histograms of different layouts
+        (e.g. stats_precision changed between generators) are merged into the coarser one by re-recording values.
+        Counters are added in Python-level loop: ~0.4ms for default layout (3328 counters), ~2.6ms for
+        3 significant figures. Merge is done on test controller once per request name of generator result,
+        not per request, so it's kept simple instead of adding numpy dependency
+        """
+        if not self.is_compatible(other):
+            layout = self.coarser_layout(other)
+            if not self.is_compatible(layout):
+                self.adopt(layout.rerecord(self))
+            if not self.is_compatible(other):
+                return self.rerecord(other)
+        self.counts = array(COUNTS_TYPECODE, map(operator.add, self.counts, other.counts))
+        self.total_count += other.total_count
+        self._cumulative = None
+        return self
+
+    def rerecord(self, other):
+        """Add values of histogram of other layout, every value is recorded as highest value of its counter"""
+        for value, count in other.recorded():
+            self.record(value, count)
+        return self
+
+    def coarser_layout(self, other):
+        """Empty histogram of the layout both histograms can be merged into without false precision"""
+        return LatencyHistogram(significant_figures=min(self.significant_figures, other.significant_figures),
+                                highest_trackable=max(self.highest_trackable, other.highest_trackable),
+                                units_per_ms=min(self.units_per_ms, other.units_per_ms))
+
+    def adopt(self, other):
+        """Take layout and counts of other histogram"""
+        self.__dict__.update(other.__dict__)
+
+    def copy_layout(self):
+        """Empty histogram with the same layout"""
+        return LatencyHistogram(significant_figures=self.significant_figures,
+                                highest_trackable=self.highest_trackable,
+                                units_per_ms=self.units_per_ms)
+
+    def to_dict(self) -> dict:
+        counts = self.counts
+        if sys.byteorder != 'little':
+            counts = array(COUNTS_TYPECODE, counts)
+            counts.byteswap()
+        return {'significant_figures': self.significant_figures,
+                'highest_trackable': self.highest_trackable,
+                'units_per_ms': self.units_per_ms,
+                'counts': base64.b64encode(zlib.compress(counts.tobytes())).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        histogram = cls(significant_figures=data['significant_figures'],
+                        highest_trackable=data['highest_trackable'],
+                        units_per_ms=data.get('units_per_ms', 1))     # records without units are in ms
+        counts = array(COUNTS_TYPECODE)
+        counts.frombytes(zlib.decompress(base64.b64decode(data['counts'])))
+        if sys.byteorder != 'little':
+            counts.byteswap()
+        if len(counts) != histogram.counts_len:
+            raise ValueError(f'Histogram counts length {len(counts)} != {histogram.counts_len}')
+        histogram.counts = counts
+        histogram.total_count = sum(counts)
+        return histogram
+
+
+class HistogramEntry(object):
+    """
+    Class represents per-request stats (like locust StatsEntry) with response times kept in LatencyHistogram
+    """
+    def __init__(self, name: str, method: str, histogram: LatencyHistogram):
+        self.name = name
+        self.method = method
+        self.histogram = histogram
+        self.num_requests = 0
+        self.num_failures = 0
+        self.total_response_time = 0
+        self.min_response_time = None
+        self.max_response_time = 0
+        self.total_content_length = 0
+        self.start_time = None
+        self.last_request_timestamp = None
+
+    @property
+    def avg_response_time(self) -> float:
+        return self.total_response_time / max(self.num_requests, 1)
+
+    def log(self, response_time, content_length, timestamp: float, count: int = 1):
+        self.num_requests += count
+        self.total_response_time += response_time * count
+        self.min_response_time = response_time if self.min_response_time is None \
+            else min(self.min_response_time, response_time)
+        self.max_response_time = max(self.max_response_time, response_time)
+        self.total_content_length += (content_length or 0) * count
+        self.start_time = self.start_time or timestamp
+        self.last_request_timestamp = timestamp
+        self.histogram.record(response_time, count)
+
+    def log_error(self):
+        self.num_failures += 1
+
+    def extend(self, other):
+        self.num_requests += other.num_requests
+        self.num_failures += other.num_failures
+        self.total_response_time += other.total_response_time
+        if other.min_response_time is not None:
+            self.min_response_time = other.min_response_time if self.min_response_time is None \
+                else min(self.min_response_time, other.min_response_time)
+        self.max_response_time = max(self.max_response_time, other.max_response_time)
+        self.total_content_length += other.total_content_length
+        if other.start_time:
+            self.start_time = min(self.start_time or other.start_time, other.start_time)
+        if other.last_request_timestamp:
+            self.last_request_timestamp = max(self.last_request_timestamp or 0, other.last_request_timestamp)
+        self.histogram.extend(other.histogram)
+        return self
+
+    def percentile(self, percent: float) -> float:
+        return self.histogram.percentile(percent)
+
+    def percentiles(self, percents: List[float]) -> List[float]:
+        return self.histogram.percentiles(percents)
+
+    def to_dict(self) -> dict:
+        return {'name': self.name,
+                'method': self.method,
+                'num_requests': self.num_requests,
+                'num_failures': self.num_failures,
+                'total_response_time': self.total_response_time,
+                'min_response_time': self.min_response_time,
+                'max_response_time': self.max_response_time,
+                'total_content_length': self.total_content_length,
+                'start_time': self.start_time,
+                'last_request_timestamp': self.last_request_timestamp,
+                'histogram': self.histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        entry = cls(name=data['name'],
+                    method=data['method'],
+                    histogram=LatencyHistogram.from_dict(data['histogram']))
+        for field in ['num_requests', 'num_failures', 'total_response_time', 'min_response_time',
+                      'max_response_time', 'total_content_length', 'start_time', 'last_request_timestamp']:
+            setattr(entry, field, data[field])
+        return entry
+
+
+class HistogramStats(object):
+    """
+    Class to collect and merge request stats and errors of load generators.
+    Size of serialized stats doesn't depend on amount of requests or distinct response times.
+    """
+    def __init__(self, significant_figures: int = DEFAULT_SIGNIFICANT_FIGURES,
+                 highest_trackable: int = DEFAULT_HIGHEST_TRACKABLE_MS):
+        self.significant_figures = significant_figures
+        self.highest_trackable = highest_trackable
+        self.entries = dict()   # {(name, method): HistogramEntry}
+        self.errors = dict()    # {'method.name.error': {'method', 'name', 'error', 'occurrences'}}
+        self.total = self._new_entry(name='Total', method='')
+        self.untrusted = dict()     # {generator_id: [reasons]} generators overloaded during the test
+        self.series = dict()        # {series name: HistogramStats} additional measurements of the same requests
+
+    def _new_entry(self, name: str, method: str) -> HistogramEntry:
+        return HistogramEntry(name=name,
+                              method=method,
+                              histogram=LatencyHistogram(significant_figures=self.significant_figures,
+                                                         highest_trackable=self.highest_trackable))
+
+    def get(self, name: str, method: str) -> HistogramEntry:
+        entry = self.entries.get((name, method))
+        if not entry:
+            entry = self._new_entry(name=name, method=method)
+            self.entries[(name, method)] = entry
+        return entry
+
+    @property
+    def num_requests(self) -> int:
+        return self.total.num_requests
+
+    def get_series(self, name: str):
+        """
+        :param name: series name, e.g. 'corrected'
+        :return: HistogramStats of the series
+        """
+        series = self.series.get(name)
+        if series is None:
+            series = HistogramStats(significant_figures=self.significant_figures,
+                                    highest_trackable=self.highest_trackable)
+            self.series[name] = series
+        return series
+
+    def log_request(self, method: str, name: str, response_time, content_length, timestamp: float,
+                    count: int = 1):
+        """
+        :param count: amount of requests, more than 1 for sampled events
+        """
+        self.total.log(response_time, content_length, timestamp, count)
+        self.get(name, method).log(response_time, content_length, timestamp, count)
+
+    def log_error(self, method: str, name: str, error: str):
+        self.total.log_error()
+        self.get(name, method).log_error()
+        key = f'{method}.{name}.{error}'
+        if key not in self.errors:
+            self.errors[key] = {'method': method, 'name': name, 'error': error, 'occurrences': 0}
+        self.errors[key]['occurrences'] += 1
+
+    def extend(self, other):
+        """
+        Merge other stats (e.g. from another load generator) into current
+        :param other: HistogramStats
+        :return: self
+        """
+        if not self.entries and not self.total.num_requests:
+            # empty stats adopt histogram layout of the first merged chunk
+            untrusted, series = self.untrusted, self.series
+            self.__init__(significant_figures=other.significant_figures,
+                          highest_trackable=other.highest_trackable)
+            self.untrusted, self.series = untrusted, series
+        elif other.significant_figures < self.significant_figures:
+            # entries are merged into coarser layout of other stats, new entries should be created in it too
+            logger.warning(f'Merging stats of {other.significant_figures} significant figures into stats of '
+                           f'{self.significant_figures}, precision is lowered to {other.significant_figures}')
+            self.significant_figures = other.significant_figures
+        for key, entry in other.entries.items():
+            self.get(*key).extend(entry)
+        for key, error in other.errors.items():
+            if key not in self.errors:
+                self.errors[key] = dict(error)
+            else:
+                self.errors[key]['occurrences'] += error['occurrences']
+        self.total.extend(other.total)
+        for generator_id, reasons in other.untrusted.items():
+            self.untrusted.setdefault(generator_id, list()).extend(r for r in reasons
+                                                                  if r not in self.untrusted[generator_id])
+        for name, series in other.series.items():
+            self.series.setdefault(name, HistogramStats()).extend(series)
+        return self
+
+    def to_dict(self) -> dict:
+        return {'significant_figures': self.significant_figures,
+                'highest_trackable': self.highest_trackable,
+                'entries': [entry.to_dict() for entry in self.entries.values()],
+                'errors': list(self.errors.values()),
+                'total': self.total.to_dict(),
+                'untrusted': self.untrusted,
+                'series': {name: series.to_dict() for name, series in self.series.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        stats = cls(significant_figures=data['significant_figures'],
+                    highest_trackable=data['highest_trackable'])
+        for entry_data in data['entries']:
+            entry = HistogramEntry.from_dict(entry_data)
+            stats.entries[(entry.name, entry.method)] = entry
+        for error in data['errors']:
+            stats.errors[f'{error["method"]}.{error["name"]}.{error["error"]}'] = dict(error)
+        stats.total = HistogramEntry.from_dict(data['total'])
+        stats.untrusted = {generator_id: list(reasons) for generator_id, reasons in data.get('untrusted', {}).items()}
+        stats.series = {name: cls.from_dict(series) for name, series in data.get('series', {}).items()}
+        return stats
@@ -0,0 +1,449 @@
+import os
+import csv
+import logging
+from array import array
+from bisect import bisect_right
+from fractions import Fraction
+from dataclasses import replace
+from typing import List, Tuple
+from framework.test.runner import Runner, parse_timespan
+from config import FRAMEWORK_ROOT
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+LAMBDA_DURATION = 900  # maximum lambda execution duration, seconds
+SHARE_RESOLUTION = 5   # seconds, time step of generator load share
+
+Layer = Tuple[float, Runner]   # (start time, runner)
+
+
+class LoadCurve(object):
+    """
+    Class represents target concurrency curve as arrays of breakpoints:
+    load changes linearly between consecutive (time, load) points
+    """
+    def __init__(self, times, loads):
+        if len(times) != len(loads) or len(times) < 2:
+            raise ValueError(f'Load curve needs at least two (time, load) points')
+        self.times = array('d', times)
+        self.loads = array('d', loads)
+        if any(t1 < t0 for t0, t1 in zip(self.times, self.times[1:])):
+            raise ValueError(f'Load curve times should be ascending: {list(self.times)}')
+
+    def __repr__(self):
+        points = ", ".join(f'({t:g}, {l:g})' for t, l in zip(self.times, self.loads))
+        return f'LoadCurve[{points}]'
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1] - self.times[0]
+
+    def load_at(self, time: float) -> float:
+        """
+        :param time: time from test start
+        :return: target load at the time
+        """
+        i = bisect_right(self.times, time) - 1
+        if i < 0 or i >= len(self.times) - 1:
+            return self.loads[min(max(i, 0), len(self.loads) - 1)]
+        t0, t1 = self.times[i], self.times[i + 1]
+        l0, l1 = self.loads[i], self.loads[i + 1]
+        return l0 + (l1 - l0) * (time - t0) / (t1 - t0) if t1 > t0 else l1
+
+    def segments(self):
+        """
+        :return: iterator over (start time, end time, start load, end load) of curve segments
+        """
+        return zip(self.times, self.times[1:], self.loads, self.loads[1:])
+
+    @classmethod
+    def from_runner(cls, runner: Runner):
+        """
+        Function to build curve of the runner section: linear hatch or stepload, then constant load
+        :param runner: test runner config
+        :return:
+        """
+        times, loads = array('d', [0]), array('d', [0])
+        if runner.step_load:
+            for i in range(runner.clients // runner.step_clients):
+                start, base = i * runner.step_duration, i * runner.step_clients
+                times.extend([start, start + runner.step_clients / runner.hatch_rate])
+                loads.extend([base, base + runner.step_clients])
+        elif runner.clients:
+            times.append(runner.clients / runner.hatch_rate)
+            loads.append(runner.clients)
+        times.append(max(runner.duration, times[-1]))
+        loads.append(loads[-1])
+        return cls(times, loads)
+
+    @classmethod
+    def from_shape(cls, config: dict):
+        """
+        Function to build curve of the shape section: breakpoints from 'points' list or 'csv' file
+        with time,value rows. Values are users or rps (converted to users with 'rps_per_user')
+        :param config: shape config
+        :return:
+        """
+        if config.get('csv'):
+            with open(os.path.join(FRAMEWORK_ROOT, config['csv']), 'r') as file:
+                points = [row for row in csv.reader(file) if row and row[0].strip()[:1].isdigit()]
+        else:
+            points = config.get('points', [])
+        times = [parse_timespan(str(time).strip()) for time, _ in points]
+        values = [float(value) for _, value in points]
+        unit = config.get('unit', 'users')
+        if unit == 'rps':
+            values = [value / config['rps_per_user'] for value in values]
+        elif unit != 'users':
+            raise ValueError(f'Unknown shape unit {unit}, use one of: users, rps')
+        return cls(times, values)
+
+    def max_load(self) -> float:
+        return max(self.loads)
+
+
+class LoadPlanner(object):
+    """
+    Class to decompose load curve into generator runs:
+    every load increase becomes a layer -- generator running till the end of the test,
+    equal layers started periodically are packed into stepload generators,
+    then layers are chopped into slices not longer than lambda execution time.
+    Curves with load decrease or fractional hatch rates (shapes) are approximated with staircase of
+    constant load layers, deviating from the curve not more than tolerance.
+    Generators over max_users are split into equal ones, generators of the same load shape and time window
+    are packed together up to max_users
+    """
+    def __init__(self, curve: LoadCurve, max_duration: int = LAMBDA_DURATION,
+                 tolerance: float = None, resolution: int = 1, max_users: int = None):
+        """
+        :param curve: target load curve
+        :param max_duration: max generator run duration
+        :param tolerance: max deviation from the curve in users, None -- exact hatch layers only
+        :param resolution: min stair length in seconds
+        :param max_users: max clients of single generator, None -- not limited
+        """
+        self.curve = curve
+        self.max_duration = max_duration
+        self.tolerance = tolerance
+        self.resolution = resolution
+        self.max_users = max_users
+
+    def layers(self) -> List[Layer]:
+        """
+        Function to get hatching generators, one for every rising segment of the curve
+        :return: [(start time, runner), ...]
+        """
+        result = list()
+        end = self.curve.times[-1]
+        for t0, t1, l0, l1 in self.curve.segments():
+            if l1 > l0:
+                clients = int(round(l1 - l0))
+                hatch_rate = int(round(clients / (t1 - t0))) if t1 > t0 else clients
+                result.append((t0, Runner(clients, hatch_rate=max(hatch_rate, 1), duration=int(end - t0))))
+            elif l1 < l0:
+                raise ValueError(f'Load decrease at {t0:g}s is not supported by runner config')
+        if self.curve.loads[0] > 0:
+            base = int(round(self.curve.loads[0]))
+            result.insert(0, (self.curve.times[0], Runner(base, hatch_rate=base, duration=int(self.curve.duration))))
+        return result
+
+    def stairs(self) -> List[Tuple[float, int]]:
+        """
+        Function to approximate curve with stairs not shorter than resolution: curve segments are split
+        into resolution long ranges (the last range of segment takes the remainder), consecutive ranges
+        are merged while single level is within tolerance from the curve on all of them.
+        Segments changing by more than tolerance range within resolution are split into resolution long stairs
+        with equal load change, so their layers can be packed into stepload generators; deviation from
+        the curve is bigger than tolerance there. Segments shorter than resolution are single stairs
+        :return: [(stair start time, load level), ...], last stair is (curve end, 0)
+        """
+        def fit(low, high):
+            level = round((low + high) / 2)
+            return level if max(high - level, level - low) <= self.tolerance else None
+
+        ranges = list()     # [(start, end, min load, max load, fixed level or None), ...]
+        for t0, t1, l0, l1 in self.curve.segments():
+            if t1 <= t0:
+                continue
+            count = max(int((t1 - t0) // self.resolution), 1)
+            bounds = [t0 + i * self.resolution for i in range(count)] + [t1]
+            change = (l1 - l0) * self.resolution / (t1 - t0)     # load change within resolution
+            steep = abs(change) > 2 * self.tolerance
+            if steep:
+                logger.warning(f'Load changes by {abs(change):g} users in {self.resolution}s resolution '
+                               f'at {t0:g}s-{t1:g}s, stairs deviate from the curve more than tolerance '
+                               f'{self.tolerance:g}')
+            if steep and count > 1:
+                first, step = round(l0 + change / 2), round(change)
+                ranges.extend((start, end, None, None, first + i * step)
+                              for i, (start, end) in enumerate(zip(bounds, bounds[1:])))
+                continue
+            for start, end in zip(bounds, bounds[1:]):
+                low, high = sorted([self.curve.load_at(start), self.curve.load_at(end - 1e-9)])
+                ranges.append((start, end, low, high, None))
+
+        result = list()
+        run = None      # [start, min load, max load] of merged ranges
+        for start, end, low, high, level in ranges:
+            if level is None and run is not None and fit(min(run[1], low), max(run[2], high)) is not None:
+                run[1:] = min(run[1], low), max(run[2], high)
+                continue
+            if run is not None:
+                result.append((run[0], fit(run[1], run[2]) or round((run[1] + run[2]) / 2)))
+                run = None
+            if level is not None:
+                result.append((start, level))
+            else:
+                run = [start, low, high]
+        if run is not None:
+            result.append((run[0], fit(run[1], run[2]) or round((run[1] + run[2]) / 2)))
+        result.append((self.curve.times[-1], 0))
+        return result
+
+    def stair_layers(self) -> List[Layer]:
+        """
+        Function to decompose stairs into constant load layers: load increase opens new layer,
+        load decrease closes the latest opened layers (the top one is split if it's closed partially)
+        :return: [(start time, runner), ...]
+        """
+        result = list()
+        opened = list()     # [[start time, base level, top level], ...]
+        for time, level in self.stairs():
+            top = opened[-1][2] if opened else 0
+            if level > top:
+                opened.append([time, top, level])
+                continue
+            while opened and opened[-1][1] >= level:
+                start, base, top = opened.pop()
+                result.append((start, base, top, time))
+            if opened and opened[-1][2] > level:
+                start, base, top = opened[-1]
+                result.append((start, level, top, time))
+                opened[-1][2] = level
+        return [(start, Runner(int(top - base), hatch_rate=int(top - base), duration=int(end - start)))
+                for start, base, top, end in sorted(result) if int(end - start) > 0]
+
+    def pack_steps(self, layers: List[Layer]) -> List[Layer]:
+        """
+        Function to pack series of equal hatches with the same period into stepload generators
+        :param layers: [(start time, runner), ...] sorted by start time
+        :return: packed layers
+        """
+        result = list()
+        series: List[Layer] = list()
+
+        def flush():
+            if len(series) > 1:
+                start, first = series[0]
+                runner = Runner(first.clients * len(series), first.hatch_rate, first.duration,
+                                step_load=True,
+                                step_duration=int(series[1][0] - start),
+                                step_clients=first.clients)
+                result.append((start, runner))
+            else:
+                result.extend(series)
+            series.clear()
+
+        for start, runner in layers:
+            if series and not runner.step_load:
+                prev_start, prev = series[-1]
+                period = start - prev_start
+                if (runner.clients == prev.clients and runner.hatch_rate == prev.hatch_rate
+                        and runner.clients / runner.hatch_rate <= period
+                        and (self.max_users is None or (len(series) + 1) * runner.clients <= self.max_users)
+                        and (len(series) == 1 or period == prev_start - series[-2][0])
+                        and prev_start + prev.duration == start + runner.duration):
+                    series.append((start, runner))
+                    continue
+            flush()
+            if runner.step_load:
+                result.append((start, runner))
+            else:
+                series.append((start, runner))
+        flush()
+        return result
+
+    def chop(self, layers: List[Layer]) -> List[Layer]:
+        """
+        Function to split layers at lambda_duration boundaries, continuation of the layer
+        starts with already hatched clients (see Runner.remaining)
+        :param layers: [(start time, runner), ...]
+        :return: [(start time, runner), ...] with runners not crossing boundaries
+        """
+        result = list()
+        queue = list(layers)
+        while queue:
+            start, runner = queue.pop(0)
+            boundary = (start // self.max_duration + 1) * self.max_duration
+            if start + runner.duration <= boundary:
+                result.append((start, runner))
+                continue
+            head = replace(runner, duration=int(boundary - start))
+            if head.step_load:
+                started_steps = -(-head.duration // head.step_duration)
+                head.clients = min(head.clients, started_steps * head.step_clients)
+            result.append((start, head))
+            queue.extend((boundary + delay, tail) for delay, tail in runner.remaining(int(boundary - start)))
+        return result
+
+    @staticmethod
+    def merge(layers: List[Layer]) -> List[Layer]:
+        """
+        Function to merge constant load layers of the same time window into one, regardless of max_users
+        (see split)
+        :param layers: [(start time, runner), ...] of constant load runners
+        :return: [(start time, runner), ...] sorted by start time
+        """
+        windows = dict()    # {(start, duration): clients}
+        for start, runner in layers:
+            windows[(start, runner.duration)] = windows.get((start, runner.duration), 0) + runner.clients
+        return [(start, Runner(clients, hatch_rate=clients, duration=duration))
+                for (start, duration), clients in sorted(windows.items())]
+
+    @staticmethod
+    def split_clients(total: int, parts: int) -> List[int]:
+        """
+        :return: 'total' split into 'parts' near-equal integers
+        """
+        size, rest = divmod(total, parts)
+        return [size + 1] * rest + [size] * (parts - rest)
+
+    def split(self, layers: List[Layer]) -> List[Layer]:
+        """
+        Function to split generators with more than max_users clients into several equal ones,
+        hatch rate is split proportionally (locust takes fractional hatch rates),
+        stepload generators are split by step clients
+        :param layers: [(start time, runner), ...]
+        :return: [(start time, runner), ...]
+        """
+        if self.max_users is None:
+            return layers
+        result = list()
+        for start, runner in layers:
+            parts = -(-runner.clients // self.max_users)
+            if parts <= 1:
+                result.append((start, runner))
+                continue
+            if runner.step_load:
+                steps = runner.clients // runner.step_clients
+                parts = min(parts, runner.step_clients)
+                for step_clients in self.split_clients(runner.step_clients, parts):
+                    hatch_rate = round(runner.hatch_rate * step_clients / runner.step_clients, 3)
+                    result.append((start, replace(runner, clients=steps * step_clients, hatch_rate=hatch_rate,
+                                                  step_clients=step_clients)))
+                if steps * -(-runner.step_clients // parts) > self.max_users:
+                    logger.warning(f'Stepload generator steps exceed {self.max_users} clients: {runner}')
+                continue
+            for clients in self.split_clients(runner.clients, parts):
+                hatch_rate = round(runner.hatch_rate * clients / runner.clients, 3)
+                result.append((start, replace(runner, clients=clients, hatch_rate=hatch_rate)))
+        return result
+
+    @staticmethod
+    def pack_key(start: float, runner: Runner) -> tuple:
+        """
+        Generators with the same key have the same load shape and can be run as one generator
+        with summed clients and hatch rate
+        """
+        if runner.step_load:
+            return (start, runner.duration, runner.step_duration, runner.clients // runner.step_clients,
+                    Fraction(runner.step_clients) / Fraction(runner.hatch_rate))
+        ramp = Fraction(runner.clients) / Fraction(runner.hatch_rate) if runner.hatch_rate < runner.clients else 1
+        return start, runner.duration, ramp
+
+    def pack(self, layers: List[Layer]) -> List[Layer]:
+        """
+        Function to pack generators with the same load shape into as few generators as possible,
+        keeping max_users limit (first-fit decreasing bin packing)
+        :param layers: [(start time, runner), ...]
+        :return: [(start time, runner), ...]
+        """
+        groups = dict()     # {pack key: [(start, runner), ...]}
+        for start, runner in layers:
+            if runner.step_load and runner.clients % runner.step_clients:
+                groups[(start, id(runner))] = [(start, runner)]
+            else:
+                groups.setdefault(self.pack_key(start, runner), list()).append((start, runner))
+        result = list()
+        for group in groups.values():
+            bins: List[Layer] = list()
+            for start, runner in sorted(group, key=lambda layer: layer[1].clients, reverse=True):
+                for i, (_, packed) in enumerate(bins):
+                    if self.max_users is None or packed.clients + runner.clients <= self.max_users:
+                        bins[i] = (start, replace(packed, clients=packed.clients + runner.clients,
+                                                  hatch_rate=packed.hatch_rate + runner.hatch_rate,
+                                                  step_clients=packed.step_clients + runner.step_clients))
+                        break
+                else:
+                    bins.append((start, runner))
+            result.extend(bins)
+        return result
+
+    def plan(self) -> List[Layer]:
+        """
+        :return: [(start time, runner), ...] sorted by start time
+        """
+        if self.tolerance is not None:
+            # load decrease splits stair layers, their pieces are whole again after chop and merge
+            layers = self.pack_steps(self.merge(self.chop(self.stair_layers())))
+        else:
+            layers = self.chop(self.pack_steps(self.layers()))
+        result = self.pack(self.split(layers))
+        result.sort(key=lambda layer: layer[0])
+        logger.debug(f'Load plan for {self.curve}: {result}')
+        return result
+
+    @staticmethod
+    def users_at(plan: List[Layer], time: float) -> int:
+        """
+        :param plan: [(start time, runner), ...]
+        :param time: time from test start
+        :return: total amount of clients of all generators at the time
+        """
+        return sum(runner.users_at(time - start) for start, runner in plan)
+
+
+class LoadShares(object):
+    """
+    Class to calculate generator share of the whole test load (generator clients / all clients) in time,
+    used by generator rate governor to split cluster-wide target rps.
+    Shares are fixed at plan time and are not rebalanced: when generator fails and is not relaunched,
+    other generators keep their shares, so cluster rps drops by share of the failed generator
+    """
+    def __init__(self, plan: List[Layer], resolution: int = SHARE_RESOLUTION):
+        self.resolution = resolution
+        end = max((start + runner.duration for start, runner in plan), default=0)
+        self.totals = array('d', [LoadPlanner.users_at(plan, t + resolution / 2)
+                                  for t in range(0, int(end) + resolution, resolution)])
+
+    def total_at(self, time: float) -> float:
+        i = int(time // self.resolution)
+        return self.totals[i] if 0 <= i < len(self.totals) else 0.0
+
+    def share(self, start: float, runner: Runner) -> list:
+        """
+        :param start: generator start time from test start
+        :param runner: generator runner
+        :return: [[seconds from generator start, share], ...] with changes of the share only
+        """
+        result = list()
+        for offset in range(0, runner.duration, self.resolution):
+            total = self.total_at(start + offset)
+            share = round(runner.users_at(offset + self.resolution / 2) / total, 4) if total else 0.0
+            if not result or result[-1][1] != share:
+                result.append([offset, share])
+        return result
+
+    def lost_share(self, start: float, runner: Runner, elapsed: float) -> float:
+        """
+        :param start: generator start time from test start
+        :param runner: generator runner
+        :param elapsed: seconds since generator start when it stopped
+        :return: average share of the rest of generator load, which is not made by other generators
+        """
+        shares = list()
+        for offset in range(max(int(elapsed), 0), runner.duration, self.resolution):
+            total = self.total_at(start + offset)
+            shares.append(runner.users_at(offset + self.resolution / 2) / total if total else 0.0)
+        return sum(shares) / len(shares) if shares else 0.0
@@ -0,0 +1,38 @@
+import random
+from dataclasses import dataclass
+from framework.test.exceptions import GeneratorError, ThrottlingError
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Policy of generator relaunches with jittered exponential backoff
+    """
+    max_attempts: int = 4            # including first launch
+    base_delay: float = 1.0          # seconds, doubled for every next attempt
+    throttling_delay: float = 5.0    # base delay for throttled launches, limits need more time to free up
+    max_delay: float = 60.0
+    min_window: int = 30             # seconds of load left in the slice to make relaunch worth it
+
+    @classmethod
+    def from_config(cls, config: dict):
+        return cls(**config) if config else cls()
+
+    def should_retry(self, attempt: int, error: GeneratorError) -> bool:
+        """
+        :param attempt: number of failed attempt, starting from 1
+        :param error: generator failure
+        :return:
+        """
+        return error.retryable and attempt < self.max_attempts
+
+    def delay(self, attempt: int, error: GeneratorError) -> float:
+        """
+        "Full jitter" backoff: random delay up to exponentially growing cap,
+        so relaunches of generators failed at the same time don't hit the limits together again
+        :param attempt: number of failed attempt, starting from 1
+        :param error: generator failure
+        :return: seconds to wait before relaunch
+        """
+        base = self.throttling_delay if isinstance(error, ThrottlingError) else self.base_delay
+        return random.uniform(0, min(self.max_delay, base * 2 ** (attempt - 1)))
@@ -1,6 +1,7 @@
 import re
 import logging
 from datetime import timedelta
+from typing import List, Tuple
 from dataclasses import dataclass, asdict
 from framework.test.stepload import StepLoad
 
@@ -41,7 +42,7 @@ def encode_timespan(seconds: int) -> str:
 @dataclass
 class Runner:
     clients: int
-    hatch_rate: int
+    hatch_rate: float
     duration: int
     step_load: bool = False
     step_duration: int = 0
@@ -69,6 +70,54 @@ class Runner:
         self.step_duration = step.duration
         self.step_clients = step.clients
 
+    def users_at(self, elapsed: float) -> int:
+        """
+        :param elapsed: seconds since runner start
+        :return: amount of running clients
+        """
+        if not 0 <= elapsed < self.duration:
+            return 0
+        if self.step_load:
+            step_index, step_elapsed = divmod(elapsed, self.step_duration)
+            return int(min(self.clients, step_index * self.step_clients
+                           + min(self.step_clients, self.hatch_rate * step_elapsed)))
+        return int(min(self.clients, self.hatch_rate * elapsed))
+
+    def remaining(self, elapsed: int) -> List[Tuple[int, 'Runner']]:
+        """
+        Function to get runners continuing the load of this runner from 'elapsed' seconds after its start,
+        so relaunched generator follows the planned load instead of starting it from zero
+        :param elapsed: seconds since runner start
+        :return: [(delay from now, runner), ...]
+        """
+        window = self.duration - elapsed
+        if window <= 0 or self.clients == 0:
+            return list()
+        result = list()
+        if self.step_load:
+            step_index, step_elapsed = divmod(elapsed, self.step_duration)
+            started_steps = step_index + (1 if step_elapsed else 0)
+            step_level = min(self.clients, started_steps * self.step_clients)
+            # whole clients only, fractional hatch rates of split generators would give fractional clients
+            level = int(min(step_level, step_index * self.step_clients + self.hatch_rate * step_elapsed))
+            if level > 0:
+                result.append((0, Runner(level, hatch_rate=level, duration=window)))
+            if level < step_level:
+                # current step finishes hatching
+                result.append((0, Runner(step_level - level, self.hatch_rate, window)))
+            next_step = (self.step_duration - step_elapsed) % self.step_duration
+            if step_level < self.clients and next_step < window:
+                runner = Runner(self.clients - step_level, self.hatch_rate, window - next_step)
+                runner.step = self.step
+                result.append((next_step, runner))
+            return result
+        level = int(min(self.clients, self.hatch_rate * elapsed))
+        if level > 0:
+            result.append((0, Runner(level, hatch_rate=level, duration=window)))
+        if level < self.clients:
+            result.append((0, Runner(self.clients - level, self.hatch_rate, window)))
+        return result
+
     def to_config(self):
         config = asdict(self)
         config['duration'] = encode_timespan(config['duration'])
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DRIFT_WARNING_SEC = 1.0
+
+
+@dataclass
+class ScheduledGenerator:
+    generator_id: str
+    planned_start: float            # seconds from test start
+    payload: dict                   # runner config for the generator
+    actual_start: float = None      # seconds from test start
+    finish: float = None            # seconds from test start
+
+    @property
+    def drift(self) -> float:
+        return self.actual_start - self.planned_start
+
+
+class GeneratorScheduler(object):
+    """
+    Class to launch generators at their start offsets in asyncio event loop
+    with limited amount of concurrently running generators
+    """
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.schedule: List[ScheduledGenerator] = list()
+        self.test_start = None
+        self.semaphore = None
+        self.tasks: List[asyncio.Task] = list()
+
+    async def run(self, schedule: List[ScheduledGenerator],
+                  start_generator: Callable[[ScheduledGenerator], Awaitable]):
+        """
+        Method to launch all generators and wait for them to complete,
+        including generators launched while the test is running (relaunches)
+        :param schedule: generators with planned start offsets
+        :param start_generator: coroutine function to run generator till completion
+        :return:
+        """
+        self.schedule = list()
+        self.tasks = list()
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.test_start = asyncio.get_running_loop().time()
+        for generator in schedule:
+            self.launch(generator, start_generator)
+        waited = 0
+        while waited < len(self.tasks):
+            pending = self.tasks[waited:]
+            await asyncio.wait(pending)
+            waited += len(pending)
+
+    def launch(self, generator: ScheduledGenerator,
+               start_generator: Callable[[ScheduledGenerator], Awaitable]) -> asyncio.Task:
+        """
+        Method to add generator to running test, e.g. relaunch of failed generator.
+        Generator waits for its planned start outside of concurrency limit and takes a slot when started
+        :param generator: generator with planned start offset
+        :param start_generator: coroutine function to run generator till completion
+        :return: task completing with the generator
+        """
+        self.schedule.append(generator)
+        task = asyncio.ensure_future(self._launch(generator, start_generator))
+        self.tasks.append(task)
+        return task
+
+    async def _launch(self, generator: ScheduledGenerator,
+                      start_generator: Callable[[ScheduledGenerator], Awaitable]):
+        await asyncio.sleep(max(0.0, generator.planned_start - self.now()))
+        async with self.semaphore:
+            generator.actual_start = self.now()
+            if generator.drift > DRIFT_WARNING_SEC:
+                logger.warning(f'Generator {generator.generator_id} started {generator.drift:.1f}s late')
+            try:
+                await start_generator(generator)
+            except Exception as e:
+                logger.error(f'Generator {generator.generator_id} failed: {repr(e)}')
+            finally:
+                generator.finish = self.now()
+
+    def now(self) -> float:
+        """
+        :return: seconds since test start
+        """
+        return asyncio.get_running_loop().time() - self.test_start
+
+    def drift_report(self) -> str:
+        """
+        :return: report on actual vs planned start times of launched generators
+        """
+        started = [g for g in self.schedule if g.actual_start is not None]
+        if not started:
+            return 'No generators started'
+        drifts = sorted(g.drift for g in started)
+        lines = [f'Schedule drift of {len(started)} generators: '
+                 f'avg={sum(drifts) / len(drifts):.2f}s, '
+                 f'p95={drifts[int(0.95 * (len(drifts) - 1))]:.2f}s, '
+                 f'max={drifts[-1]:.2f}s']
+        lines.extend(f'  {g.generator_id}: planned {g.planned_start:.1f}s, actual {g.actual_start:.2f}s, '
+                     f'drift {g.drift:.2f}s' for g in started if g.drift > DRIFT_WARNING_SEC)
+        return '\n'.join(lines)
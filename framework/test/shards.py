@@ -0,0 +1,89 @@
+import os
+import heapq
+import logging
+from typing import List, Tuple, Dict
+from config import FRAMEWORK_ROOT
+from framework.test.runner import Runner
+from framework.generator.datapool import is_sharded
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def assign_lanes(timings: List[Tuple[float, dict]]) -> Tuple[List[int], int]:
+    """
+    Function to assign concurrency lanes to generators: generators running at the same time
+    get different lanes, generator that starts after another one has finished reuses its lane
+    :param timings: [(start, runner config), ...]
+    :return: lane of every generator, amount of lanes
+    """
+    lanes = [0] * len(timings)
+    running = list()    # heap of (finish, lane)
+    free = list()       # heap of free lanes
+    count = 0
+    for index in sorted(range(len(timings)), key=lambda i: timings[i][0]):
+        start, config = timings[index]
+        while running and running[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(running)[1])
+        if free:
+            lanes[index] = heapq.heappop(free)
+        else:
+            lanes[index] = count
+            count += 1
+        heapq.heappush(running, (start + Runner.from_config(config).duration, lanes[index]))
+    return lanes, count
+
+
+def shard_ranges(path: str, shards: int) -> List[List[int]]:
+    """
+    Function to split file into byte ranges of whole lines, so generator reads only its own range
+    :param path: file path, absolute or relative to framework root
+    :param shards: amount of shards
+    :return: [[start, end], ...] byte offsets of every shard
+    """
+    path = os.path.join(FRAMEWORK_ROOT, path)
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for shard in range(1, shards):
+            # shard starts at the line following its approximate start
+            file.seek(max(size * shard // shards - 1, bounds[-1]))
+            file.readline()
+            bounds.append(min(max(file.tell(), bounds[-1]), size))
+    bounds.append(size)
+    ranges = [[bounds[i], bounds[i + 1]] for i in range(shards)]
+    empty = sum(1 for start, end in ranges if start == end)
+    if empty:
+        logger.warning(f'{path} has too few lines for {shards} shards, {empty} shards are empty')
+    return ranges
+
+
+class DatapoolShards(object):
+    """
+    Class to partition sharded datapool files (datapool -> files section) between concurrently running
+    generators: every concurrency lane gets disjoint byte range of every file
+    """
+    def __init__(self, files_config: dict, timings: List[Tuple[float, dict]]):
+        """
+        :param files_config: datapool -> files section of profile
+        :param timings: [(start, runner config), ...] of test generators
+        """
+        self.lanes, self.count = assign_lanes(timings)
+        self.ranges: Dict[str, List[List[int]]] = {
+            name: shard_ranges(config['path'], self.count)
+            for name, config in (files_config or {}).items()
+            if is_sharded(mode=config.get('mode', 'random'), shard=config.get('shard'))}
+        if self.ranges:
+            logger.info(f'Datapool files {sorted(self.ranges)} split into {self.count} shards')
+
+    def shard(self, generator_index: int) -> dict:
+        """
+        :param generator_index: index of generator in timings
+        :return: shard for generator event: {'index', 'count', 'ranges': {file name: [start, end]}}
+        """
+        if not self.ranges:
+            return None
+        lane = self.lanes[generator_index]
+        return {'index': lane,
+                'count': self.count,
+                'ranges': {name: ranges[lane] for name, ranges in self.ranges.items()}}
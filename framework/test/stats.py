@@ -1,7 +1,7 @@
+import json
 import logging
-from framework.test.serialization import native_object_decoded
 from contextlib import closing
-from locust.stats import RequestStats, StatsEntry, StatsError
+from framework.test.histogram import HistogramStats
 from botocore import response
 
 # stats_logger = logging.getLogger("load_test.stats_logger")
@@ -12,56 +12,64 @@ from botocore import response
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 stats_logger = logging.getLogger("stats_logger")
 
+PERCENTILES_TO_REPORT = [0.50, 0.66, 0.75, 0.80, 0.90, 0.95, 0.98, 0.99, 0.999, 0.9999, 1.0]
+SERIES_TITLES = {'corrected': 'CORRECTED FOR COORDINATED OMISSION (response time from intended send time)',
+                 'phase.connect': 'PHASE: TCP CONNECT (requests that opened new connection)',
+                 'phase.tls': 'PHASE: TLS HANDSHAKE (requests that opened new connection)',
+                 'phase.send': 'PHASE: SEND (request headers and body upload)',
+                 'phase.wait': 'PHASE: WAIT (server think time and network round trip)',
+                 'phase.receive': 'PHASE: RECEIVE (response body download)'}
 
-def extend_stats(stats_log: RequestStats, stats_chunk: RequestStats) -> RequestStats:
+
+def extend_stats(stats_log: HistogramStats, stats_chunk: HistogramStats) -> HistogramStats:
     """
     Function to extend stats log (of the whole test) with stats chunk (from load generator).
-    It was mostly copy-pasted from locust.stats.extend stats since the latter uses global
-    variables of locust.stats module
+    Histograms of the same requests are merged by adding their counters
     :param stats_log: total test stats
     :param stats_chunk: piece of stats to
     :return: resulting extended stats
     """
-
-    for entry in stats_chunk.entries.values():
-        request_key = (entry.name, entry.method)
-        if request_key not in stats_log.entries:
-            stats_log.entries[request_key] = StatsEntry(entry.stats, entry.name, entry.method)
-        stats_log.entries[request_key].extend(entry)
-    for error_key, error in stats_chunk.errors.items():
-        if error_key not in stats_log.errors:
-            stats_log.errors[error_key] = StatsError(error.method, error.name, error.error, error.occurrences)
-        else:
-            stats_log.errors[error_key].occurrences += error.occurrences
-    old_last_request_timestamp = stats_log.total.last_request_timestamp
-    stats_log.total.extend(stats_chunk.total)
-    if stats_log.total.last_request_timestamp \
-            and stats_log.total.last_request_timestamp > (old_last_request_timestamp or 0):
-        stats_log.total._cache_response_times(int(stats_log.total.last_request_timestamp))
+    if stats_chunk:
+        stats_log.extend(stats_chunk)
     return stats_log
 
 
-def get_stats_from_response(resp: response) -> RequestStats:
+def get_stats_from_response(resp: response) -> HistogramStats:
     """
-    Function do decode lambda response into RequestStats object
+    Function do decode lambda response into HistogramStats object
     :param resp: botocore.response
-    :return:
+    :return: HistogramStats or None if generator returned no stats
     """
     b_stats_stream = resp.get('Payload')
     with closing(b_stats_stream):
         b_stats = b_stats_stream.read()
-        stats: RequestStats = native_object_decoded(b_stats)
-    return stats
+    stats_dict = json.loads(b_stats) if b_stats else None
+    return HistogramStats.from_dict(stats_dict) if stats_dict else None
+
+
+def format_ms(value: float) -> str:
+    """
+    :param value: response time in ms
+    :return: whole ms, or ms with fraction for sub-10 ms values
+    """
+    return f'{value:.2f}' if value < 10 else f'{value:.0f}'
+
+
+def percentile_row(entry) -> str:
+    return (" %-60s %-20s %8d " + " ".join(["%6s"] * len(PERCENTILES_TO_REPORT))) % (
+        (entry.method, entry.name, entry.num_requests) +
+        tuple(format_ms(value) for value in entry.percentiles(PERCENTILES_TO_REPORT)))
 
 
-def print_stats(stats: RequestStats, logger=stats_logger):
+def print_stats(stats: HistogramStats, logger=stats_logger, title: str = 'TEST STATISTICS'):
     """
     Function to output total request statistics. 
     :param logger: logger to output 
     :param stats:
+    :param title: report title
     :return:
     """
-    logger.info(f"\nTEST STATISTICS\n{'='*170}\nPercentage of the requests completed within given times")
+    logger.info(f"\n{title}\n{'='*170}\nPercentage of the requests completed within given times")
     logger.info((" %-" + str(60) + "s %-" + str(20) + "s %8s %6s %6s %6s %6s %6s %6s %6s %6s %6s %6s %6s") % (
         'Type',
         'Name',
@@ -81,23 +89,31 @@ def print_stats(stats: RequestStats, logger=stats_logger):
     logger.info("-" * 170)
     for key in sorted(stats.entries.keys()):
         r = stats.entries[key]
-        if r.response_times:
-            logger.info(r.percentile())
+        if r.num_requests:
+            logger.info(percentile_row(r))
     logger.info("-" * 170)
-    if stats.total.response_times:
-        logger.info(stats.total.percentile())
+    if stats.total.num_requests:
+        logger.info(percentile_row(stats.total))
     logger.info("")
+    for name, series in sorted(stats.series.items()):
+        print_stats(series, logger=logger, title=SERIES_TITLES.get(name, name.upper()))
+    if stats.untrusted:
+        logger.info(f"WARNING: {len(stats.untrusted)} generators were overloaded, "
+                    f"their response times may be inflated by the generator itself:")
+        for generator_id, reasons in sorted(stats.untrusted.items()):
+            logger.info(f" {generator_id}: {', '.join(reasons)}")
+        logger.info("")
     if not len(stats.errors):
         return
     logger.info("Error report")
     logger.info(" %-18s %-100s" % ("# occurrences", "Error"))
     logger.info("-" * 170)
     for error in stats.errors.values():
-        logger.info(" %-18i %-100s" % (error.occurrences, error.to_name()))
+        logger.info(" %-18i %-100s" % (error['occurrences'], f"{error['method']} {error['name']}: {error['error']}"))
     logger.info("-" * 170)
     logger.info("")
     
 
-def load_stats() -> RequestStats:
+def load_stats() -> HistogramStats:
     with open('resp.b', 'rb') as file:
-        return native_object_decoded(file.read())
\ No newline at end of file
+        return HistogramStats.from_dict(json.load(file))
\ No newline at end of file
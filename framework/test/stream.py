@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import boto3
+from typing import Dict, List
+from config.test_config_reader import aws_config
+from framework.test.histogram import HistogramStats
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+"""
+Append-only stats stream: each load generator writes a record with its stats for every interval,
+test controller reads records while test is running to get live aggregated stats
+and to recover stats of generators that haven't returned results.
+Record: {'generator_id', 'seq', 'start', 'end', 'user_count', 'final', 'stats': HistogramStats.to_dict()}
+"""
+
+
+class StreamStorage(object):
+    """
+    Base class for stats stream storage. Records are stored as separate objects:
+    <location>/<run_id>/<generator_id>/<seq>.json
+    """
+    def append(self, run_id: str, generator_id: str, seq: int, record: dict):
+        raise NotImplementedError
+
+    def list(self, run_id: str) -> List[str]:
+        """list of all record keys for the test run"""
+        raise NotImplementedError
+
+    def read(self, key: str) -> dict:
+        raise NotImplementedError
+
+    @staticmethod
+    def record_key(run_id: str, generator_id: str, seq: int) -> str:
+        return f'{run_id}/{generator_id}/{seq:06d}.json'
+
+
+class FileStreamStorage(StreamStorage):
+    """
+    Stats stream in local folder, used for local runs
+    """
+    def __init__(self, location: str):
+        self.location = os.path.abspath(location)
+
+    def append(self, run_id: str, generator_id: str, seq: int, record: dict):
+        path = os.path.join(self.location, self.record_key(run_id, generator_id, seq))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write-then-rename, so reader never gets a partial record
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(record, file)
+        os.replace(f'{path}.tmp', path)
+
+    def list(self, run_id: str) -> List[str]:
+        result = list()
+        for root, _, files in os.walk(os.path.join(self.location, run_id)):
+            result.extend(os.path.relpath(os.path.join(root, f), self.location).replace(os.sep, '/')
+                          for f in files if f.endswith('.json'))
+        return result
+
+    def read(self, key: str) -> dict:
+        with open(os.path.join(self.location, key), 'r') as file:
+            return json.load(file)
+
+
+class S3StreamStorage(StreamStorage):
+    """
+    Stats stream in S3 bucket, used for lambda generators
+    """
+    def __init__(self, location: str):
+        bucket_prefix = location[len('s3://'):].strip('/')
+        self.bucket, _, self.prefix = bucket_prefix.partition('/')
+        session = boto3.session.Session(aws_access_key_id=aws_config.get('aws_access_key_id') or None,
+                                        aws_secret_access_key=aws_config.get('aws_secret_access_key') or None)
+        self.client = session.client('s3')
+
+    def _object_key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def append(self, run_id: str, generator_id: str, seq: int, record: dict):
+        self.client.put_object(Bucket=self.bucket,
+                               Key=self._object_key(self.record_key(run_id, generator_id, seq)),
+                               Body=json.dumps(record).encode())
+
+    def list(self, run_id: str) -> List[str]:
+        result = list()
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(f'{run_id}/')):
+            for item in page.get('Contents', []):
+                result.append(item['Key'][len(self.prefix) + 1:] if self.prefix else item['Key'])
+        return result
+
+    def read(self, key: str) -> dict:
+        obj = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        return json.loads(obj['Body'].read())
+
+
+def get_stream_storage(location: str) -> StreamStorage:
+    """
+    :param location: s3://bucket/prefix or local folder path
+    :return: storage instance
+    """
+    if location.startswith('s3://'):
+        return S3StreamStorage(location)
+    return FileStreamStorage(location)
+
+
+class LiveStats(object):
+    """
+    Class to merge stream records into per-interval timeline (all generators) and per-generator totals
+    """
+    def __init__(self, interval: int, keep_intervals: int = 60):
+        self.interval = interval
+        self.keep_intervals = keep_intervals
+        self.timeline: Dict[int, HistogramStats] = dict()     # {interval start: stats of all generators}
+        self.generators: Dict[str, HistogramStats] = dict()   # {generator_id: stats for all its records}
+        self.user_counts: Dict[str, int] = dict()             # {generator_id: users in last record}
+        self.finished = set()                                 # generators which sent final record
+
+    def add(self, record: dict):
+        stats = HistogramStats.from_dict(record['stats'])
+        generator_id = record['generator_id']
+        bucket = int(record['end'] // self.interval * self.interval)
+        self.timeline.setdefault(bucket, HistogramStats()).extend(stats)
+        for old_bucket in [b for b in self.timeline if b < bucket - self.keep_intervals * self.interval]:
+            del self.timeline[old_bucket]
+        self.generators.setdefault(generator_id, HistogramStats()).extend(stats)
+        self.user_counts[generator_id] = record['user_count']
+        if record['final']:
+            self.finished.add(generator_id)
+            self.user_counts[generator_id] = 0
+
+    def last_complete_interval(self, now: float):
+        """
+        :return: (interval start, stats) of the latest interval which all running generators should have reported
+        """
+        complete = [bucket for bucket in self.timeline if bucket + 2 * self.interval <= now]
+        if not complete:
+            return None, None
+        bucket = max(complete)
+        return bucket, self.timeline[bucket]
+
+    def total(self, generator_ids=None) -> HistogramStats:
+        result = HistogramStats()
+        for generator_id, stats in self.generators.items():
+            if generator_ids is None or generator_id in generator_ids:
+                result.extend(stats)
+        return result
+
+
+class StatsStreamReader(object):
+    """
+    Class to tail stats stream of the test run in asyncio task and log live aggregated stats
+    """
+    def __init__(self, storage: StreamStorage, run_id: str, interval: int, poll_interval: int = None):
+        self.storage = storage
+        self.run_id = run_id
+        self.live = LiveStats(interval=interval)
+        self.poll_interval = poll_interval or interval
+        self.read_keys = set()
+        self._task = None
+
+    def poll(self) -> int:
+        """
+        Read and merge all new records
+        :return: amount of new records
+        """
+        new_keys = sorted(set(self.storage.list(self.run_id)) - self.read_keys)
+        for key in new_keys:
+            self.live.add(self.storage.read(key))
+            self.read_keys.add(key)
+        return len(new_keys)
+
+    def log_live_stats(self):
+        bucket, stats = self.live.last_complete_interval(now=time.time())
+        if stats and stats.num_requests:
+            total = stats.total
+            p50, p95, p99 = total.percentiles([0.5, 0.95, 0.99])
+            logger.info(f'Live stats [{time.strftime("%H:%M:%S", time.localtime(bucket))}]: '
+                        f'rps={total.num_requests / self.live.interval:.1f}, '
+                        f'fails={total.num_failures}, '
+                        f'p50={p50:.1f}, p95={p95:.1f}, p99={p99:.1f}, '
+                        f'users={sum(self.live.user_counts.values())}, '
+                        f'generators={len(self.live.user_counts) - len(self.live.finished)}')
+
+    async def _tail(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # storage calls are blocking, so they are done in default thread pool
+                if await loop.run_in_executor(None, self.poll):
+                    self.log_live_stats()
+            except Exception as e:
+                logger.exception(f'Stats stream reading error: {e}')
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._tail())
+
+    async def stop(self):
+        """Stop tailing and read the records left"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.get_running_loop().run_in_executor(None, self.poll)
+
+
+def recover_stats(location: str, run_id: str) -> HistogramStats:
+    """
+    Function to get test stats from stats stream only, e.g. after test controller crash
+    :param location: stats stream location
+    :param run_id: test run id
+    :return: merged stats of all generators
+    """
+    reader = StatsStreamReader(storage=get_stream_storage(location), run_id=run_id, interval=1)
+    reader.poll()
+    return reader.live.total()
@@ -1,20 +1,22 @@
-from framework.test.interval import Interval
-from framework.test.runner import Runner
-from typing import List
+from framework.test.planner import LoadCurve, LoadPlanner, LAMBDA_DURATION
+from framework.test.runner import Runner, parse_timespan
 
 
 class Timings(object):
     """
-    Class to create and handle list of consecutive Intervals for load test
+    Class to plan generator launches for load test runner config or load shape
     """
-    def __init__(self, runner_config: dict):
+    def __init__(self, runner_config: dict, shape_config: dict = None, max_users_per_generator: int = None):
+        self.shape = shape_config
+        self.max_users = max_users_per_generator
+        if self.shape:
+            self.curve = LoadCurve.from_shape(self.shape)
+            return
         self.runner = Runner.from_config(runner_config)
         self.step = self.runner.step
-        self.no_steps = self.runner.clients // self.step.clients
         if not self.__is_runner_consistent():
             raise ValueError('Cannot hatch enough clients for step or whole test')
-        self.interval: Interval = Interval.zero()
-        self.chopped_intervals: List[Interval] = list()
+        self.curve = LoadCurve.from_runner(self.runner)
 
     def __is_runner_consistent(self) -> bool:
         if self.step.enabled:
@@ -25,53 +27,25 @@ class Timings(object):
                 return False
         return True
 
-    def __make_base_interval(self):
+    def get_tolerance(self) -> float:
         """
-        Function to create single interval -- either with stepload or with linear hatch
-        :return:
+        :return: allowed deviation from the shape in users, tolerance can be set in users or in % of max load
         """
-        if self.step.enabled:
-            step_end = None
-            for i in range(self.no_steps):
-                step_interval = Interval.make_load_interval(length=self.step.duration,
-                                                            target_load=self.step.clients,
-                                                            hatch=self.runner.hatch_rate,
-                                                            base=step_end,
-                                                            step=self.step)
-                step_end = step_interval.end
-                self.interval += step_interval
-            reminder = self.runner.duration - self.interval.length
-            if reminder > 0:
-                self.interval += Interval.make_load_interval(length=reminder,
-                                                             target_load=0,
-                                                             hatch=0,
-                                                             base=step_end)
-        else:
-            self.interval = Interval.make_load_interval(length=self.runner.duration,
-                                                        target_load=self.runner.clients,
-                                                        hatch=self.runner.hatch_rate)
-
-    def chop_for_lambda(self, lambda_duration: int = 900):
-        """
-        function to split interval into 'lambda_duration' chunks
-        :param lambda_duration:
-        :return:
-        """
-        interval = self.interval
-        while True:
-            head, interval = interval.split_at(time_from_start=lambda_duration)
-            self.chopped_intervals.append(head)
-            if not interval:
-                return
+        tolerance = str(self.shape.get('tolerance', '5%'))
+        if tolerance.endswith('%'):
+            return self.curve.max_load() * float(tolerance[:-1]) / 100
+        return float(tolerance)
 
-    def get_test_timings(self) -> list:
+    def get_test_timings(self, lambda_duration: int = LAMBDA_DURATION) -> list:
         """
         Function to get list of lambda launch configs
-        :return:
+        :param lambda_duration: max generator run duration
+        :return: [(lambda start time, lambda config), ...]
         """
-        result = list()
-        self.__make_base_interval()
-        self.chop_for_lambda()
-        for interval in self.chopped_intervals:
-            result.extend(interval.lambda_load_config())
-        return result
+        if self.shape:
+            planner = LoadPlanner(curve=self.curve, max_duration=lambda_duration, max_users=self.max_users,
+                                  tolerance=self.get_tolerance(),
+                                  resolution=parse_timespan(str(self.shape.get('resolution', 10))))
+        else:
+            planner = LoadPlanner(curve=self.curve, max_duration=lambda_duration, max_users=self.max_users)
+        return [(start, runner.to_config()) for start, runner in planner.plan()]
@@ -1,7 +1,8 @@
+import json
 import logging
+import argparse
 from framework.generator.launcher import LoadTestLauncher
 from framework.settings import Settings
-from framework.test.serialization import native_object_encoded
 
 logging.basicConfig(level=logging.INFO)
 
@@ -11,18 +12,26 @@ def start(event=None, context=None):
     Lambda load test entry point to start configured load test
     :param event: dict to override test settings from profile.yml
     :param context:
-    :return:
+    :return: HistogramStats as dict
     """
-    stats = None  # Locust stats object
+    stats = None  # HistogramStats object
     try:
         test = LoadTestLauncher(settings=Settings(config=event))
         logging.info(f'Starting test with settings {event}')
         stats = test.start_test()
     except Exception as e:
         logging.exception(f'Test start exception {e}')
-    return native_object_encoded(stats)
+    return stats.to_dict() if stats else None
 
 
 if __name__ == '__main__':
-    start()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event", type=json.loads, default=None,
+                        help="json event to override test settings, like lambda event")
+    parser.add_argument("--output", help="file to save resulting stats json into")
+    args = parser.parse_args()
+    result = start(event=args.event)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(result, output)
 
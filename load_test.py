@@ -1,19 +1,22 @@
+import time
+import asyncio
 import logging
-import threading
-import json
-
-from gevent import monkey
-# The monkey patching must run before requests is imported, or else
-# we'll get an infinite recursion when doing SSL/HTTPS requests.
-# See: https://github.com/requests/requests/issues/3752#issuecomment-294608002
-monkey.patch_all()
-
-from botocore import response
-from config.test_config_reader import runner_config, test_header
-from framework.test.stats import extend_stats, get_stats_from_response, print_stats
+import argparse
+from functools import partial
+
+from config.test_config_reader import runner_config, shape_config, test_header, test_profile, datapool, \
+    controller_config
+from framework.test.executor import get_executor
+from framework.test.exceptions import GeneratorError
+from framework.test.retry import RetryPolicy
+from framework.test.runner import Runner
+from framework.test.planner import LoadShares
+from framework.test.scheduler import GeneratorScheduler, ScheduledGenerator
+from framework.test.shards import DatapoolShards
+from framework.test.stats import extend_stats, print_stats
+from framework.test.stream import StatsStreamReader, get_stream_storage, recover_stats
 from framework.test.timings import Timings
-from aws.prepare_lambda import get_aws_client, lambda_exists
-from locust.stats import RequestStats
+from framework.test.histogram import HistogramStats
 
 
 #TODO: monitor lambda RAM (Lambda listener?)
@@ -26,78 +29,175 @@ logger = logging.getLogger('load_test')
 
 class LoadTest(object):
     """
-    Class to trigger load test in multiple parallel threads
-    thread = lambda execution
+    Class to trigger load test: generators are launched by asyncio scheduler at their start offsets,
+    stats are merged in event loop as generators complete
     """
-    def __init__(self, config=None):
-        self.aws_client = get_aws_client()
-        t = Timings(runner_config=config)
+    def __init__(self, config=None, executor: str = None, shape: dict = None):
+        t = Timings(runner_config=config, shape_config=shape,
+                    max_users_per_generator=controller_config.get('max_users_per_generator'))
         self.timings = t.get_test_timings()
         self.lambda_function_name = test_header['name']
-        self.threads = list()
-        self.lock = threading.Lock()
-        self.test_stats = RequestStats()
+        max_concurrency = controller_config.get('max_concurrent_generators', 100)
+        self.executor = get_executor(name=executor or controller_config.get('executor', 'lambda'),
+                                     function_name=self.lambda_function_name,
+                                     max_concurrency=max_concurrency)
+        self.scheduler = GeneratorScheduler(max_concurrency=max_concurrency)
+        self.retry_policy = RetryPolicy.from_config(controller_config.get('retry'))
+        self.load_shares = None
+        if controller_config.get('rps_governor'):
+            self.load_shares = LoadShares(plan=[(start, Runner.from_config(payload))
+                                                for start, payload in self.timings])
+        self.shards = DatapoolShards(files_config=datapool.get('files'), timings=self.timings)
+        self.test_stats = HistogramStats()
+        self.run_id = f'{self.lambda_function_name}-{time.strftime("%Y%m%d-%H%M%S")}'
+        self.completed_generators = set()
+        self.stream_config = test_profile['profile']['logging'].get('stats_stream', {})
+        self.stream_reader = None
+        if self.stream_config.get('enabled'):
+            self.stream_reader = StatsStreamReader(storage=get_stream_storage(self.stream_config['location']),
+                                                   run_id=self.run_id,
+                                                   interval=self.stream_config.get('stats_interval', 5))
 
-    def start_generator(self, payload):
+    async def start_generator(self, generator: ScheduledGenerator):
         """
-        Function to start lambda load generator and append resulting stats
-        :param payload: lambda invocation config
+        Coroutine to run scheduled generator, its relaunches are scheduled separately
+        :param generator: scheduled generator with runner config and id
         :return:
         """
-        logger.info(f'Starting generator with parameters:\n{payload}')
-        lambda_response = self.start_lambda(payload)
-        logger.info(f'Generator completed. Getting stats...')
-        with self.lock:
-            self.test_stats = extend_stats(stats_log=self.test_stats,
-                                           stats_chunk=get_stats_from_response(lambda_response))
-        logger.info(f'Stats appended. Quitting thread...')
+        await self.run_generator(generator_id=generator.generator_id,
+                                 payload=generator.payload,
+                                 planned_start=generator.planned_start,
+                                 shard=self.shards.shard(int(generator.generator_id)))
 
-    def start_lambda(self, payload, max_retries=3) -> response:
+    async def run_generator(self, generator_id: str, payload: dict, planned_start: float,
+                            shard: dict = None, attempt: int = 1):
         """
-        Function to invoke lambda with recursive retries
-        :param payload: lambda invocation config
-        :param max_retries:
-        :return: botocore.response
+        Coroutine to start load generator and append resulting stats.
+        Stats are merged in event loop thread, so no lock is needed.
+        Failed generator is relaunched for the rest of its load slice through the scheduler,
+        so backoff delay doesn't hold generator slot and each relaunch takes its own slot.
+        Each attempt has its own id, so stats of failed attempt can be salvaged from stats stream
+        :param generator_id: generator id within test run
+        :param payload: runner config for the generator
+        :param planned_start: seconds from test start
+        :param shard: datapool shard of the generator, relaunches take over shard of failed generator
+        :param attempt: launch attempt number
+        :return:
+        """
+        event = {'runner': payload,
+                 'generator': {'run_id': self.run_id, 'id': generator_id, 'shard': shard}}
+        if self.load_shares:
+            event['generator']['load_share'] = self.load_shares.share(start=planned_start,
+                                                                      runner=Runner.from_config(payload))
+        logger.info(f'Starting generator with parameters:\n{event}')
+        try:
+            stats_chunk = await self.executor.invoke(event)
+        except GeneratorError as e:
+            if not self.retry_policy.should_retry(attempt, e):
+                logger.error(f'Generator {generator_id} failed, not relaunching: {repr(e)}')
+                self.log_lost_share(generator_id, payload, planned_start)
+                return
+            delay = self.retry_policy.delay(attempt, e)
+            logger.warning(f'Generator {generator_id} failed: {repr(e)}. Relaunching in {delay:.1f}s')
+            elapsed = int(self.scheduler.now() + delay - planned_start)
+            runner = Runner.from_config(payload)
+            if runner.duration - elapsed < self.retry_policy.min_window:
+                logger.error(f'Generator {generator_id}: {runner.duration - elapsed}s of load left, not relaunching')
+                self.log_lost_share(generator_id, payload, planned_start)
+                return
+            relaunches = runner.remaining(elapsed)
+            for index, (offset, relaunch) in enumerate(relaunches):
+                relaunch_id = f'{generator_id}-r{attempt}' + (f'.{index}' if len(relaunches) > 1 else '')
+                self.scheduler.launch(ScheduledGenerator(generator_id=relaunch_id,
+                                                         planned_start=planned_start + elapsed + offset,
+                                                         payload=relaunch.to_config()),
+                                      partial(self.relaunch_generator, shard=shard, attempt=attempt + 1))
+            return
+        logger.info(f'Generator {generator_id} completed. Getting stats...')
+        self.test_stats = extend_stats(stats_log=self.test_stats,
+                                       stats_chunk=stats_chunk)
+        self.completed_generators.add(generator_id)
+
+    def log_lost_share(self, generator_id: str, payload: dict, planned_start: float):
+        """
+        Function to log load share of generator, which is not relaunched: shares are planned and not rebalanced,
+        so rate governed generators don't make up for it and cluster rps is lower till the end of its slice
+        :param generator_id: generator id within test run
+        :param payload: runner config of the generator
+        :param planned_start: seconds from test start
+        :return:
+        """
+        if not self.load_shares:
+            return
+        runner = Runner.from_config(payload)
+        elapsed = self.scheduler.now() - planned_start
+        lost = self.load_shares.lost_share(start=planned_start, runner=runner, elapsed=elapsed)
+        if lost:
+            logger.warning(f'Generator {generator_id} load share is lost: {lost:.1%} of cluster target rps '
+                           f'for {max(runner.duration - int(elapsed), 0)}s, other generators are not rebalanced')
+
+    async def relaunch_generator(self, generator: ScheduledGenerator, shard: dict, attempt: int):
         """
-        if max_retries == 0:
-            raise RuntimeError(f'Lambda invocation error. Max retries exceeded!')
-        lambda_response = self.aws_client.invoke(FunctionName=self.lambda_function_name,
-                                                 Payload=json.dumps(payload))
-        if 'FunctionError' in lambda_response:
-            logger.error(f'Error executing lambda: {lambda_response}')
-            lambda_response = self.start_lambda(payload=payload,
-                                                max_retries=max_retries-1)
-        else:
-            logger.info(f'Lambda execution finished: {lambda_response}.')
-        return lambda_response
+        Coroutine to run relaunch of failed generator scheduled by run_generator
+        :param generator: scheduled relaunch with runner config for the rest of the load slice
+        :param shard: datapool shard of failed generator
+        :param attempt: launch attempt number
+        :return:
+        """
+        await self.run_generator(generator_id=generator.generator_id,
+                                 payload=generator.payload,
+                                 planned_start=generator.planned_start,
+                                 shard=shard,
+                                 attempt=attempt)
+
+    async def salvage_stream_stats(self):
+        """
+        Function to add stats of generators, which haven't returned results, from stats stream
+        :return:
+        """
+        await self.stream_reader.stop()
+        lost_generators = set(self.stream_reader.live.generators) - self.completed_generators
+        if lost_generators:
+            logger.warning(f'No results from generators {sorted(lost_generators)}, '
+                           f'using their stats from stats stream')
+            self.test_stats = extend_stats(stats_log=self.test_stats,
+                                           stats_chunk=self.stream_reader.live.total(lost_generators))
+
+    async def run_generators(self):
+        schedule = [ScheduledGenerator(generator_id=f'{index:04d}', planned_start=delay, payload=payload)
+                    for index, (delay, payload) in enumerate(self.timings)]
+        if self.stream_reader:
+            self.stream_reader.start()
+        await self.scheduler.run(schedule=schedule, start_generator=self.start_generator)
+        if self.stream_reader:
+            await self.salvage_stream_stats()
 
     def run_test(self):
         """
-        Function to start threaded load test
+        Function to start load test
         :return:
         """
-        if not lambda_exists(client=self.aws_client,
-                             name=self.lambda_function_name):
-            raise ValueError(f'Cannot find {self.lambda_function_name} lambda. '
-                             f'Check region settings or run \"aws\\prepare_lambda.py\" '
-                             f'to create function first.')
+        self.executor.check()
         logger.info(f'Load test timings (start time, generator params):\n {self.timings}\n')
-        for lambda_instance in self.timings:
-            delay, payload = lambda_instance
-            t = threading.Timer(interval=delay,
-                                function=self.start_generator,
-                                kwargs={'payload': payload})
-            self.threads.append(t)
-        for t in self.threads:
-            t.start()
-        for t in self.threads:
-            t.join()
+        logger.info(f'Test run id: {self.run_id}')
+        asyncio.run(self.run_generators())
         logger.info(f'\nTest completed!\n')
+        logger.info(self.scheduler.drift_report())
         print_stats(self.test_stats)
 
 
 if __name__ == '__main__':
-    test = LoadTest(config=runner_config)
-    test.run_test()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recover", metavar='RUN_ID',
+                        help="print stats of the test run from stats stream")
+    parser.add_argument("--executor", choices=['lambda', 'local'],
+                        help="where to run load generators, overrides controller executor setting")
+    args = parser.parse_args()
+    if args.recover:
+        stream_location = test_profile['profile']['logging']['stats_stream']['location']
+        print_stats(recover_stats(location=stream_location, run_id=args.recover))
+    else:
+        test = LoadTest(config=runner_config, executor=args.executor, shape=shape_config)
+        test.run_test()
 
 
@@ -7,7 +7,7 @@ from framework.generator.rps import TaskSetRPS
 from framework.generator.expected import ExpectedResponse
 from framework.api.ACS.api import ACSAPIClient
 from config.test_config_reader import env_config, datapool
-from framework.generator.helpers import CsvData
+from framework.generator.datapool import get_datapool
 
 
 class ACSAPILocust(Locust):
@@ -32,15 +32,14 @@ class GetAssetThreadGroup(TaskSetRPS):
     def __init__(self, *args, **kwargs):
         super(GetAssetThreadGroup, self).__init__(*args, **kwargs)
         self.def_exp = ExpectedResponse()
-        self.generated_assets = CsvData(file_path='tests/ACS/users-assets-revs.csv',
-                                        fieldnames=['iid', 'asset_id', '3', '4', '5'])
+        self.asset_json_response = ExpectedResponse(json={'class': ['Asset']})
+        self.generated_assets = get_datapool('assets').reader()
 
     @task
     def get_asset(self):
         self.keep_rps_at(50)
-        asset_json_response = ExpectedResponse(json={'class': ['Asset']})
-        asset_data = self.generated_assets.get_rand_item()
-        with LocustAsserter(expected=asset_json_response, name='Get asset',
+        asset_data = self.generated_assets.next()
+        with LocustAsserter(expected=self.asset_json_response, name='Get asset',
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.asset.get_asset(iid=asset_data['iid'],
                                                                asset_id=asset_data['asset_id'])
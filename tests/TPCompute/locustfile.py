@@ -3,18 +3,28 @@ import time
 from locust import between, seq_task, TaskSequence, Locust
 
 from framework.generator.asserter import LocustAsserter
-from framework.generator.expected import ExpectedResponse, rextract_data
+from framework.generator.expected import ExpectedResponse
+from framework.generator.extract import Extractor
 from framework.api.TPCompute.api import TPComputeAPIClient
 from framework.api.ACS.api import ACSAPIClient
 from framework.api.Protocol.api import ProtocolAPIClient
 from framework.api.Webhooks.api import HooksClient
 from config.test_config_reader import env_config, common_config, datapool
-from generator.helpers import read_file_from_path
+from framework.generator.helpers import payloads
+from framework.generator.poller import BatchPoller, Backoff
 
 CALCULATION_ID = None
 CALCULATION_SUCCESS_STATUS = 'COMPLETED'
-CALCULATION_SUCCESS_WAIT_INTERVAL_SEC = 300
-CALCULATION_SUCCESS_WAIT_TIMEOUT_MIN = 50
+CALCULATION_SUCCESS_WAIT_DEADLINE_SEC = 600     # waits have to fit into 15 min lambda window
+
+PROPERTIES_ID = Extractor(json_item='properties.id')
+PROPERTIES_STATUS = Extractor(json_item='properties.status')
+PROPERTIES_TOTAL = Extractor(json_item='properties.total')
+
+# one greenlet polls statuses of all calculations of the generator, users are parked until completion
+calculation_poller = BatchPoller(name='Calculation completed',
+                                 deadline=CALCULATION_SUCCESS_WAIT_DEADLINE_SEC,
+                                 backoff=Backoff(interval=10, max_interval=60, factor=1.5, jitter=0.2))
 
 
 class TPComputeAPILocust(Locust):
@@ -44,6 +54,7 @@ class CheckSuggestiveCalculation(TaskSequence):
     def __init__(self, *args, **kwargs):
         super(CheckSuggestiveCalculation, self).__init__(*args, **kwargs)
         self.calculation_id = None
+        self.calculation_started = None
         self.calculation_status = None
         self.webhooks_box_url = None
         self.protocol_id = None
@@ -71,8 +82,7 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.asset.create(**payload)
 
-        asset_id = rextract_data(resp=transaction.response,
-                                 json_item='properties.id')
+        asset_id = PROPERTIES_ID(transaction.response)
         rev_payload = {
             "tags": f"[\"so={self.patient['SO']}\"]"
         }
@@ -81,11 +91,10 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.acs_client.revision.create(asset_id, self.patient['IID'], rev_payload)
 
-        revision_id = rextract_data(resp=transaction.response,
-                                    json_item='properties.id')
+        revision_id = PROPERTIES_ID(transaction.response)
 
         content_type = "application/octet-stream"
-        cut_file = read_file_from_path('3d-cut-suggestive.adf', 'tests/tpcompute/suggestive_flow')
+        cut_file = payloads.file('tests/TPCompute/suggestive_flow/3d-cut-suggestive.adf')
         with LocustAsserter(expected=self.def_exp,
                             name='Upload 3d cut asset revision content',
                             interrupt_flow=True) as transaction:
@@ -106,8 +115,7 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.asset.create(**payload)
 
-        asset_id = rextract_data(resp=transaction.response,
-                                 json_item='properties.id')
+        asset_id = PROPERTIES_ID(transaction.response)
         rev_payload = {
             "tags": self.patient['TAGS'],
         }
@@ -116,11 +124,10 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.acs_client.revision.create(asset_id, rev_payload)
 
-        revision_id = rextract_data(resp=transaction.response,
-                                    json_item='properties.id')
+        revision_id = PROPERTIES_ID(transaction.response)
 
         content_type = "application/octet-stream"
-        cut_painted_file = read_file_from_path('3d-cut-painted-suggestive.adf', 'tests/tpcompute/suggestive_flow')
+        cut_painted_file = payloads.file('tests/TPCompute/suggestive_flow/3d-cut-painted-suggestive.adf')
         with LocustAsserter(expected=self.def_exp,
                             name='Upload 3d cut painted asset revision content',
                             interrupt_flow=True) as transaction:
@@ -140,8 +147,7 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.asset.create(**payload)
 
-        asset_id = rextract_data(resp=transaction.response,
-                                 json_item='properties.id')
+        asset_id = PROPERTIES_ID(transaction.response)
         rev_payload = {
             "tags": self.patient['TAGS'],
         }
@@ -150,11 +156,10 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.acs_client.revision.create(asset_id, rev_payload)
 
-        revision_id = rextract_data(resp=transaction.response,
-                                    json_item='properties.id')
+        revision_id = PROPERTIES_ID(transaction.response)
 
         content_type = "application/octet-stream"
-        cut_painted_file = read_file_from_path('CD-suggestive.xml', 'tests/tpcompute/suggestive_flow')
+        cut_painted_file = payloads.file('tests/TPCompute/suggestive_flow/CD-suggestive.xml')
         with LocustAsserter(expected=self.def_exp,
                             name='Upload XML prescription asset revision content',
                             interrupt_flow=True) as transaction:
@@ -176,8 +181,7 @@ class CheckSuggestiveCalculation(TaskSequence):
         with LocustAsserter(expected=self.def_exp, name='Create protocol',
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.protocol.create(**payload)
-        self.protocol_id = rextract_data(resp=transaction.response,
-                                         json_item='properties.id')
+        self.protocol_id = PROPERTIES_ID(transaction.response)
 
     @seq_task(7)
     def create_protocol_version(self):
@@ -189,8 +193,7 @@ class CheckSuggestiveCalculation(TaskSequence):
         with LocustAsserter(expected=self.def_exp, name='Create version',
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.version.create(self.protocol_id, **payload)
-        self.protocol_version_id = rextract_data(resp=transaction.response,
-                                                 json_item='properties.id')
+        self.protocol_version_id = PROPERTIES_ID(transaction.response)
 
     @seq_task(8)
     def publish_protocol_version(self):
@@ -223,8 +226,8 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.calculation.create(**payload)
 
-        self.calculation_id = rextract_data(resp=transaction.response,
-                                            json_item='properties.id')
+        self.calculation_id = PROPERTIES_ID(transaction.response)
+        self.calculation_started = time.perf_counter()
         exp = ExpectedResponse(text='Calculation')
         with LocustAsserter(expected=exp,
                             name='Get created calculation') as transaction:
@@ -232,19 +235,20 @@ class CheckSuggestiveCalculation(TaskSequence):
 
     @seq_task(11)
     def wait_for_calculation_success_status(self):
-        timeout = 60 * CALCULATION_SUCCESS_WAIT_TIMEOUT_MIN
-        time_started = time.time()
-        while time.time() < time_started + timeout:
-            with LocustAsserter(expected=self.def_exp,
-                                name='Get created calculation') as transaction:
-                transaction.response = self.client.calculation.get(self.calculation_id)
-            calculation_status = rextract_data(resp=transaction.response,
-                                               json_item='properties.status')
-            if calculation_status == CALCULATION_SUCCESS_STATUS:
-                self.calculation_status = calculation_status
-                return
-            else:
-                time.sleep(CALCULATION_SUCCESS_WAIT_INTERVAL_SEC)
+        # time to completion is recorded as 'completion' request 'Calculation completed'
+        self.calculation_status = calculation_poller.wait(key=self.calculation_id,
+                                                          check=self.get_calculation_success_status,
+                                                          started=self.calculation_started)
+
+    def get_calculation_success_status(self):
+        """
+        :return: success status or None if calculation is not completed yet
+        """
+        with LocustAsserter(expected=self.def_exp,
+                            name='Get created calculation') as transaction:
+            transaction.response = self.client.calculation.get(self.calculation_id)
+        calculation_status = PROPERTIES_STATUS(transaction.response)
+        return calculation_status if calculation_status == CALCULATION_SUCCESS_STATUS else None
 
     @seq_task(12)
     def check_calculation_status(self):
@@ -252,8 +256,7 @@ class CheckSuggestiveCalculation(TaskSequence):
                             name='Check calculation status',
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.calculation.get(self.calculation_id)
-            calculation_status = rextract_data(resp=transaction.response,
-                                               json_item='properties.status')
+            calculation_status = PROPERTIES_STATUS(transaction.response)
             assert calculation_status == CALCULATION_SUCCESS_STATUS,\
                 "Calculation success status check failed"
 
@@ -264,8 +267,7 @@ class CheckSuggestiveCalculation(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.webhooks_client.get_hooks(self.webhooks_box_url)
 
-        events_total = rextract_data(resp=transaction.response,
-                                     json_item='properties.total')
+        events_total = PROPERTIES_TOTAL(transaction.response)
         assert events_total == 1, f"Webhook events count check failed"
 
     @seq_task(13)
@@ -277,8 +279,7 @@ class CheckSuggestiveCalculation(TaskSequence):
         with LocustAsserter(expected=self.def_exp, name='Find 3d treatment asset',
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.asset.find(**payload)
-        assets_total = rextract_data(resp=transaction.response,
-                                     json_item='properties.total')
+        assets_total = PROPERTIES_TOTAL(transaction.response)
         assert assets_total == 1, f"ACS treatment asset check failed"
 
 
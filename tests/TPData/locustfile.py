@@ -1,12 +1,14 @@
 from locust import between, seq_task, TaskSequence, Locust
 
 from framework.generator.asserter import LocustAsserter
-from framework.generator.expected import ExpectedResponse, rextract_data
+from framework.generator.expected import ExpectedResponse
+from framework.generator.extract import Extractor
 from framework.api.TPData.api import TPDataAPIClient
-from framework.generator.helpers import make_file_with_size
+from framework.generator.helpers import payloads
 from config.test_config_reader import env_config, test_profile, datapool
 
 TREATMENT_ID = None
+PROPERTIES_ID = Extractor(json_item='properties.id')
 
 
 class TPDataAPILocust(Locust):
@@ -55,8 +57,7 @@ class CheckTreatmentVariants(TaskSequence):
                             interrupt_flow=True) as transaction:
             transaction.response = self.client.treatment.create(**payload)
 
-        self.treatment_id = rextract_data(resp=transaction.response,
-                                          json_item='properties.id')
+        self.treatment_id = PROPERTIES_ID(transaction.response)
         exp = ExpectedResponse(text='Treatment')
         with LocustAsserter(expected=exp,
                             name='Get created treatment') as transaction:
@@ -64,9 +65,9 @@ class CheckTreatmentVariants(TaskSequence):
 
     @seq_task(3)
     def create_new_treatment_variant(self):
-        adf = make_file_with_size('adf.adf', datapool['adf_filesize'])
-        wcc = make_file_with_size('wcc.wcc', datapool['wcc_filesize'])
-        treatment_variant_file = make_file_with_size('treatment-data.xml', datapool['treatment_data_filesize'])
+        adf = payloads.random(datapool['adf_filesize'])
+        wcc = payloads.random(datapool['wcc_filesize'])
+        treatment_variant_file = payloads.random(datapool['treatment_data_filesize'])
         for i in range(int(test_profile['profile']['PLANNUMBER_COUNT'])):
             tvd = {'planNumber': i, 'tags': {'collection': 'tags'}}
             with LocustAsserter(expected=self.def_exp,
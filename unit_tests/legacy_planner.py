@@ -1,12 +1,79 @@
+"""
+Previous generator planner (LoadLevelPoint -> Interval -> Timings decomposition, before LoadPlanner),
+kept as reference for planner property tests
+"""
 import logging
 from typing import List
+from dataclasses import dataclass
 from framework.test.stepload import StepLoad
-from framework.test.llp import LoadLevelPoint, are_aligned
 from framework.test.runner import Runner
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
+@dataclass
+class LoadLevelPoint(object):
+    """
+    Class represents load level vector at time point. Used as definition of load level in:
+    - interval start
+    - load change point
+    - interval end
+    """
+    time: int          # time value of the point
+    load: int          # load level of the point
+    hatch: int         # hatch rate after the point
+
+    def __eq__(self, other):
+        return self.time == other.time
+
+    def __lt__(self, other):
+        return self.time < other.time
+
+    def __add__(self, other):
+        return LoadLevelPoint(time=self.time+other.time, load=self.load+other.load, hatch=self.hatch)
+
+    def __sub__(self, other):
+        return self.load - other.load
+
+    def __str__(self):
+        return f'LLP(time={self.time}, load={self.load}, hatch={self.hatch})'
+
+    def time_gap_to(self, other):
+        return other.time - self.time
+
+    def deviation(self, other) -> int:
+        """ function to estimate if self.hatch points above (1), directly at (0)
+        or below (-1) other LLP"""
+        diff = (other.time - self.time) * self.hatch - (other.load - self.load)
+        if diff > 0:
+            return 1
+        elif diff == 0:
+            return 0
+        else:
+            return -1
+
+    def is_pointing_at(self, other) -> bool:
+        """function checks if hatch rate of current LLP will lead to other LLP"""
+        if isinstance(other, LoadLevelPoint):
+            return self.deviation(other) == 0
+        else:
+            raise TypeError('Can not point at other types!')
+
+    def extend_to(self, time: int):
+        """function returns LLP at the specified time with current hatch"""
+        return LoadLevelPoint(time=time,
+                              load=self.load + self.hatch * (time - self.time),
+                              hatch=self.hatch)
+
+
+def are_aligned(p1: LoadLevelPoint, p2: LoadLevelPoint, p3: LoadLevelPoint) -> bool:
+    """ function to check if three points are on the same line """
+    if p1.is_pointing_at(p2) and p1.is_pointing_at(p3):
+        return True
+    return False
+
+
 LlpList = List[LoadLevelPoint]
 
 
@@ -236,3 +303,76 @@ class Interval(object):
         logger.debug(f'Interval config: {result}')
         return result
 
+
+class Timings(object):
+    """
+    Class to create and handle list of consecutive Intervals for load test
+    """
+    def __init__(self, runner_config: dict):
+        self.runner = Runner.from_config(runner_config)
+        self.step = self.runner.step
+        self.no_steps = self.runner.clients // self.step.clients
+        if not self.__is_runner_consistent():
+            raise ValueError('Cannot hatch enough clients for step or whole test')
+        self.interval: Interval = Interval.zero()
+        self.chopped_intervals: List[Interval] = list()
+
+    def __is_runner_consistent(self) -> bool:
+        if self.step.enabled:
+            if self.step.duration * self.runner.hatch_rate < self.step.clients:
+                return False
+        else:
+            if self.runner.clients > self.runner.duration * self.runner.hatch_rate:
+                return False
+        return True
+
+    def __make_base_interval(self):
+        """
+        Function to create single interval -- either with stepload or with linear hatch
+        :return:
+        """
+        if self.step.enabled:
+            step_end = None
+            for i in range(self.no_steps):
+                step_interval = Interval.make_load_interval(length=self.step.duration,
+                                                            target_load=self.step.clients,
+                                                            hatch=self.runner.hatch_rate,
+                                                            base=step_end,
+                                                            step=self.step)
+                step_end = step_interval.end
+                self.interval += step_interval
+            reminder = self.runner.duration - self.interval.length
+            if reminder > 0:
+                self.interval += Interval.make_load_interval(length=reminder,
+                                                             target_load=0,
+                                                             hatch=0,
+                                                             base=step_end)
+        else:
+            self.interval = Interval.make_load_interval(length=self.runner.duration,
+                                                        target_load=self.runner.clients,
+                                                        hatch=self.runner.hatch_rate)
+
+    def chop_for_lambda(self, lambda_duration: int = 900):
+        """
+        function to split interval into 'lambda_duration' chunks
+        :param lambda_duration:
+        :return:
+        """
+        interval = self.interval
+        while True:
+            head, interval = interval.split_at(time_from_start=lambda_duration)
+            self.chopped_intervals.append(head)
+            if not interval:
+                return
+
+    def get_test_timings(self) -> list:
+        """
+        Function to get list of lambda launch configs
+        :return:
+        """
+        result = list()
+        self.__make_base_interval()
+        self.chop_for_lambda()
+        for interval in self.chopped_intervals:
+            result.extend(interval.lambda_load_config())
+        return result
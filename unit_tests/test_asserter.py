@@ -0,0 +1,122 @@
+"""
+Tests of LocustAsserter events: Locust stats get whole ms, histogram stats get sub-millisecond times,
+transport phases of requests made in transaction get to phase series.
+Needs locust, run with: python -m pytest unit_tests
+"""
+import time
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+asserter = pytest.importorskip('framework.generator.asserter', reason='needs locust')
+from locust import events
+from locust.stats import RequestStats
+from framework.generator.recorder import HistogramRecorder
+
+DURATIONS = 1000    # distinct sub-100 ms durations
+SERVER_WAIT_SEC = 0.02
+BODY = b'x' * 2 ** 16
+
+
+class ReadyResponse(object):
+    content = b'{}'
+
+    def __bool__(self):
+        return True
+
+
+@pytest.fixture
+def locust_stats():
+    stats = RequestStats()
+
+    def on_request_success(request_type, name, response_time, response_length, **kwargs):
+        stats.log_request(request_type, name, response_time, response_length)
+
+    events.request_success += on_request_success
+    yield stats
+    events.request_success -= on_request_success
+
+
+@pytest.fixture
+def recorder():
+    recorder = HistogramRecorder(significant_figures=2)
+    recorder.start()
+    yield recorder
+    recorder.stop()
+
+
+def run_transactions(monkeypatch, durations_ms: list):
+    clock = iter(t for duration in durations_ms for t in (0, int(duration * 1e6)))
+    monkeypatch.setattr(time, 'perf_counter_ns', lambda: next(clock))
+    for _ in durations_ms:
+        with asserter.LocustAsserter(name='asset') as transaction:
+            transaction.response = ReadyResponse()
+
+
+def test_sub_100ms_durations_keep_locust_response_times_bounded(monkeypatch, locust_stats, recorder):
+    durations = [0.1 + 99.8 * i / DURATIONS for i in range(DURATIONS)]
+    run_transactions(monkeypatch, durations)
+    entry = locust_stats.get('asset', asserter.REQUEST_TYPE)
+    assert entry.num_requests == DURATIONS
+    assert len(entry.response_times) <= 101
+    assert all(isinstance(key, int) for key in entry.response_times)
+
+
+def test_histogram_gets_precise_response_time(monkeypatch, locust_stats, recorder):
+    run_transactions(monkeypatch, [0.3] * 10)
+    assert locust_stats.get('asset', asserter.REQUEST_TYPE).response_times == {0: 10}
+    assert recorder.stats.get('asset', asserter.REQUEST_TYPE).percentile(0.5) == pytest.approx(0.3, rel=0.01)
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(SERVER_WAIT_SEC)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/asset'
+    server.shutdown()
+    server.server_close()
+
+
+def test_timing_adapter_phases_reach_histogram(server_url, recorder):
+    timing = pytest.importorskip('framework.api.timing', reason='needs requests')
+    from requests import Session
+    fired = []
+
+    def on_request_success(**kwargs):
+        fired.append(kwargs)
+
+    events.request_success += on_request_success
+    session = Session()
+    session.mount('http://', timing.TimingAdapter())
+    try:
+        for _ in range(2):
+            with asserter.LocustAsserter(name='asset') as transaction:
+                transaction.response = session.get(server_url)
+    finally:
+        events.request_success -= on_request_success
+        session.close()
+
+    first, reused = (kwargs['phase_times'] for kwargs in fired)
+    assert set(first) == {'connect', 'send', 'wait', 'receive'}
+    assert set(reused) == {'send', 'wait', 'receive'}     # keep-alive connection is reused
+    assert first['wait'] >= SERVER_WAIT_SEC * 1000
+    assert sum(first.values()) <= fired[0]['precise_response_time']
+    series = recorder.stats.series
+    for phase, count in (('connect', 1), ('send', 2), ('wait', 2), ('receive', 2)):
+        assert series[f'phase.{phase}'].get('asset', asserter.REQUEST_TYPE).num_requests == count
+    assert series['phase.wait'].get('asset', asserter.REQUEST_TYPE).percentile(0.5) >= SERVER_WAIT_SEC * 1000
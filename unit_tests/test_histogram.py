@@ -0,0 +1,105 @@
+"""
+Tests of latency histograms: percentiles, merging, serialization and sub-millisecond precision
+of request stats and their series.
+Run with: python -m pytest unit_tests
+"""
+import json
+import random
+import pytest
+from framework.test.histogram import HistogramStats, LatencyHistogram
+
+PHASE_MS = 0.3
+
+
+def merged(stats: HistogramStats) -> HistogramStats:
+    """
+    :return: stats passed the way of generator stats: serialized, parsed and merged into test stats
+    """
+    return HistogramStats().extend(HistogramStats.from_dict(json.loads(json.dumps(stats.to_dict()))))
+
+
+def test_phase_series_keeps_sub_ms_precision():
+    stats = HistogramStats()
+    stats.log_request('GET', 'asset', 12.0, 100, timestamp=1.0)
+    stats.get_series('phase.connect').log_request('GET', 'asset', PHASE_MS, 0, timestamp=1.0)
+    entry = merged(stats).series['phase.connect'].get('asset', 'GET')
+    assert entry.percentile(0.5) == pytest.approx(PHASE_MS, rel=0.01)
+    assert entry.percentiles([0.5, 0.99]) == pytest.approx([PHASE_MS, PHASE_MS], rel=0.01)
+    assert entry.avg_response_time == pytest.approx(PHASE_MS)
+
+
+def test_record_request_keeps_sub_ms_phase():
+    recorder = pytest.importorskip('framework.generator.recorder', reason='needs locust')
+    stats = HistogramStats()
+    recorder.record_request(stats, 'GET', 'asset', 12.0, 100, phase_times={'connect': PHASE_MS, 'wait': 11.5})
+    phases = merged(stats).series
+    assert phases['phase.connect'].get('asset', 'GET').percentile(0.5) == pytest.approx(PHASE_MS, rel=0.01)
+    assert phases['phase.wait'].get('asset', 'GET').percentile(0.5) == pytest.approx(11.5, rel=0.01)
+
+
+def test_sub_ms_values_are_distinguished():
+    stats = HistogramStats()
+    for value in (0.2, 0.3, 0.4):
+        stats.log_request('GET', 'asset', value, 0, timestamp=1.0)
+    assert merged(stats).total.percentiles([0.3, 0.6, 1.0]) == pytest.approx([0.2, 0.3, 0.4], rel=0.01)
+
+
+def uniform(histogram: LatencyHistogram, values: range) -> LatencyHistogram:
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def test_percentiles_of_uniform_distribution():
+    histogram = uniform(LatencyHistogram(), range(1, 10001))
+    assert histogram.total_count == 10000
+    assert histogram.percentiles([0.0, 0.5, 0.9, 0.99, 1.0]) == pytest.approx([1, 5000, 9000, 9900, 10000], rel=0.01)
+
+
+def test_percentiles_of_empty_histogram():
+    assert LatencyHistogram().percentiles([0.5, 0.99]) == [0, 0]
+
+
+def test_merge_of_same_layout_adds_counts():
+    rng = random.Random(1)
+    values = [rng.expovariate(1 / 50) for _ in range(2000)]
+    first, second, whole = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for index, value in enumerate(values):
+        (first if index % 2 else second).record(value)
+        whole.record(value)
+    first.percentile(0.5)     # cached cumulative counts are reset by merge
+    merged = first.extend(second)
+    assert merged is first
+    assert merged.total_count == 2000
+    assert merged.counts == whole.counts
+    assert merged.percentiles([0.5, 0.99]) == whole.percentiles([0.5, 0.99])
+
+
+@pytest.mark.parametrize('fine_first', [True, False])
+def test_merge_of_mismatched_layouts_goes_to_coarser_one(fine_first):
+    fine = uniform(LatencyHistogram(significant_figures=3, highest_trackable=1000), range(1, 1001))
+    coarse = uniform(LatencyHistogram(significant_figures=2, units_per_ms=1), range(1001, 2001))
+    first, second = (fine, coarse) if fine_first else (coarse, fine)
+    merged = first.extend(second)
+    assert (merged.significant_figures, merged.highest_trackable, merged.units_per_ms) == \
+        (2, coarse.highest_trackable, 1)
+    assert len(merged.counts) == merged.counts_len
+    assert merged.total_count == 2000
+    assert merged.percentiles([0.25, 0.5, 0.75]) == pytest.approx([500, 1000, 1500], rel=0.01)
+
+
+def test_round_trip_through_dict():
+    histogram = uniform(LatencyHistogram(significant_figures=3), range(0, 5000, 7))
+    histogram.record(0.25, count=3)
+    restored = LatencyHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert restored.is_compatible(histogram)
+    assert restored.counts == histogram.counts
+    assert restored.total_count == histogram.total_count
+    assert restored.percentiles([0.001, 0.5, 1.0]) == histogram.percentiles([0.001, 0.5, 1.0])
+
+
+def test_dict_of_other_layout_is_rejected():
+    data = LatencyHistogram(significant_figures=3).to_dict()
+    data['significant_figures'] = 2
+    with pytest.raises(ValueError):
+        LatencyHistogram.from_dict(data)
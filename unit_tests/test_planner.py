@@ -0,0 +1,159 @@
+"""
+Property tests of generator planner: plans of runner configs are compared with the runner load
+and with plans of the previous planner (see legacy_planner), including tests chopped at lambda duration.
+Run with: python -m pytest unit_tests
+"""
+import itertools
+import pytest
+from framework.test.planner import LoadPlanner, LoadShares, LAMBDA_DURATION
+from framework.test.runner import Runner
+from framework.test.timings import Timings
+from unit_tests import legacy_planner
+
+CLIENTS = (10, 100, 250)
+HATCH_RATES = (1, 3, 10, 100, 250)
+DURATIONS = (60, 600, 900, 1000, 1800, 2700, 3000)
+STEPS = (None, (5, 60), (20, 300), (50, 400), (25, 900), (10, 1000))   # (step clients, step duration)
+
+
+def runner_configs():
+    """
+    :return: hatch (hatch rate < clients), square (hatch rate >= clients) and stepload runner configs,
+    which can hatch all clients within the test
+    """
+    for clients, hatch_rate, duration, step in itertools.product(CLIENTS, HATCH_RATES, DURATIONS, STEPS):
+        # previous planner divides clients by step clients even without stepload
+        config = dict(clients=clients, hatch_rate=hatch_rate, duration=f'{duration}s', step_clients=1)
+        if step:
+            step_clients, step_duration = step
+            if clients % step_clients or clients // step_clients * step_duration > duration:
+                continue
+            if step_clients > step_duration * hatch_rate:
+                continue
+            config.update(step_load=True, step_clients=step_clients, step_duration=f'{step_duration}s')
+        elif clients > duration * hatch_rate:
+            continue
+        yield config
+
+
+def config_id(config: dict) -> str:
+    step = f'-step{config["step_clients"]}x{config["step_duration"]}' if config.get('step_load') else ''
+    return f'{config["clients"]}@{config["hatch_rate"]}-{config["duration"]}{step}'
+
+
+CONFIGS = list(runner_configs())
+
+
+def load_curve(timings: list) -> list:
+    """
+    :param timings: [(lambda start time, lambda config), ...]
+    :return: total clients of all generators in the middle of every second of the test
+    """
+    plan = [(start, Runner.from_config(config)) for start, config in timings]
+    end = int(max((start + runner.duration for start, runner in plan), default=0))
+    return [LoadPlanner.users_at(plan, second + 0.5) for second in range(end)]
+
+
+def runner_curve(config: dict) -> list:
+    runner = Runner.from_config(config)
+    return [runner.users_at(second + 0.5) for second in range(runner.duration)]
+
+
+def settled(curve: list) -> list:
+    """
+    Generator relaunched at lambda duration boundary hatches already running clients within first second,
+    :return: curve without first seconds after boundaries
+    """
+    return [load for second, load in enumerate(curve) if second % LAMBDA_DURATION]
+
+
+def legacy_timings(config: dict):
+    """
+    :return: timings of previous planner or None if it fails on the config
+    """
+    try:
+        return legacy_planner.Timings(config).get_test_timings()
+    except (IndexError, ValueError):
+        return None
+
+
+@pytest.mark.parametrize('config', CONFIGS, ids=config_id)
+def test_plan_follows_runner_load(config):
+    assert settled(load_curve(Timings(config).get_test_timings())) == settled(runner_curve(config))
+
+
+@pytest.mark.parametrize('config', CONFIGS, ids=config_id)
+def test_plan_matches_previous_planner(config):
+    previous = legacy_timings(config)
+    if previous is None or settled(load_curve(previous)) != settled(runner_curve(config)):
+        pytest.skip('previous planner fails or drops load on the config')
+    assert load_curve(Timings(config).get_test_timings()) == load_curve(previous)
+
+
+@pytest.mark.parametrize('config', CONFIGS, ids=config_id)
+def test_generators_fit_lambda_duration(config):
+    for start, generator in Timings(config).get_test_timings():
+        runner = Runner.from_config(generator)
+        assert 0 < runner.duration <= LAMBDA_DURATION
+        assert start // LAMBDA_DURATION == (start + runner.duration - 1) // LAMBDA_DURATION
+
+
+def test_previous_planner_comparison_covers_all_shapes():
+    compared = [config for config in CONFIGS if legacy_timings(config) is not None
+                and settled(load_curve(legacy_timings(config))) == settled(runner_curve(config))]
+    assert any(config['hatch_rate'] < config['clients'] and not config.get('step_load') for config in compared)
+    assert any(config['hatch_rate'] >= config['clients'] and not config.get('step_load') for config in compared)
+    assert any(config.get('step_load') for config in compared)
+    assert any(Runner.from_config(config).duration > LAMBDA_DURATION for config in compared)
+
+
+def test_stepload_crossing_lambda_duration_keeps_load():
+    # previous planner dropped stepload generator between 900s and 1800s
+    config = dict(clients=250, hatch_rate=10, duration='2700s', step_load=True, step_clients=50,
+                  step_duration='400s')
+    curve = load_curve(Timings(config).get_test_timings())
+    assert curve[1000] == runner_curve(config)[1000] == 150
+    assert load_curve(legacy_planner.Timings(config).get_test_timings())[1000] == 0
+
+
+README_SHAPE = {'points': [[0, 0], ['5m', 200], ['10m', 200], ['11m', 1000], ['15m', 1000], ['30m', 100]],
+                'tolerance': '5%', 'resolution': '10s'}
+
+
+def test_stairs_are_not_shorter_than_resolution():
+    timings = Timings({}, shape_config=README_SHAPE)
+    planner = LoadPlanner(curve=timings.curve, tolerance=timings.get_tolerance(), resolution=10)
+    stairs = planner.stairs()
+    assert all(end - start >= 10 for (start, _), (end, _) in zip(stairs, stairs[1:]))
+    # spike 200 -> 1000 in 60s is faster than tolerance allows: equal 10s stairs
+    spike = [level for start, level in stairs if 600 <= start < 660]
+    assert len(spike) == 6 and len({high - low for low, high in zip(spike, spike[1:])}) == 1
+
+
+def test_steep_stairs_are_packed_into_stepload():
+    timings = Timings({}, shape_config=README_SHAPE)
+    spike = [Runner.from_config(config) for start, config in timings.get_test_timings() if 600 <= start < 660]
+    steploads = [runner for runner in spike if runner.step_load]
+    assert len(steploads) == 1 and steploads[0].step_duration == 10
+    assert len(spike) <= 3
+
+
+def test_shape_plan_keeps_tolerance_out_of_steep_segments():
+    timings = Timings({}, shape_config=README_SHAPE)
+    plan = [(start, Runner.from_config(config)) for start, config in timings.get_test_timings()]
+    starts = {int(start) for start, _ in plan}
+    for second in range(int(timings.curve.duration)):
+        if second in starts or 590 <= second < 670:
+            continue
+        load = LoadPlanner.users_at(plan, second + 0.5)
+        assert abs(load - timings.curve.load_at(second + 0.5)) <= timings.get_tolerance() + 1
+
+
+def test_lost_share_is_average_share_of_the_rest_of_slice():
+    first = Runner(clients=10, hatch_rate=100, duration=100)
+    second = Runner(clients=30, hatch_rate=100, duration=50)
+    shares = LoadShares(plan=[(0, first), (0, second)])
+    assert shares.lost_share(start=0, runner=second, elapsed=0) == pytest.approx(0.75)
+    assert shares.lost_share(start=0, runner=first, elapsed=50) == pytest.approx(1.0)
+    assert shares.lost_share(start=0, runner=first, elapsed=0) == pytest.approx((0.25 + 1.0) / 2)
+    assert shares.lost_share(start=0, runner=first, elapsed=100) == 0.0
@@ -0,0 +1,49 @@
+"""
+Tests of completion polling: time to completion stats and batch poller waits.
+Needs locust, run with: python -m pytest unit_tests
+"""
+import time
+import pytest
+
+poller = pytest.importorskip('framework.generator.poller', reason='needs locust')
+from locust import events
+
+
+@pytest.fixture
+def fired():
+    fired = list()
+
+    def on_request(**kwargs):
+        fired.append(kwargs)
+
+    events.request_success += on_request
+    events.request_failure += on_request
+    yield fired
+    events.request_success -= on_request
+    events.request_failure -= on_request
+
+
+def test_completion_fires_whole_ms_and_precise_time(fired):
+    poller.record_completion('Calculation completed', started=time.perf_counter() - 1.2345)
+    poller.record_completion('Calculation completed', started=time.perf_counter() - 0.5,
+                             exception=poller.PollTimeout('late'))
+    for kwargs, expected in zip(fired, (1234.5, 500)):
+        assert isinstance(kwargs['response_time'], int)
+        assert kwargs['response_time'] == round(kwargs['precise_response_time'])
+        assert kwargs['precise_response_time'] == pytest.approx(expected, abs=50)
+    assert isinstance(fired[1]['exception'], poller.PollTimeout)
+
+
+def test_wait_without_any_check_is_rejected():
+    batch = poller.BatchPoller(name='Calculation completed', deadline=1)
+    with pytest.raises(ValueError):
+        batch.wait('calc-1')
+    assert not batch.waiters and batch.greenlet is None
+
+
+def test_wait_gets_result_of_check_many(fired):
+    completed = {'calc-1': 'done'}
+    batch = poller.BatchPoller(name='Calculation completed', deadline=1, backoff=poller.Backoff(interval=0.01),
+                               check_many=lambda keys: {key: completed[key] for key in keys if key in completed})
+    assert batch.wait('calc-1') == 'done'
+    assert [kwargs['name'] for kwargs in fired] == ['Calculation completed']
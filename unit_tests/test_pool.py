@@ -0,0 +1,50 @@
+"""
+Tests of API client pool sharing HTTP adapter between client sessions.
+Run with: python -m pytest unit_tests
+"""
+import logging
+import pytest
+
+pool = pytest.importorskip('framework.api.pool', reason='needs gevent and requests')
+Session = pytest.importorskip('requests').Session
+
+
+class SessionClient(object):
+    def __init__(self):
+        self.session = Session()
+
+
+class PlainClient(object):
+    pass
+
+
+def test_adapter_is_mounted_into_client_session():
+    client_pool = pool.ClientPool()
+    entry = client_pool.get(key='api', create=SessionClient)
+    for url in ('https://api.local/x', 'http://api.local/x'):
+        assert entry.client.session.get_adapter(url) is client_pool.adapter
+    client_pool.clear()
+
+
+def test_client_without_session_is_warned_once_per_type(caplog):
+    client_pool = pool.ClientPool()
+    with caplog.at_level(logging.WARNING, logger=pool.__name__):
+        for key in range(3):
+            client_pool.get(key=key, create=PlainClient)
+    assert [r.getMessage() for r in caplog.records if 'PlainClient' in r.getMessage()] == [
+        'No requests session in PlainClient client, connections are not shared '
+        'and transport phases are not recorded']
+    client_pool.clear()
+
+
+def test_hyperclient_client_gets_shared_adapter():
+    pytest.importorskip('hyperclient.client', reason='needs hyperclient')
+    from config.test_config_reader import env_config
+    from framework.api.ACS.api import ACSAPIClient
+    client_pool = pool.ClientPool()
+    api = ACSAPIClient(config=env_config, jwt_token='token', jwt_auth=True)
+    client = api._create_client()
+    client_pool.share_connections(client)
+    assert isinstance(client.session, Session)
+    assert client.session.get_adapter('https://api.local/x') is client_pool.adapter
+    assert not client_pool.unshared_types
@@ -0,0 +1,68 @@
+"""
+Tests of generator scheduler: concurrency limit and generators launched while the test is running.
+Run with: python -m pytest unit_tests
+"""
+import asyncio
+
+from framework.test.scheduler import GeneratorScheduler, ScheduledGenerator
+
+
+def run(scheduler, schedule, start_generator):
+    asyncio.run(scheduler.run(schedule=schedule, start_generator=start_generator))
+
+
+def test_launched_generators_are_awaited_and_hold_no_slot_before_start():
+    scheduler = GeneratorScheduler(max_concurrency=1)
+    finished = []
+
+    async def start_generator(generator):
+        if generator.generator_id == 'failed':
+            # relaunch after backoff, the slot of failed generator is released right away
+            scheduler.launch(ScheduledGenerator(generator_id='relaunch', planned_start=scheduler.now() + 0.05,
+                                                payload={}), start_generator)
+            return
+        await asyncio.sleep(0.01)
+        finished.append(generator.generator_id)
+
+    run(scheduler, [ScheduledGenerator(generator_id='failed', planned_start=0, payload={}),
+                    ScheduledGenerator(generator_id='next', planned_start=0.01, payload={})], start_generator)
+    assert finished == ['next', 'relaunch']
+    started = {g.generator_id: g for g in scheduler.schedule}
+    assert started['next'].drift < 0.04
+    assert started['relaunch'].actual_start >= started['relaunch'].planned_start
+
+
+def test_concurrency_limit_covers_launched_generators():
+    scheduler = GeneratorScheduler(max_concurrency=2)
+    running = []
+    peak = []
+
+    async def start_generator(generator):
+        running.append(generator)
+        peak.append(len(running))
+        if generator.generator_id.isdigit():
+            scheduler.launch(ScheduledGenerator(generator_id=f'{generator.generator_id}-r1', planned_start=0,
+                                                payload={}), start_generator)
+        await asyncio.sleep(0.01)
+        running.remove(generator)
+
+    run(scheduler, [ScheduledGenerator(generator_id=str(i), planned_start=0, payload={}) for i in range(4)],
+        start_generator)
+    assert len(scheduler.schedule) == 8
+    assert all(g.finish is not None for g in scheduler.schedule)
+    assert max(peak) == 2
+
+
+def test_failed_generator_does_not_stop_others(caplog):
+    scheduler = GeneratorScheduler(max_concurrency=2)
+    finished = []
+
+    async def start_generator(generator):
+        if generator.generator_id == 'broken':
+            raise RuntimeError('boom')
+        finished.append(generator.generator_id)
+
+    run(scheduler, [ScheduledGenerator(generator_id='broken', planned_start=0, payload={}),
+                    ScheduledGenerator(generator_id='ok', planned_start=0, payload={})], start_generator)
+    assert finished == ['ok']
+    assert 'Generator broken failed' in caplog.text
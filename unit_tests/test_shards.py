@@ -0,0 +1,92 @@
+"""
+Tests of datapool sharding: byte ranges of whole lines read by generators and concurrency lanes.
+Needs datapool config (hyperclient), run with: python -m pytest unit_tests
+"""
+import logging
+import random
+import pytest
+
+shards = pytest.importorskip('framework.test.shards', reason='needs hyperclient')
+from framework.generator.datapool import ColumnStore
+
+FIELDNAMES = ['id', 'name']
+
+
+def write_csv(tmp_path, lines: int, trailing_newline: bool = True) -> str:
+    rng = random.Random(lines)
+    rows = [f'{index},{"x" * rng.randrange(0, 40)}' for index in range(lines)]
+    path = tmp_path / 'data.csv'
+    path.write_bytes(('\n'.join(rows) + ('\n' if trailing_newline else '')).encode())
+    return str(path)
+
+
+def shard_rows(path: str, ranges: list) -> list:
+    rows = list()
+    for byte_range in ranges:
+        store = ColumnStore.from_csv(path=path, fieldnames=FIELDNAMES, byte_range=byte_range)
+        rows.append([store.row(index)['id'] for index in range(len(store))])
+    return rows
+
+
+@pytest.mark.parametrize('trailing_newline', [True, False])
+@pytest.mark.parametrize('lines, count', [(1, 1), (1, 3), (2, 5), (7, 3), (100, 1), (100, 7), (1000, 64)])
+def test_ranges_cover_file_and_every_line_is_in_one_shard(tmp_path, lines, count, trailing_newline):
+    path = write_csv(tmp_path, lines, trailing_newline)
+    content = open(path, 'rb').read()
+    ranges = shards.shard_ranges(path, count)
+    assert len(ranges) == count
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    for start, end in ranges:
+        assert start <= end
+        assert start == 0 or start == len(content) or content[start - 1:start] == b'\n'
+    rows = shard_rows(path, ranges)
+    assert [row for shard in rows for row in shard] == [str(index) for index in range(lines)]
+
+
+def test_more_shards_than_lines_leaves_empty_shards(tmp_path, caplog):
+    path = write_csv(tmp_path, 3, trailing_newline=False)
+    with caplog.at_level(logging.WARNING, logger=shards.__name__):
+        ranges = shards.shard_ranges(path, 5)
+    assert sum(1 for start, end in ranges if start == end) == 2
+    assert sorted(len(shard) for shard in shard_rows(path, ranges)) == [0, 0, 1, 1, 1]
+    assert 'too few lines for 5 shards, 2 shards are empty' in caplog.text
+
+
+def test_whole_file_without_range(tmp_path):
+    path = write_csv(tmp_path, 10, trailing_newline=False)
+    store = ColumnStore.from_csv(path=path, fieldnames=FIELDNAMES)
+    assert [store.row(index)['id'] for index in range(len(store))] == [str(index) for index in range(10)]
+
+
+def runner(duration: int) -> dict:
+    return {'clients': 1, 'hatch_rate': 1, 'duration': f'{duration}s'}
+
+
+def test_lanes_are_reused_by_generators_that_do_not_overlap():
+    timings = [(0, runner(10)), (10, runner(10)), (20, runner(10)), (30, runner(10))]
+    assert shards.assign_lanes(timings) == ([0, 0, 0, 0], 1)
+
+
+def test_overlapping_generators_get_different_lanes():
+    timings = [(5, runner(10)), (0, runner(10)), (10, runner(10))]
+    lanes, count = shards.assign_lanes(timings)
+    assert count == 2
+    assert lanes[0] != lanes[1]     # 5..15 and 0..10
+    assert lanes[2] == lanes[1]     # 10..20 starts when 0..10 has finished
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_lanes_of_random_timings(seed):
+    rng = random.Random(seed)
+    timings = [(rng.randrange(0, 100), runner(rng.randrange(1, 30))) for _ in range(30)]
+    lanes, count = shards.assign_lanes(timings)
+    intervals = [(start, start + int(config['duration'][:-1])) for start, config in timings]
+    for i, (start, end) in enumerate(intervals):
+        for j, (other_start, other_end) in enumerate(intervals[:i]):
+            if start < other_end and other_start < end:
+                assert lanes[i] != lanes[j]
+    peak = max(sum(1 for start, end in intervals if start <= moment < end) for moment in range(130))
+    assert count == peak
+    assert set(lanes) == set(range(count))